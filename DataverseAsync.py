@@ -0,0 +1,596 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# asyncio engine: the dataset creation and the file additions as coroutines,
+# with the number of requests in flight bounded by a semaphore, so that one process
+# drives thousands of uploads over several datasets without one thread per request
+# (direct connections only: a server reached through a proxy is refused, see AsyncDataverseEngine.proxies):
+#
+#   engine = AsyncDataverseEngine(concurrency = 256)
+#   results = asyncio.run(engine.runDatasets(datasets))
+
+import sys, os, os.path, time
+import asyncio
+import socket
+import ssl
+import urllib.parse
+from DataverseEngine import DataverseEngine
+from DataverseTransport import DataverseResponse, DataverseMultipart, getProxy
+from DataverseRetry import retryAfter
+from DataverseLimit import GlobalLimiter
+
+class AsyncDataverseSession(object):
+    """ a pool of keep-alive asyncio connections to one server (scheme, host, port) """
+
+    def __init__(self, scheme, host, port, poolsize = 64, timeout = 600):
+        self.scheme     = scheme
+        self.host       = host
+        self.port       = port
+        self.poolsize   = poolsize
+        self.timeout    = timeout
+        self.context    = ssl.create_default_context() if scheme == "https" else None
+        self.idle       = []
+    # end __init__
+
+    async def getConnection(self, timing = None):
+        """ an idle connection if any, or a new one, timing the DNS, connect and TLS phases in timing """
+        while self.idle:
+            reader, writer = self.idle.pop()
+            if (not writer.is_closing()) and (not reader.at_eof()):
+                return reader, writer, True
+            #
+            writer.close()
+        #
+        reader, writer = await asyncio.wait_for(self.connect(timing if (timing is not None) else {}), self.timeout)
+        return reader, writer, False
+    # end getConnection
+
+    async def connect(self, timing):
+        loop = asyncio.get_running_loop()
+        tic = time.perf_counter()
+        addresses = await loop.getaddrinfo(self.host, self.port, type = socket.SOCK_STREAM)
+        timing["dns"] = time.perf_counter() - tic
+        # the TLS handshake told apart from the TCP connection if the streams can start it (Python 3.11)
+        startTLS = (self.context is not None) and hasattr(asyncio.StreamWriter, "start_tls")
+        error = None
+        for (family, socktype, proto, canonname, sockaddr) in addresses:
+            tic = time.perf_counter()
+            try:
+                if (self.context is None) or startTLS:
+                    reader, writer = await asyncio.open_connection(sockaddr[0], sockaddr[1])
+                else:
+                    reader, writer = await asyncio.open_connection(sockaddr[0], sockaddr[1], ssl = self.context, server_hostname = self.host)
+                #
+            except OSError as excT:
+                error = excT
+                continue
+            # end try
+            timing["connect"] = time.perf_counter() - tic
+            if startTLS:
+                tic = time.perf_counter()
+                await writer.start_tls(self.context, server_hostname = self.host)
+                timing["tls"] = time.perf_counter() - tic
+            #
+            return reader, writer
+        #
+        raise error or OSError("cannot resolve %s" % self.host)
+    # end connect
+
+    def releaseConnection(self, reader, writer):
+        if len(self.idle) < self.poolsize:
+            self.idle.append((reader, writer))
+        else:
+            writer.close()
+        #
+    # end releaseConnection
+
+    async def readResponse(self, reader, timing = None, method = "GET"):
+        """ the response read from reader: the body is empty for HEAD and the 1xx, 204 and 304 answers, read up to
+            its length or its last chunk, or up to the end of the connection only if the server closes it """
+        statusLine = await reader.readline()
+        if timing is not None:
+            timing["firstbyte"] = time.perf_counter()
+        #
+        if not statusLine:
+            raise ConnectionResetError("connection closed by the server")
+        #
+        parts = statusLine.decode('latin-1').rstrip("\r\n").split(" ", 2)
+        version = parts[0].upper()
+        status = int(parts[1])
+        reason = parts[2] if len(parts) > 2 else ""
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            #
+            name, value = line.decode('latin-1').split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+        #
+        # an HTTP/1.0 server closes the connection unless it says otherwise
+        if (version == "HTTP/1.0") and (headers.get("connection", "").lower() != "keep-alive"):
+            headers["connection"] = "close"
+        #
+        if (method == "HEAD") or (status < 200) or (status in (204, 304)):
+            content = b""
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0].strip(), 16)
+                if size == 0:
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    #
+                    break
+                #
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+            #
+            content = b"".join(chunks)
+        elif "content-length" in headers:
+            content = await reader.readexactly(int(headers["content-length"]))
+        elif headers.get("connection", "").lower() == "close":
+            content = await reader.read()
+        else:
+            # no length on a kept-alive connection: no body, not waiting for the server to time out
+            content = b""
+        # end if
+        return DataverseResponse(status, reason, headers, content)
+    # end readResponse
+
+    async def request(self, method, url, body = b"", headers = None, limiter = None):
+        """ send the request on a pooled connection and read the whole response;
+            body is bytes or an iterable of chunks with a length (DataverseMultipart);
+            within the requests and bytes per second of limiter (DataverseLimiter, GlobalLimiter if None) """
+
+        urlT = urllib.parse.urlsplit(url)
+        path = urlT.path or "/"
+        if urlT.query:
+            path += "?" + urlT.query
+        #
+        head = "%s %s HTTP/1.1\r\nHost: %s\r\nConnection: keep-alive\r\nContent-Length: %d\r\n" % (method, path, urlT.netloc, len(body))
+        for (name, value) in (headers or {}).items():
+            head += "%s: %s\r\n" % (name, value)
+        #
+        head = (head + "\r\n").encode('utf-8')
+        if isinstance(body, bytes):
+            head, body = head + body, []
+        #
+        limiter = limiter if (limiter is not None) else GlobalLimiter
+        await limiter.waitRequestAsync()
+        loop = asyncio.get_running_loop()
+
+        while True:
+            start = time.perf_counter()
+            timing = {}
+            reader, writer, reused = await self.getConnection(timing)
+            timing["reused"] = reused
+            try:
+                tic = time.perf_counter()
+                if limiter.limited():
+                    await limiter.waitBytesAsync(len(head))
+                #
+                writer.write(head)
+                chunks = iter(body)
+                while True:
+                    # the body read from disk (and hashed) out of the event loop
+                    chunk = await loop.run_in_executor(None, next, chunks, None)
+                    if chunk is None:
+                        break
+                    #
+                    if not limiter.limited():
+                        writer.write(chunk)
+                        await writer.drain()
+                        continue
+                    #
+                    # cut to quantum, for the concurrent uploads to take turns
+                    view = memoryview(chunk)
+                    for offset in range(0, len(view), limiter.quantum):
+                        piece = view[offset:offset + limiter.quantum]
+                        await limiter.waitBytesAsync(len(piece))
+                        writer.write(piece)
+                        await writer.drain()
+                    #
+                #
+                await writer.drain()
+                timing["upload"] = time.perf_counter() - tic
+                tic = time.perf_counter()
+                response = await asyncio.wait_for(self.readResponse(reader, timing, method), self.timeout)
+                # the time until the status line, the download after it
+                timing["server"] = timing.pop("firstbyte") - tic
+                timing["download"] = time.perf_counter() - tic - timing["server"]
+                timing["total"] = time.perf_counter() - start
+                response.timing = timing
+            except (ConnectionResetError, BrokenPipeError, asyncio.IncompleteReadError) as excT:
+                writer.close()
+                # the server closed the idle connection meanwhile: retry once on a fresh one
+                if reused:
+                    continue
+                #
+                raise
+            except BaseException:
+                writer.close()
+                raise
+            # end try
+            if response.headers.get("connection", "").lower() == "close":
+                writer.close()
+            else:
+                self.releaseConnection(reader, writer)
+            #
+            return response
+        #
+
+    # end request
+
+    def close(self):
+        idle, self.idle = self.idle, []
+        for (reader, writer) in idle:
+            writer.close()
+        #
+    # end close
+
+# end AsyncDataverseSession
+
+class AsyncDataverseEngine(DataverseEngine):
+    """ the Dataverse asyncio upload engine """
+
+    def __init__(self, concurrency = None):
+        """ concurrency: the maximum number of requests in flight, all datasets together (64 if None) """
+
+        DataverseEngine.__init__(self)
+
+        self.concurrency    = max(1, int(concurrency or 64))
+        self.semaphore      = None
+        self.sessions       = {}
+
+    # end __init__
+
+    def getSession(self, url):
+        urlT = urllib.parse.urlsplit(url)
+        scheme = urlT.scheme.lower() or "https"
+        port = urlT.port or (443 if scheme == "https" else 80)
+        key = (scheme, urlT.hostname, port)
+        if key not in self.sessions:
+            # not to bypass silently the proxy the thread engine goes through
+            if getProxy(scheme, urlT.hostname) is not None:
+                raise ValueError("%s is reached through a proxy (http_proxy, https_proxy), not supported by the asyncio engine" % urlT.hostname)
+            #
+            self.sessions[key] = AsyncDataverseSession(scheme, urlT.hostname, port, poolsize = self.concurrency)
+        #
+        return self.sessions[key]
+    # end getSession
+
+    def proxies(self):
+        """ the servers of the engine reached through a proxy, which the asyncio engine does not support """
+        servers = []
+        for url in (self.DATAVERSE_SERVER, self.DATASET_SERVER):
+            urlT = urllib.parse.urlsplit(url)
+            if (getProxy(urlT.scheme.lower() or "https", urlT.hostname) is not None) and (urlT.hostname not in servers):
+                servers.append(urlT.hostname)
+            #
+        #
+        return servers
+    # end proxies
+
+    def getSemaphore(self):
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.concurrency)
+        #
+        return self.semaphore
+    # end getSemaphore
+
+    async def createDataset(self, dataset):
+        """ create the dataset and return the server response """
+        JSONhead = {'X-Dataverse-key': self.DATAVERSE_KEY, 'Content-Type': 'application/json'}
+        JSONbody = self.makeJSON(dataset).encode('utf-8')
+        for attempt in range(1, self.retry.attempts + 1):
+            response, error = None, None
+            try:
+                async with self.getSemaphore():
+                    response = await self.getSession(self.DATAVERSE_SERVER).request("POST", self.DATAVERSE_SERVER, JSONbody, JSONhead, self.limiter)
+                #
+                self.recordTiming("create", self.DATAVERSE_SERVER, "", len(JSONbody), response.status, response.timing)
+            except Exception as excT:
+                error = excT
+            # end try
+            if (attempt >= self.retry.attempts) or (not self.retry.isRetryable(response.status if (response is not None) else 0, error)):
+                break
+            #
+            await asyncio.sleep(self.retry.delay(attempt, retryAfter(response.headers) if (response is not None) else None))
+        #
+        if error is not None:
+            raise error
+        #
+        return response.text
+    # end createDataset
+
+    async def addFile(self, persistentId, filename, description, directoryLabel, indexed = False):
+        """ add one file to the dataset and return its result, as DataverseEngine.uploadResult; indexed: skipped if
+            its content is in the (reconciled) index """
+
+        # the local checksum computed out of the event loop
+        result = await asyncio.get_running_loop().run_in_executor(None, self.skipResult, persistentId, filename, indexed)
+        if result is not None:
+            if self.compressor is not None:
+                self.compressor.forget(filename)
+            #
+            return result
+        #
+        result = {"filename": filename, "status": "ERROR", "Stdout": "", "message": ""}
+        source = None
+        if self.compressor is not None:
+            # waited for within the requests in flight, for the copies on disk to stay bounded
+            try:
+                async with self.getSemaphore():
+                    source = self.compressor.done(filename, await asyncio.wrap_future(self.compressor.future(filename)))
+                #
+            except Exception:
+                source = None
+            # end try
+        #
+        # the requests refused for a while are sent again after a backoff, out of the semaphore;
+        # a locked dataset is left to addFiles and addStream, which wait for it once for all its files
+        # a file stored corrupted (checksum mismatch) is removed and sent again at once
+        algorithm = self.checksumType if self.verifyChecksum else None
+        for attempt in range(1, self.retry.attempts + 1):
+            result.update({"status": "ERROR", "Stdout": "", "message": ""})
+            result.pop("mismatch", None)
+            response, error = None, None
+            try:
+                async with self.getSemaphore():
+                    if self.progress is not None:
+                        self.progress.begin(filename)
+                    #
+                    body = DataverseMultipart(
+                        [("jsonData", self.metadata.fileData(description, directoryLabel))],
+                        [("file", os.path.basename(source or filename), source or filename)],
+                        chunksize = self.uploadChunkSize,
+                        progress = (lambda path, nbytes: self.progress.advance(filename, nbytes)) if (self.progress is not None) else None,
+                        checksum = algorithm)
+                    JSONhead = {'X-Dataverse-key': self.DATAVERSE_KEY, 'Content-Type': body.contentType}
+                    url = "%s/:persistentId/add?persistentId=%s" % (self.DATASET_SERVER, urllib.parse.quote(persistentId, safe = ":/"))
+                    response = await self.getSession(url).request("POST", url, body, JSONhead, self.limiter)
+                #
+                self.recordTiming("add", url, filename, len(body), response.status, response.timing)
+                result["Stdout"] = response.text
+                digest = body.digests.get(source or filename)
+                # the journal and index written out of the event loop
+                await asyncio.get_running_loop().run_in_executor(None, self.checkResult, persistentId, result, response.status,
+                                                                 (source or filename, algorithm, digest) if digest else None)
+                algorithm = self.checksumType if self.verifyChecksum else None
+            except Exception as excT:
+                error = excT
+                result["message"] = str(excT)
+            # end try
+            if "mismatch" in result:
+                if (attempt >= self.retry.attempts) or (not await self.deleteFile(persistentId, result["mismatch"])):
+                    result["message"] += " (file id %s left in the dataset)" % result["mismatch"]
+                    break
+                #
+                continue
+            #
+            if (result["status"] != "ERROR") or (attempt >= self.retry.attempts) or (not self.retry.isRetryable(response.status if (response is not None) else 0, error)):
+                break
+            #
+            await asyncio.sleep(self.retry.delay(attempt, retryAfter(response.headers) if (response is not None) else None))
+        #
+        if self.compressor is not None:
+            self.compressor.release(source)
+        #
+        if self.progress is not None:
+            self.progress.end(filename, result["status"])
+        #
+        return result
+
+    # end addFile
+
+    async def deleteFile(self, persistentId, fileId):
+        """ as DataverseEngine.deleteFile """
+        if fileId is None:
+            return False
+        #
+        url = "%s/files/%s" % (self.DATASET_SERVER.rsplit("/", 1)[0], fileId)
+        try:
+            async with self.getSemaphore():
+                response = self.parseResponse((await self.getSession(url).request("DELETE", url, b"", {'X-Dataverse-key': self.DATAVERSE_KEY}, self.limiter)).text)
+            #
+        except Exception:
+            return False
+        # end try
+        if self.cache is not None:
+            self.cache.invalidate(urllib.parse.quote(persistentId, safe = ":/"))
+        #
+        return (response is not None) and (response.get("status") == "OK")
+    # end deleteFile
+
+    async def waitUnlocked(self, persistentId):
+        url = "%s/:persistentId/locks?persistentId=%s" % (self.DATASET_SERVER, urllib.parse.quote(persistentId, safe = ":/"))
+        tic = time.time()
+        delay = 0.5
+        while (time.time() - tic) < self.lockTimeout:
+            try:
+                response = self.parseResponse((await self.getSession(url).request("GET", url, b"", {'X-Dataverse-key': self.DATAVERSE_KEY}, self.limiter)).text)
+                if (response is not None) and (response.get("status") == "OK") and (not response.get("data")):
+                    return True
+                #
+            except Exception:
+                pass
+            # end try
+            await asyncio.sleep(delay)
+            delay = min(2.0 * delay, 10.0)
+        #
+        return False
+    # end waitUnlocked
+
+    async def addFiles(self, persistentId, files, indexed = False):
+        """ add the files, a list of (filename, description, directoryLabel), concurrently; returns the per-file results;
+            indexed: skip the files whose content is in the (reconciled) index """
+
+        # the files skipped (journal, index) found first, never announced to the compressor
+        loop = asyncio.get_running_loop()
+        results = list(await asyncio.gather(*[loop.run_in_executor(None, self.skipResult, persistentId, fileT[0], indexed) for fileT in files]))
+        pending = [ii for ii in range(0, len(files)) if results[ii] is None]
+        if self.compressor is not None:
+            self.compressor.expect([files[ii][0] for ii in pending])
+        #
+        if self.serializeUploads:
+            for ii in pending:
+                results[ii] = await self.addFile(persistentId, *files[ii])
+            #
+        else:
+            resultsT = await asyncio.gather(*[self.addFile(persistentId, *files[ii]) for ii in pending])
+            for (ii, result) in zip(pending, resultsT):
+                results[ii] = result
+            #
+        #
+        # the files refused because of a dataset lock are sent again, one at a time, once the lock is released
+        for ii in range(0, len(results)):
+            if results[ii]["status"] == "LOCKED":
+                await self.waitUnlocked(persistentId)
+                results[ii] = await self.addFile(persistentId, *files[ii])
+            #
+        #
+        return results
+
+    # end addFiles
+
+    async def addStream(self, persistentId, files, indexed = False):
+        """ add the files of an iterable, such as scanFiles still walking the disk, as they come, no more than
+            two per request in flight waiting; indexed: skip the files whose content is in the (reconciled) index;
+            returns (number of files accepted, list of the results of the other files) """
+
+        counts = {"accepted": 0}
+        failed = []
+        locked = []
+
+        def collect(results):
+            for (fileT, result) in results:
+                if result["status"] == "OK":
+                    counts["accepted"] += 1
+                elif result["status"] == "LOCKED":
+                    locked.append(fileT)
+                else:
+                    failed.append(result)
+                #
+            #
+        # end collect
+
+        loop = asyncio.get_running_loop()
+        files = iter(files)
+        pending = set()
+        while True:
+            # the tree walked out of the event loop, the requests running meanwhile
+            fileT = await loop.run_in_executor(None, next, files, None)
+            if fileT is None:
+                break
+            #
+            # the files skipped (journal, index) reported at once, never announced to the compressor
+            skipped = await loop.run_in_executor(None, self.skipResult, persistentId, fileT[0], indexed)
+            if skipped is not None:
+                collect([(fileT, skipped)])
+                continue
+            #
+            if len(pending) >= (2 * self.concurrency):
+                done, pending = await asyncio.wait(pending, return_when = asyncio.FIRST_COMPLETED)
+                collect([(task.fileT, task.result()) for task in done])
+            #
+            if self.compressor is not None:
+                self.compressor.expect([fileT[0]])
+            #
+            task = asyncio.ensure_future(self.addFile(persistentId, *fileT))
+            task.fileT = fileT
+            pending.add(task)
+        #
+        if pending:
+            collect([(task.fileT, task.result()) for task in (await asyncio.wait(pending))[0]])
+        #
+
+        # the files refused because of a dataset lock are sent again, one at a time, once the lock is released
+        for fileT in locked:
+            await self.waitUnlocked(persistentId)
+            result = await self.addFile(persistentId, *fileT)
+            if result["status"] == "OK":
+                counts["accepted"] += 1
+            else:
+                failed.append(result)
+            #
+        #
+        return counts["accepted"], failed
+
+    # end addStream
+
+    async def runDataset(self, dataset):
+        """ create the dataset (unless it has a persistentId) then upload its files """
+
+        result = {"title": dataset.get("title", ""), "persistentId": dataset.get("persistentId", ""), "JSON": "", "Data": []}
+        if self.isDescribed(dataset):
+            # parsed out of the event loop
+            dataset = await asyncio.get_running_loop().run_in_executor(None, self.describeDataset, dataset)
+        #
+        key = self.datasetKey(dataset) if (self.journal is not None) else None
+        if (not result["persistentId"]) and (key is not None):
+            result["persistentId"] = self.journal.getDataset(key) or ""
+        #
+        if not result["persistentId"]:
+            result["JSON"] = await self.createDataset(dataset)
+            result["persistentId"] = self.parsePersistentId(result["JSON"])
+            if not result["persistentId"]:
+                raise ValueError("dataset not created: %s" % result["JSON"].strip())
+            #
+            if key is not None:
+                self.journal.recordDataset(key, result["persistentId"])
+            #
+        #
+        files = self.listFiles(dataset)
+        if self.progress is not None:
+            self.progress.expect(files)
+        #
+        # the index reconciled with the dataset files once, for the listed and the scanned files
+        indexed = (self.index is not None) and (await asyncio.get_running_loop().run_in_executor(None, self.reconcileIndex, result["persistentId"]))
+        result["Data"] = await self.addFiles(result["persistentId"], files, indexed)
+        if dataset.get("ScanDirectory", ""):
+            result["streamed"], failed = await self.addStream(result["persistentId"], self.streamFiles(dataset), indexed)
+            result["Data"] += failed
+        #
+        return result
+
+    # end runDataset
+
+    async def runDatasets(self, datasets):
+        """ create and populate all the datasets concurrently; returns the results, in the datasets order """
+
+        async def runT(dataset):
+            try:
+                result = await self.runDataset(dataset)
+                result["status"] = "ERROR" if [fileT for fileT in result["Data"] if fileT["status"] != "OK"] else "OK"
+            except Exception as excT:
+                result = {"title": dataset.get("title", ""), "persistentId": dataset.get("persistentId", ""), "status": "ERROR", "message": str(excT), "Data": []}
+            # end try
+            return result
+        # end runT
+
+        try:
+            return list(await asyncio.gather(*[runT(dataset) for dataset in datasets]))
+        finally:
+            self.close()
+        # end try
+
+    # end runDatasets
+
+    def close(self):
+        """ close the connections; the engine can then run again in another event loop """
+        for session in self.sessions.values():
+            session.close()
+        #
+        self.sessions = {}
+        self.semaphore = None
+    # end close
+
+# end AsyncDataverseEngine
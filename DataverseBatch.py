@@ -0,0 +1,377 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# Batch upload driven by a manifest file (JSON, TOML or CSV), without the GUI:
+#   python DataverseBatch.py campaign.toml
+#
+# JSON and TOML manifests:
+#   server:     {"key": ..., "dataverse": ..., "dataset": ...}     (optional)
+#   defaults:   dataset fields shared by all the datasets          (optional)
+#   datasets:   list of datasets, with the fields named as in DataverseCore
+#               (title, description, author, affiliation, keyword, ..., DataFilename, DataDescription)
+#   ScanDirectory:  directory whose tree is uploaded while it is walked, the directoryLabel of each
+#               file being DataDirectory followed by its directory relative to ScanDirectory; the files
+#               are filtered by ScanInclude/ScanExclude (glob patterns, on the relative path if they
+#               hold a '/', on the name otherwise) and ScanMinSize/ScanMaxSize (in bytes)
+#
+# CSV manifests: one row per data file, the rows sharing the same "dataset" column
+# belong to the same dataset; list fields (author, keyword...) are separated by ";".
+#
+# The journal knows a dataset by its "dataset" name, unique in the manifest; an unnamed dataset is
+# not journaled (created again when the job is run again), its position and title being no safe key.
+
+import sys, os, os.path, time
+import argparse
+import json
+import csv
+from DataverseEngine import DataverseEngine, DatasetFields, DatasetListFields
+from DataverseJournal import DataverseJournal
+from DataverseCache import DataverseCache
+from DataverseMetadata import DataverseMetadata
+from DataverseProgress import DataverseProgress
+
+def readTOML(filename):
+    """ load a TOML file, with tomllib (Python 3.11+) or the tomli/toml packages """
+    try:
+        import tomllib
+    except ImportError:
+        try:
+            import tomli as tomllib
+        except ImportError:
+            tomllib = None
+        # end try
+    # end try
+    if tomllib is not None:
+        with open(filename, "rb") as fileT:
+            return tomllib.load(fileT)
+        #
+    #
+    import toml
+    with open(filename, "r") as fileT:
+        return toml.load(fileT)
+    #
+# end readTOML
+
+def readCSV(filename):
+    """ load a CSV manifest: one row per data file """
+    datasets = []
+    datasetsByName = {}
+    with open(filename, "r", newline = "", encoding = "utf-8") as fileT:
+        for row in csv.DictReader(fileT):
+            row = dict((key.strip(), (value or "").strip()) for (key, value) in row.items() if key)
+            name = row.get("dataset", "") or row.get("title", "")
+            dataset = datasetsByName.get(name)
+            if dataset is None:
+                dataset = {"dataset": name, "DataFilename": [], "DataDescription": []}
+                datasetsByName[name] = dataset
+                datasets.append(dataset)
+            #
+            for field in DatasetFields:
+                value = row.get(field, "")
+                if (not value) or (field in ("DataFilename", "DataDescription")):
+                    continue
+                #
+                if field in DatasetListFields:
+                    value = [item.strip() for item in value.split(";")]
+                #
+                dataset.setdefault(field, value)
+            #
+            if row.get("DataFilename", ""):
+                dataset["DataFilename"].append(row["DataFilename"])
+                dataset["DataDescription"].append(row.get("DataDescription", ""))
+            #
+        #
+    #
+    return {"datasets": datasets}
+# end readCSV
+
+def readManifest(filename):
+    """ load a manifest and return (server, datasets), with the defaults applied and the paths resolved """
+
+    ext = os.path.splitext(filename)[1].lower()
+    if ext == ".json":
+        with open(filename, "r", encoding = "utf-8") as fileT:
+            manifest = json.load(fileT)
+        #
+    elif ext == ".toml":
+        manifest = readTOML(filename)
+    elif ext == ".csv":
+        manifest = readCSV(filename)
+    else:
+        raise ValueError("unknown manifest format: %s (expected .json, .toml or .csv)" % filename)
+    # end if
+
+    server = manifest.get("server", {})
+    defaults = manifest.get("defaults", {})
+    baseDir = os.path.dirname(os.path.abspath(filename))
+
+    datasets = []
+    names = set()
+    for entry in manifest.get("datasets", []):
+        dataset = dict(defaults)
+        dataset.update(entry)
+        if dataset.get("dataset"):
+            if dataset["dataset"] in names:
+                raise ValueError("duplicate dataset name: %s" % dataset["dataset"])
+            #
+            names.add(dataset["dataset"])
+        #
+        for field in DatasetListFields:
+            if isinstance(dataset.get(field, []), str):
+                dataset[field] = [dataset[field]]
+            #
+        #
+        for field in ("JSONfilename", "ReportFilename", "ScanDirectory"):
+            if dataset.get(field, ""):
+                dataset[field] = os.path.join(baseDir, dataset[field])
+            #
+        #
+        dataset["DataFilename"] = [(os.path.join(baseDir, tFilename) if tFilename else "") for tFilename in dataset.get("DataFilename", [])]
+        datasets.append(dataset)
+    #
+
+    return server, datasets
+
+# end readManifest
+
+def printResult(result):
+    """ the failed files and the status line of the dataset """
+    for fileT in [fileT for fileT in result.get("Data", []) if fileT["status"] != "OK"]:
+        print("\n! cannot upload the file '%s':\n  %s\n" % (fileT["filename"], fileT["message"]))
+    #
+    if result.get("message"):
+        print("\n! cannot upload the dataset '%s':\n  %s\n" % (result["title"], result["message"]))
+    #
+    print("%s  %s  %d file(s)  %.3f sec.  %s" % (result["status"], result.get("persistentId") or "-", len(result.get("Data", [])) + result.get("streamed", 0), result["elapsed"], result["title"]))
+# end printResult
+
+def runBatch(engine, datasets, dryrun = False):
+    """ create and populate all the datasets, one after the other; returns the list of results """
+
+    results = []
+    for dataset in datasets:
+        tic = time.time()
+        try:
+            if dryrun:
+                if engine.isDescribed(dataset):
+                    dataset = engine.describeDataset(dataset)
+                #
+                result = {"title": dataset.get("title", ""), "persistentId": dataset.get("persistentId", ""), "JSON": engine.makeJSON(dataset), "Data": []}
+                result["Data"] = [{"filename": filename, "status": "OK", "Stdout": "", "message": "", "description": description, "directoryLabel": directoryLabel} for (filename, description, directoryLabel) in engine.listFiles(dataset)]
+                result["Data"] += [{"filename": filename, "status": "OK", "Stdout": "", "message": "", "description": description, "directoryLabel": directoryLabel} for (filename, description, directoryLabel) in engine.streamFiles(dataset)]
+            else:
+                result = engine.runDataset(dataset)
+            #
+            result["status"] = "ERROR" if [fileT for fileT in result["Data"] if fileT["status"] != "OK"] else "OK"
+        except Exception as excT:
+            result = {"title": dataset.get("title", ""), "persistentId": dataset.get("persistentId", ""), "status": "ERROR", "message": str(excT)}
+        # end try
+        result["elapsed"] = float(time.time() - tic)
+        results.append(result)
+        printResult(result)
+    #
+    return results
+
+# end runBatch
+
+def printProgress(progress):
+    """ the progress line, on stderr: rewritten in place on a terminal, one line per report otherwise """
+    if sys.stderr.isatty():
+        sys.stderr.write("\r" + progress.format().ljust(79))
+    else:
+        sys.stderr.write(progress.format() + "\n")
+    #
+    sys.stderr.flush()
+# end printProgress
+
+def main(argv = None):
+
+    parser = argparse.ArgumentParser(description = "Dataverse Utility: batch upload from a manifest file (JSON, TOML or CSV)")
+    parser.add_argument("manifest", help = "the manifest file describing the datasets and their files")
+    parser.add_argument("--key", help = "the Dataverse API key (default: manifest, then DATAVERSE_KEY environment variable)")
+    parser.add_argument("--dataverse-server", dest = "dataverse", help = "the dataverse URL where the datasets are created")
+    parser.add_argument("--dataset-server", dest = "dataset", help = "the datasets API URL where the files are added")
+    parser.add_argument("--curl", dest = "curl", action = "store_true", default = None, help = "upload with curl")
+    parser.add_argument("--no-curl", dest = "curl", action = "store_false", help = "upload without curl")
+    parser.add_argument("--workers", type = int, help = "number of concurrent file uploads per dataset")
+    parser.add_argument("--datasets", type = int, metavar = "N", help = "upload the files of N datasets at a time, each one as soon as it is created, the next datasets being created meanwhile (default: one dataset after the other)")
+    parser.add_argument("--asyncio", action = "store_true", help = "upload all the datasets concurrently with the asyncio engine (--workers requests in flight); not with --zip, --direct, --adaptive, --curl or --datasets, nor through a proxy")
+    parser.add_argument("--zip", dest = "bundle", action = "store_true", help = "send the files of each dataset in zip archives built on the fly (unzipped by Dataverse), one per file description; sent chunked, without length")
+    parser.add_argument("--retries", type = int, default = 4, help = "times a request refused for a while (429, 503, locked dataset, lost connection) is sent again, after a jittered backoff (default: 4)")
+    parser.add_argument("--adaptive", type = int, metavar = "MAX", help = "adapt the number of uploads in flight to the server, from --workers up to MAX (halved when the server pushes back)")
+    parser.add_argument("--max-rate", dest = "maxrate", help = "the most bytes per second sent by the job, shared by its uploads, such as 500k or 10M (default: no limit)")
+    parser.add_argument("--max-requests", dest = "maxrequests", help = "the most requests per second sent by the job (default: no limit)")
+    parser.add_argument("--limits", help = "a file of lines 'rate = 10M' and 'requests = 5', read again whenever it changes, to change the limits while the job runs")
+    parser.add_argument("--compress", nargs = "?", const = "gzip", choices = ["gzip", "bz2", "lzma"], help = "send the data files compressed (gzip by default), on all the cores, ahead of the uploads; not with --zip")
+    parser.add_argument("--compress-level", dest = "compresslevel", type = int, help = "the compression level (default: 1, the fastest)")
+    parser.add_argument("--compress-ratio", dest = "compressratio", type = float, default = 0.8, help = "compress a file only if a sample of it shrinks to this ratio or less (default: 0.8)")
+    parser.add_argument("--direct", nargs = "?", const = "0", metavar = "SIZE", help = "send the files of SIZE bytes or more (such as 100M; all of them by default) straight to the object store of Dataverse through presigned URLs, in parallel parts, the server only registering them (files sent through the server if it does not allow it); not with --curl or --asyncio")
+    parser.add_argument("--no-verify", dest = "noverify", action = "store_true", help = "do not compare the checksum of each file, computed while it is sent, with the one returned by the server (a file stored corrupted is otherwise removed and sent again)")
+    parser.add_argument("--serialize", action = "store_true", help = "upload one file at a time (dataset locked on each upload)")
+    parser.add_argument("--describe", action = "store_true", help = "derive the empty file and dataset descriptions from the header and columns of the measurement files (AutoDescription of a dataset)")
+    parser.add_argument("--indent", action = "store_true", help = "send (and write to JSONfilename) the dataset JSON indented, not compact")
+    parser.add_argument("--dry-run", dest = "dryrun", action = "store_true", help = "only build the JSON and list the files")
+    parser.add_argument("--journal", help = "the journal of the accepted files, to resume an interrupted job (default: the manifest name + .journal)")
+    parser.add_argument("--no-journal", dest = "nojournal", action = "store_true", help = "upload everything, without journal")
+    parser.add_argument("--dedup", action = "store_true", help = "skip the files whose content is already in the dataset")
+    parser.add_argument("--index", help = "the deduplication index (default: ~/.dataverse-utility/index.sqlite)")
+    parser.add_argument("--cache", nargs = "?", const = "", metavar = "FILE", help = "cache the dataset info and file listings, in FILE (default: ~/.dataverse-utility/cache.sqlite)")
+    parser.add_argument("--cache-ttl", dest = "cachettl", type = float, default = 60, help = "seconds during which a cached answer is used without asking the server (default: 60)")
+    parser.add_argument("--no-cache", dest = "nocache", action = "store_true", help = "always ask the server (the default, unless --cache)")
+    parser.add_argument("--progress", action = "store_true", help = "show the files and bytes sent, the throughput and the time left (on stderr)")
+    parser.add_argument("--timings", help = "record the phases of every request (DNS, connect, TLS, upload, server, download) to this file: CSV if it ends with .csv, JSON lines otherwise")
+    parser.add_argument("--output", help = "write the results (server responses included) to this JSON file")
+    args = parser.parse_args(argv)
+
+    if args.asyncio:
+        # the options of the thread engine that the asyncio engine does not have
+        unsupported = [option for (option, value) in (("--zip", args.bundle), ("--direct", args.direct is not None), ("--adaptive", args.adaptive),
+                                                      ("--curl", args.curl), ("--datasets", args.datasets)) if value]
+        if unsupported:
+            print("\n! not with --asyncio: %s\n" % ", ".join(unsupported))
+            return 2
+        #
+    #
+
+    try:
+        server, datasets = readManifest(args.manifest)
+    except Exception as excT:
+        print("\n! cannot read the manifest:\n  %s\n" % str(excT))
+        return 2
+    # end try
+
+    # asyncio and the index (sqlite3, hashlib) are loaded only when used
+    if args.asyncio:
+        import asyncio
+        from DataverseAsync import AsyncDataverseEngine
+        engine = AsyncDataverseEngine(concurrency = args.workers)
+    else:
+        engine = DataverseEngine()
+    #
+    engine.DATAVERSE_KEY = args.key or server.get("key", "") or os.environ.get("DATAVERSE_KEY", "") or engine.DATAVERSE_KEY
+    engine.DATAVERSE_SERVER = args.dataverse or server.get("dataverse", "") or engine.DATAVERSE_SERVER
+    engine.DATASET_SERVER = args.dataset or server.get("dataset", "") or engine.DATASET_SERVER
+    if args.asyncio and engine.proxies():
+        print("\n! not with --asyncio: %s reached through a proxy (http_proxy, https_proxy)\n" % ", ".join(engine.proxies()))
+        return 2
+    #
+    if args.curl is not None:
+        engine.useCurl = args.curl
+    #
+    if args.workers is not None:
+        engine.uploadWorkers = args.workers
+    #
+    if args.datasets:
+        engine.datasetWorkers = args.datasets
+    #
+    engine.retry.attempts = max(0, args.retries) + 1
+    if args.adaptive:
+        from DataverseRetry import DataverseConcurrency
+        engine.adaptive = DataverseConcurrency(initial = args.workers or engine.uploadWorkers, maximum = args.adaptive)
+    #
+    if args.maxrate or args.maxrequests or args.limits:
+        from DataverseLimit import DataverseLimiter, parseRate, watchLimits
+        try:
+            engine.limiter = DataverseLimiter(parseRate(args.maxrate or 0), parseRate(args.maxrequests or 0))
+        except ValueError as excT:
+            print("\n! invalid limit:\n  %s\n" % str(excT))
+            return 2
+        # end try
+        if args.limits and (not args.dryrun):
+            watchLimits(args.limits, engine.limiter)
+        #
+    #
+    if args.direct is not None:
+        from DataverseLimit import parseRate
+        try:
+            engine.directUploadSize = int(parseRate(args.direct))
+        except ValueError as excT:
+            print("\n! invalid size:\n  %s\n" % str(excT))
+            return 2
+        # end try
+    #
+    engine.serializeUploads = args.serialize
+    engine.verifyChecksum = not args.noverify
+    engine.autoDescription = args.describe
+    engine.metadata = DataverseMetadata(compact = not args.indent)
+    engine.bundleFiles = args.bundle
+    if (not args.nojournal) and (not args.dryrun):
+        engine.journal = DataverseJournal(args.journal or (args.manifest + ".journal"))
+        for dataset in [dataset for dataset in datasets if not dataset.get("dataset")]:
+            print("\n! the dataset '%s' has no name: not journaled, created again if the job is run again\n" % dataset.get("title", ""))
+        #
+    #
+    if (args.dedup or args.index) and (not args.dryrun):
+        from DataverseIndex import DataverseIndex
+        engine.index = DataverseIndex(args.index or os.path.join(os.path.expanduser("~"), ".dataverse-utility", "index.sqlite"))
+    #
+    if (args.cache is not None) and (not args.nocache) and (not args.dryrun):
+        engine.cache = DataverseCache(args.cache or os.path.join(os.path.expanduser("~"), ".dataverse-utility", "cache.sqlite"), ttl = args.cachettl)
+    #
+
+    if args.timings and (not args.dryrun):
+        from DataverseTiming import DataverseTimings
+        engine.timings = DataverseTimings(args.timings)
+    #
+    if args.compress and (not args.bundle) and (not args.dryrun):
+        from DataverseCompress import DataverseCompressor
+        engine.compressor = DataverseCompressor(args.compress, level = args.compresslevel, threshold = args.compressratio)
+    #
+    if args.progress and (not args.dryrun):
+        engine.progress = DataverseProgress(printProgress, interval = 0.5 if sys.stderr.isatty() else 5.0)
+    #
+
+    if (not args.dryrun) and (not args.asyncio):
+        engine.warmup()
+    #
+
+    tic = time.time()
+    if args.asyncio and (not args.dryrun):
+        results = asyncio.run(engine.runDatasets(datasets))
+        for result in results:
+            print("%s  %s  %d file(s)  %s" % (result["status"], result.get("persistentId") or "-", len(result.get("Data", [])) + result.get("streamed", 0), result["title"]))
+        #
+    elif args.datasets and (not args.dryrun):
+        # each dataset reported as it ends
+        results = engine.runDatasets(datasets, callback = lambda index, result: printResult(result))
+    else:
+        results = runBatch(engine, datasets, dryrun = args.dryrun)
+    #
+    failed = len([result for result in results if result["status"] != "OK"])
+    if engine.progress is not None:
+        printProgress(engine.progress)
+    #
+    if engine.timings is not None:
+        engine.timings.close()
+    #
+    if engine.compressor is not None:
+        engine.compressor.close()
+        if engine.compressor.bytesIn:
+            print("\ncompressed: %d bytes sent for %d (%.1f%%)" % (engine.compressor.bytesOut, engine.compressor.bytesIn, 100.0 * engine.compressor.bytesOut / engine.compressor.bytesIn))
+        #
+    #
+    if engine.adaptive is not None:
+        print("\nuploads in flight: %s" % " ".join(["%d" % int(limit) for (toc, limit) in engine.adaptive.history]))
+    #
+    print("\n%d dataset(s), %d failed, elapsed time = %.6f sec." % (len(results), failed, float(time.time() - tic)))
+
+    if args.output:
+        with open(args.output, "w", encoding = "utf-8") as fileT:
+            json.dump(results, fileT, indent = 4)
+        #
+    #
+
+    return 1 if failed else 0
+
+# end main
+
+if __name__ == "__main__":
+    sys.exit(main())
+# end if
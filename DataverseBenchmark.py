@@ -0,0 +1,704 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# Benchmarks of the utility, each one a subcommand:
+#   python DataverseBenchmark.py startup [--repeat N] [--output startup.json]
+#   python DataverseBenchmark.py upload [--sizes 1k,1M,100M] [--counts 1,10,100] [--workers 1,4,16]
+#                                       [--modes python,curl,asyncio,zip] [--latency 50] [--bandwidth 100]
+#                                       [--capacity 8] [--adaptive 32] [--part-size 8M] [--store-bandwidth 500]
+#                                       [--repeat N] [--output upload.json]
+#   python DataverseBenchmark.py compare before.json after.json
+#   python DataverseBenchmark.py serve [--port 8765] [--latency 50] [--bandwidth 100] [--capacity 8] [--part-size 8M]
+# startup: the time to import each module in a fresh interpreter (median of N runs),
+# and whether the headless modules stay free of Tk
+# upload: the time to create a dataset and add its files (DataverseEngine.runDataset) for each file size,
+# number of files, number of workers and transport, against a local stand-in of Dataverse started
+# in a separate process (serve), answering after latency ms and reading at most bandwidth MB/s,
+# busy (503) beyond capacity file additions at a time; the direct mode sends the files to the stand-in of the object
+# store of the server (presigned URLs, parts of part-size bytes), whose bandwidth is not the one of the server
+# compare: the ratio of the times of two reports, case by case
+
+import sys, os, os.path, time
+import argparse
+import json
+import subprocess
+import statistics
+import threading
+import itertools
+import hashlib
+import urllib.parse
+
+# the modules timed by startup, and whether their import may load Tk
+StartupModules = [
+    ("DataverseEngine", False),
+    ("DataverseBatch", False),
+    ("DataverseCore", False),
+    ("DataverseGUI", True),
+]
+
+# run in the fresh interpreter: import the module and print the time spent and whether tkinter was loaded
+StartupScript = "import sys, time\n" \
+                "tic = time.perf_counter()\n" \
+                "import %s\n" \
+                "toc = time.perf_counter()\n" \
+                "print('%%.6f %%d' %% (toc - tic, 'tkinter' in sys.modules))\n"
+
+def timeImport(module, directory = None):
+    """ import module in a fresh interpreter and return (seconds spent, tkinter loaded) """
+    env = dict(os.environ)
+    directory = directory or os.path.dirname(os.path.abspath(__file__))
+    env["PYTHONPATH"] = directory + ((os.pathsep + env["PYTHONPATH"]) if env.get("PYTHONPATH") else "")
+    Stdout = subprocess.check_output([sys.executable, "-c", StartupScript % module], env = env, cwd = directory)
+    seconds, tkLoaded = Stdout.decode("utf-8").split()[-2:]
+    return float(seconds), (tkLoaded == "1")
+# end timeImport
+
+def benchStartup(args):
+    """ the startup benchmark: median import time of each module """
+    results = []
+    for (module, tkAllowed) in StartupModules:
+        times = []
+        tkLoaded = False
+        try:
+            for ii in range(0, max(1, args.repeat)):
+                seconds, tkT = timeImport(module)
+                times.append(seconds)
+                tkLoaded = tkLoaded or tkT
+            #
+        except subprocess.CalledProcessError as excT:
+            # Tk not installed: DataverseGUI cannot be imported
+            print("%-18s  cannot be imported (%s)" % (module, str(excT)))
+            results.append({"module": module, "error": str(excT)})
+            continue
+        # end try
+        result = {"module": module, "median_ms": 1000.0 * statistics.median(times), "min_ms": 1000.0 * min(times),
+                  "max_ms": 1000.0 * max(times), "repeat": len(times), "tkinter": tkLoaded}
+        results.append(result)
+        flag = "" if (tkAllowed or (not tkLoaded)) else "  ! tkinter loaded"
+        print("%-18s  median %7.1f ms  (min %.1f, max %.1f)%s" % (module, result["median_ms"], result["min_ms"], result["max_ms"], flag))
+    #
+    failed = [result["module"] for (result, (module, tkAllowed)) in zip(results, StartupModules) if result.get("tkinter") and (not tkAllowed)]
+    return results, (1 if failed else 0)
+# end benchStartup
+
+# the file sizes of the upload benchmark: k, M and G suffixes (powers of 1000)
+SizeUnits = {"k": 1000, "M": 1000 ** 2, "G": 1000 ** 3}
+
+def parseSize(strT):
+    strT = strT.strip()
+    if strT and (strT[-1] in SizeUnits):
+        return int(float(strT[:-1]) * SizeUnits[strT[-1]])
+    #
+    return int(strT)
+# end parseSize
+
+def parseList(strT, parse = str):
+    return [parse(item) for item in strT.split(",") if item.strip()]
+# end parseList
+
+def makePace(bandwidth):
+    """ pace(nbytes) waiting for nbytes to be read at bandwidth bytes per second (0: unlimited), shared by the connections """
+
+    # the time at which the link is free again
+    link = {"free": 0.0, "mutex": threading.Lock()}
+
+    def pace(nbytes):
+        if not bandwidth:
+            return
+        #
+        with link["mutex"]:
+            now = time.time()
+            start = max(now, link["free"])
+            link["free"] = start + (nbytes / bandwidth)
+            delay = link["free"] - now
+        #
+        if delay > 0:
+            time.sleep(delay)
+        #
+    # end pace
+
+    return pace
+# end makePace
+
+def makeMockHandler(latency, bandwidth, capacity = 0, partSize = 0, storeBandwidth = 0, refuse = 0, corrupt = 0, lengthRequired = False):
+    """ the request handler of the Dataverse stand-in: latency in seconds before each answer,
+        bandwidth in bytes per second shared by all the uploads (0: unlimited),
+        capacity: the file additions served at a time, the others answered 503 (0: unlimited);
+        partSize: the part size of the direct uploads to the stand-in of the object store (under /s3/, with
+        presigned URLs, ETags and multipart uploads as S3), 0 if direct upload is not enabled;
+        storeBandwidth: the bandwidth of the object store, apart from the one of the server (0: unlimited);
+        refuse: the first file additions answered 503 whatever the load (for the tests of the retries);
+        corrupt: the first files added stored with another checksum, as if corrupted on the way (for the tests of the verification);
+        lengthRequired: the file additions sent chunked (without Content-Length) answered 411, as by some front ends;
+        a zip file added is unzipped, as by Dataverse """
+
+    import http.server
+
+    counter = itertools.count(1)
+    # the file additions in flight
+    load = {"inflight": 0, "refuse": refuse, "corrupt": corrupt, "mutex": threading.Lock()}
+    pace = makePace(bandwidth)
+    paceStore = makePace(storeBandwidth)
+    # the object store: storage identifier -> (size, MD5), and the parts of the multipart uploads in progress
+    store = {"objects": {}, "parts": {}, "mutex": threading.Lock()}
+    # the file entries of each dataset, listed and removed as by Dataverse
+    datasets = {"files": {}, "mutex": threading.Lock()}
+
+    class MockPart(object):
+        """ the MD5 of the first file of a multipart body read in chunks: its bytes between its part head and the next boundary,
+            returned as the checksum of the stored file; the bytes of a zip file are kept in content, to be unzipped """
+
+        def __init__(self, contentType):
+            self.delimiter  = b"\r\n--" + contentType.partition("boundary=")[2].strip().strip("\"").encode("latin-1")
+            self.buffer     = b""
+            self.started    = False
+            self.ended      = False
+            # not a multipart body (an object sent to the store): the whole body
+            self.whole      = "boundary=" not in contentType
+            self.hashT      = hashlib.md5()
+            self.content    = None
+        # end __init__
+
+        def update(self, data):
+            self.hashT.update(data)
+            if self.content is not None:
+                self.content += data
+            #
+        # end update
+
+        def feed(self, data):
+            if self.whole:
+                self.hashT.update(data)
+                return
+            #
+            if self.ended:
+                return
+            #
+            self.buffer += data
+            if not self.started:
+                start = self.buffer.find(b"filename=\"")
+                start = self.buffer.find(b"\r\n\r\n", start) if (start >= 0) else -1
+                if start < 0:
+                    return
+                #
+                self.started = True
+                if self.buffer[0:start].split(b"filename=\"", 1)[-1].split(b"\"", 1)[0].lower().endswith(b".zip"):
+                    self.content = bytearray()
+                #
+                self.buffer = self.buffer[start + 4:]
+            #
+            end = self.buffer.find(self.delimiter)
+            if end >= 0:
+                self.update(self.buffer[0:end])
+                self.buffer = b""
+                self.ended = True
+                return
+            #
+            # the delimiter may be cut between two chunks
+            keep = len(self.buffer) - len(self.delimiter) + 1
+            if keep > 0:
+                self.update(self.buffer[0:keep])
+                self.buffer = self.buffer[keep:]
+            #
+        # end feed
+
+        def hexdigest(self):
+            return self.hashT.hexdigest()
+        # end hexdigest
+
+    # end MockPart
+
+    class DataverseMockHandler(http.server.BaseHTTPRequestHandler):
+        """ dataset creation, file addition and removal, file listing and locks, and the direct uploads to the store;
+            the bodies are read, hashed and dropped """
+
+        protocol_version = "HTTP/1.1"
+        # the headers and the body of the answers are written apart: not delayed by the Nagle algorithm
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+        # end log_message
+
+        def readBody(self, pace = pace):
+            """ read the body in chunks, paced to the bandwidth; returns its first bytes (the multipart head), its size
+                and the MD5 of its first file (of the whole body if not multipart); a zip file is kept in zipped """
+            head = b""
+            size = 0
+            part = MockPart(self.headers.get("Content-Type", ""))
+            self.part = part
+            if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+                while True:
+                    length = int(self.rfile.readline().strip().split(b";")[0], 16)
+                    if length == 0:
+                        self.rfile.readline()
+                        break
+                    #
+                    data = self.rfile.read(length)
+                    self.rfile.readline()
+                    pace(length)
+                    part.feed(data)
+                    if len(head) < 4096:
+                        head += data[0:4096]
+                    #
+                    size += length
+                #
+                return head, size, part.hexdigest()
+            #
+            left = int(self.headers.get("Content-Length", 0))
+            while left > 0:
+                data = self.rfile.read(min(left, 1 << 16))
+                if not data:
+                    break
+                #
+                pace(len(data))
+                part.feed(data)
+                if len(head) < 4096:
+                    head += data[0:4096]
+                #
+                size += len(data)
+                left -= len(data)
+            #
+            return head, size, part.hexdigest()
+        # end readBody
+
+        def unzip(self, number, jsonData):
+            """ the files of the zip file added, each one an entry with its path in the archive and the description of the zip """
+            import io
+            import zipfile
+            entries = []
+            with zipfile.ZipFile(io.BytesIO(bytes(self.part.content))) as archive:
+                for (ii, info) in enumerate([info for info in archive.infolist() if not info.is_dir()]):
+                    data = archive.read(info)
+                    directoryLabel, sep, label = info.filename.rpartition("/")
+                    entries.append({"label": label, "directoryLabel": directoryLabel, "description": jsonData.get("description") or "",
+                                    "dataFile": {"id": "%d.%d" % (number, ii + 1), "filesize": len(data), "checksum": {"type": "MD5", "value": hashlib.md5(data).hexdigest()}}})
+                #
+            #
+            with datasets["mutex"]:
+                datasets["files"].setdefault(self.persistentId(), []).extend(entries)
+            #
+            self.answer(200, {"status": "OK", "data": {"files": entries}})
+        # end unzip
+
+        def persistentId(self):
+            return urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query).get("persistentId", [""])[0]
+        # end persistentId
+
+        def addEntry(self, entry):
+            """ add the file entry to the dataset of the request and answer it """
+            with datasets["mutex"]:
+                datasets["files"].setdefault(self.persistentId(), []).append(entry)
+            #
+            self.answer(200, {"status": "OK", "data": {"files": [entry]}})
+        # end addEntry
+
+        def answer(self, code, obj):
+            """ the JSON answer, or no body at all if obj is None (204) """
+            if latency:
+                time.sleep(latency)
+            #
+            self.send_response(code)
+            if obj is None:
+                self.end_headers()
+                self.wfile.flush()
+                return
+            #
+            content = json.dumps(obj).encode("utf-8")
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+            self.wfile.flush()
+        # end answer
+
+        def do_POST(self):
+            adding = "/:persistentId/add" in self.path
+            if adding:
+                with load["mutex"]:
+                    load["inflight"] += 1
+                    busy = bool(capacity) and (load["inflight"] > capacity)
+                    if (not busy) and (load["refuse"] > 0):
+                        load["refuse"] -= 1
+                        busy = True
+                    #
+                #
+            #
+            try:
+                self.post(adding and busy)
+            finally:
+                if adding:
+                    with load["mutex"]:
+                        load["inflight"] -= 1
+                    #
+                #
+            # end try
+        # end do_POST
+
+        def post(self, busy):
+            head, size, checksum = self.readBody()
+            number = next(counter)
+            if busy:
+                self.answer(503, {"status": "ERROR", "message": "server busy"})
+            elif lengthRequired and ("/:persistentId/add" in self.path) and ("Content-Length" not in self.headers):
+                self.answer(411, {"status": "ERROR", "message": "length required"})
+            elif "/:persistentId/add" in self.path:
+                jsonData = json.loads(head.split(b"name=\"jsonData\"\r\n\r\n", 1)[-1].split(b"\r\n--", 1)[0].decode("utf-8")) if (b"name=\"jsonData\"" in head) else {}
+                directoryLabel = jsonData.get("directoryLabel") or ""
+                if jsonData.get("storageIdentifier"):
+                    # a file sent to the store, registered: the checksum declared by the client
+                    with store["mutex"]:
+                        stored = store["objects"].pop(jsonData["storageIdentifier"], None)
+                    #
+                    if stored is None:
+                        self.answer(400, {"status": "ERROR", "message": "no object %s in the store" % jsonData["storageIdentifier"]})
+                    else:
+                        checksum = jsonData.get("checksum") or {}
+                        self.addEntry({"label": jsonData.get("fileName", ""), "directoryLabel": directoryLabel, "dataFile": {"id": number, "filesize": stored[0],
+                                       "storageIdentifier": jsonData["storageIdentifier"], "checksum": {"type": checksum.get("@type"), "value": checksum.get("@value")}}})
+                    #
+                    return
+                #
+                label = head.split(b"filename=\"", 1)[-1].split(b"\"", 1)[0].decode("utf-8", "replace")
+                if self.part.content is not None:
+                    self.unzip(number, jsonData)
+                    return
+                #
+                with load["mutex"]:
+                    if load["corrupt"] > 0:
+                        load["corrupt"] -= 1
+                        checksum = hashlib.md5(checksum.encode("ascii")).hexdigest()
+                    #
+                #
+                self.addEntry({"label": label, "directoryLabel": directoryLabel, "description": jsonData.get("description") or "",
+                               "dataFile": {"id": number, "filesize": size, "checksum": {"type": "MD5", "value": checksum}}})
+            elif self.path.startswith("/api/dataverses/"):
+                self.answer(201, {"status": "OK", "data": {"id": number, "persistentId": "doi:10.5072/FK2/B%06d" % number}})
+            else:
+                self.answer(404, {"status": "ERROR", "message": "not found"})
+            #
+        # end post
+
+        def do_PUT(self):
+            if self.path.startswith("/s3/"):
+                # an object, or a part of a multipart upload, answered with its ETag as S3
+                head, size, checksum = self.readBody(paceStore)
+                query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+                key = urllib.parse.urlsplit(self.path).path[len("/s3/"):]
+                with store["mutex"]:
+                    if "uploadId" in query:
+                        store["parts"].setdefault(query["uploadId"][0], {})[query["partNumber"][0]] = (size, checksum)
+                    else:
+                        store["objects"]["s3://" + key.replace("/", ":", 1)] = (size, checksum)
+                    #
+                #
+                self.send_response(200)
+                self.send_header("ETag", "\"%s\"" % checksum)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                self.wfile.flush()
+            elif self.path.startswith("/api/datasets/mpupload"):
+                # the multipart upload completed with the ETags of its parts
+                etags = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))).decode("utf-8"))
+                query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+                with store["mutex"]:
+                    parts = store["parts"].pop(query["uploadid"][0], {})
+                    complete = (sorted(parts) == sorted(etags)) and all([etags[number].strip("\"") == parts[number][1] for number in parts])
+                    if complete:
+                        store["objects"][query["storageidentifier"][0]] = (sum([part[0] for part in parts.values()]), "")
+                    #
+                #
+                if complete:
+                    self.answer(200, {"status": "OK", "data": {"message": "Multipart upload completed"}})
+                else:
+                    self.answer(400, {"status": "ERROR", "message": "missing or wrong parts"})
+                #
+            else:
+                self.readBody()
+                self.answer(404, {"status": "ERROR", "message": "not found"})
+            #
+        # end do_PUT
+
+        def do_DELETE(self):
+            if self.path.startswith("/api/datasets/mpupload"):
+                query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+                with store["mutex"]:
+                    store["parts"].pop(query["uploadid"][0], None)
+                #
+                # no body with a 204, as Dataverse
+                self.answer(204, None)
+                return
+            #
+            fileId = self.path.rstrip("/").rsplit("/", 1)[-1]
+            with datasets["mutex"]:
+                for entries in datasets["files"].values():
+                    entries[:] = [entry for entry in entries if str(entry["dataFile"]["id"]) != fileId]
+                #
+            #
+            self.answer(200, {"status": "OK", "data": {"message": "deleted"}})
+        # end do_DELETE
+
+        def uploadUrls(self):
+            """ the presigned URLs of an object of the store: one URL, or one per part beyond partSize """
+            if not partSize:
+                self.answer(400, {"status": "ERROR", "message": "Direct upload not supported for files in this dataset"})
+                return
+            #
+            size = int(urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query).get("size", ["0"])[0])
+            number = next(counter)
+            key = "bucket/%012x-%06d" % (int(time.time() * 1000), number)
+            storageIdentifier = "s3://" + key.replace("/", ":", 1)
+            base = "http://%s/s3/%s" % (self.headers.get("Host", "127.0.0.1"), key)
+            signature = "X-Amz-Algorithm=AWS4-HMAC-SHA256&X-Amz-Expires=3600&X-Amz-Signature=%032x" % number
+            if size <= partSize:
+                self.answer(200, {"status": "OK", "data": {"url": "%s?%s" % (base, signature), "partSize": partSize, "storageIdentifier": storageIdentifier}})
+                return
+            #
+            uploadId = "upload%06d" % number
+            urls = dict([(str(ii + 1), "%s?uploadId=%s&partNumber=%d&%s" % (base, uploadId, ii + 1, signature)) for ii in range(0, (size + partSize - 1) // partSize)])
+            query = "uploadid=%s&storageidentifier=%s" % (uploadId, urllib.parse.quote(storageIdentifier, safe = ""))
+            self.answer(200, {"status": "OK", "data": {"urls": urls, "abort": "/api/datasets/mpupload?" + query, "complete": "/api/datasets/mpupload?" + query,
+                                                       "partSize": partSize, "storageIdentifier": storageIdentifier}})
+        # end uploadUrls
+
+        def do_GET(self):
+            if "/uploadurls" in self.path:
+                self.uploadUrls()
+            elif "/locks" in self.path:
+                self.answer(200, {"status": "OK", "data": []})
+            elif "/files" in self.path:
+                with datasets["mutex"]:
+                    entries = list(datasets["files"].get(self.persistentId(), []))
+                #
+                self.answer(200, {"status": "OK", "data": entries})
+            else:
+                self.answer(200, {"status": "OK", "data": {"version": "mock"}})
+            #
+        # end do_GET
+
+    # end DataverseMockHandler
+
+    return DataverseMockHandler
+
+# end makeMockHandler
+
+def benchServe(args):
+    """ run the Dataverse stand-in until killed; prints the port first """
+    import http.server
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", args.port), makeMockHandler(args.latency / 1000.0, args.bandwidth * 1e6, args.capacity,
+                                                                                        parseSize(args.partsize), args.storebandwidth * 1e6))
+    server.daemon_threads = True
+    print(server.server_address[1])
+    sys.stdout.flush()
+    server.serve_forever()
+    return [], 0
+# end benchServe
+
+def startMock(latency, bandwidth, capacity = 0, partSize = "0", storeBandwidth = 0):
+    """ start the stand-in in a separate process (not competing for the GIL with the uploads); returns (process, port) """
+    process = subprocess.Popen([sys.executable, os.path.abspath(__file__), "serve", "--port", "0",
+                                "--latency", str(latency), "--bandwidth", str(bandwidth), "--capacity", str(capacity),
+                                "--part-size", str(partSize), "--store-bandwidth", str(storeBandwidth)], stdout = subprocess.PIPE)
+    port = int(process.stdout.readline())
+    return process, port
+# end startMock
+
+def makeFiles(directory, size, count):
+    """ count files of size bytes, incompressible, in directory; returns their paths """
+    block = os.urandom(min(size, 1 << 20) or 1)
+    paths = []
+    for ii in range(0, count):
+        path = os.path.join(directory, "file%d_%d.bin" % (size, ii))
+        if not os.path.isfile(path) or (os.path.getsize(path) != size):
+            with open(path, "wb") as fileT:
+                left = size
+                while left > 0:
+                    fileT.write(block[0:min(left, len(block))])
+                    left -= min(left, len(block))
+                #
+            #
+        #
+        paths.append(path)
+    #
+    return paths
+# end makeFiles
+
+def runCase(mode, files, workers, port, adaptive = 0):
+    """ create a dataset and add the files with the transport mode; returns (seconds, failed files);
+        adaptive: the maximum of the adaptive number of uploads in flight, from workers (0: workers uploads) """
+
+    from DataverseEngine import DataverseEngine
+    if mode == "asyncio":
+        import asyncio
+        from DataverseAsync import AsyncDataverseEngine
+        engine = AsyncDataverseEngine(concurrency = workers)
+    else:
+        engine = DataverseEngine()
+    #
+    engine.DATAVERSE_KEY = "benchmark"
+    engine.DATAVERSE_SERVER = "http://127.0.0.1:%d/api/dataverses/benchmark/datasets" % port
+    engine.DATASET_SERVER = "http://127.0.0.1:%d/api/datasets" % port
+    engine.useCurl = (mode == "curl")
+    engine.bundleFiles = (mode == "zip")
+    engine.directUploadSize = 0 if (mode == "direct") else None
+    engine.uploadWorkers = workers
+    if adaptive and (mode != "asyncio"):
+        from DataverseRetry import DataverseConcurrency
+        engine.adaptive = DataverseConcurrency(initial = workers, maximum = adaptive)
+    #
+    dataset = {"title": "Benchmark", "author": ["Benchmark"], "affiliation": ["Benchmark"], "DataDirectory": "benchmark",
+               "DataFilename": files, "DataDescription": [""] * len(files)}
+
+    tic = time.perf_counter()
+    if mode == "asyncio":
+        # closed in the event loop
+        result = asyncio.run(engine.runDatasets([dataset]))[0]
+    else:
+        result = engine.runDataset(dataset)
+    #
+    seconds = time.perf_counter() - tic
+    return seconds, len([fileT for fileT in result["Data"] if fileT["status"] != "OK"])
+# end runCase
+
+def benchUpload(args):
+    """ the upload benchmark: median time of each case """
+
+    import tempfile
+    from DataverseTransport import closeSessions
+
+    sizes = parseList(args.sizes, parseSize)
+    counts = parseList(args.counts, int)
+    workersList = parseList(args.workers, int)
+    modes = parseList(args.modes)
+
+    process, port = startMock(args.latency, args.bandwidth, args.capacity, args.partsize, args.storebandwidth)
+    results = []
+    try:
+        with tempfile.TemporaryDirectory(prefix = "dataverse-benchmark-", dir = args.directory) as directory:
+            for size in sizes:
+                for count in counts:
+                    files = makeFiles(directory, size, count)
+                    for workers in workersList:
+                        for mode in modes:
+                            times = []
+                            failed = 0
+                            for ii in range(0, max(1, args.repeat)):
+                                seconds, failedT = runCase(mode, files, workers, port, args.adaptive)
+                                times.append(seconds)
+                                failed += failedT
+                                # each run starts with cold connections
+                                closeSessions()
+                            #
+                            median = statistics.median(times)
+                            result = {"mode": mode, "size": size, "count": count, "workers": workers,
+                                      "median_s": median, "min_s": min(times), "max_s": max(times), "repeat": len(times),
+                                      "MBps": (size * count / 1e6) / median if median > 0 else 0.0,
+                                      "files_per_s": count / median if median > 0 else 0.0, "failed": failed}
+                            results.append(result)
+                            print("%-8s  size %10d  count %5d  workers %3d  median %8.3f s  %8.2f MB/s  %8.1f files/s%s" % (mode, size, count, workers,
+                                median, result["MBps"], result["files_per_s"], ("  %d failed" % failed) if failed else ""))
+                        #
+                    #
+                #
+            #
+        #
+    finally:
+        process.kill()
+        process.wait()
+    # end try
+    return results, (1 if any(result["failed"] for result in results) else 0)
+# end benchUpload
+
+def benchCompare(args):
+    """ the ratio of the median times of the cases found in both reports (below 1: faster) """
+
+    reports = []
+    for filename in (args.before, args.after):
+        with open(filename, "r", encoding = "utf-8") as fileT:
+            reports.append(json.load(fileT))
+        #
+    #
+    if reports[0].get("bench") != reports[1].get("bench"):
+        print("! the reports are of different benchmarks: %s and %s" % (reports[0].get("bench"), reports[1].get("bench")))
+        return [], 2
+    #
+    # startup reports are keyed by module, upload reports by case
+    keyFields = ("module",) if reports[0].get("bench") == "startup" else ("mode", "size", "count", "workers")
+    timeField = "median_ms" if reports[0].get("bench") == "startup" else "median_s"
+    before = dict((tuple(result.get(field) for field in keyFields), result) for result in reports[0].get("results", []))
+    results = []
+    for result in reports[1].get("results", []):
+        key = tuple(result.get(field) for field in keyFields)
+        if (key not in before) or (timeField not in result) or (timeField not in before[key]):
+            continue
+        #
+        ratio = result[timeField] / before[key][timeField] if before[key][timeField] else float("nan")
+        results.append(dict(zip(keyFields, key), before = before[key][timeField], after = result[timeField], ratio = ratio))
+        print("%-40s  %10.3f -> %10.3f  x%.2f" % (" ".join(str(value) for value in key), before[key][timeField], result[timeField], ratio))
+    #
+    return results, 0
+# end benchCompare
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Dataverse Utility benchmarks")
+    subparsers = parser.add_subparsers(dest = "bench")
+    subparsers.required = True
+
+    startup = subparsers.add_parser("startup", help = "time the import of the modules in a fresh interpreter")
+    startup.add_argument("--repeat", type = int, default = 10, help = "number of runs per module (the median is reported)")
+    startup.add_argument("--output", default = None, help = "write the results to this JSON file")
+    startup.set_defaults(run = benchStartup)
+
+    upload = subparsers.add_parser("upload", help = "time the dataset creation and file uploads against a local stand-in of Dataverse")
+    upload.add_argument("--sizes", default = "1k,1M,100M", help = "the file sizes, comma separated, with k, M or G suffixes (default: 1k,1M,100M)")
+    upload.add_argument("--counts", default = "1,10,100", help = "the numbers of files per dataset (default: 1,10,100)")
+    upload.add_argument("--workers", default = "1,4,16", help = "the numbers of concurrent uploads (default: 1,4,16)")
+    upload.add_argument("--modes", default = "python,curl", help = "the transports: python, curl, asyncio, zip, direct (default: python,curl)")
+    upload.add_argument("--latency", type = float, default = 0.0, help = "the server time of each request, in milliseconds (default: 0)")
+    upload.add_argument("--bandwidth", type = float, default = 0.0, help = "the bandwidth of the server, in MB/s (default: 0, unlimited)")
+    upload.add_argument("--capacity", type = int, default = 0, help = "the file additions served at a time, the others answered 503 (default: 0, unlimited)")
+    upload.add_argument("--adaptive", type = int, default = 0, help = "adapt the uploads in flight from the workers up to this maximum (default: 0, fixed)")
+    upload.add_argument("--part-size", dest = "partsize", default = "8M", help = "the part size of the direct uploads (default: 8M)")
+    upload.add_argument("--store-bandwidth", dest = "storebandwidth", type = float, default = 0.0, help = "the bandwidth of the object store, in MB/s (default: 0, unlimited)")
+    upload.add_argument("--repeat", type = int, default = 3, help = "number of runs per case (the median is reported)")
+    upload.add_argument("--directory", default = None, help = "where the files are generated (default: the temporary directory)")
+    upload.add_argument("--output", default = None, help = "write the results to this JSON file")
+    upload.set_defaults(run = benchUpload)
+
+    compare = subparsers.add_parser("compare", help = "compare two reports of the same benchmark")
+    compare.add_argument("before", help = "the reference report")
+    compare.add_argument("after", help = "the report to compare")
+    compare.add_argument("--output", default = None, help = "write the ratios to this JSON file")
+    compare.set_defaults(run = benchCompare)
+
+    serve = subparsers.add_parser("serve", help = "run the stand-in of Dataverse used by upload")
+    serve.add_argument("--port", type = int, default = 8765, help = "the port (0: any free port, printed)")
+    serve.add_argument("--latency", type = float, default = 0.0, help = "the server time of each request, in milliseconds")
+    serve.add_argument("--bandwidth", type = float, default = 0.0, help = "the bandwidth of the server, in MB/s (0: unlimited)")
+    serve.add_argument("--capacity", type = int, default = 0, help = "the file additions served at a time, the others answered 503 (0: unlimited)")
+    serve.add_argument("--part-size", dest = "partsize", default = "0", help = "the part size of the direct uploads to the object store (0: direct upload not enabled)")
+    serve.add_argument("--store-bandwidth", dest = "storebandwidth", type = float, default = 0.0, help = "the bandwidth of the object store, in MB/s (0: unlimited)")
+    serve.set_defaults(run = benchServe)
+
+    args = parser.parse_args(argv)
+    results, status = args.run(args)
+    if args.output:
+        with open(args.output, "w", encoding = "utf-8") as fileT:
+            settings = dict((name, value) for (name, value) in vars(args).items() if name not in ("run", "output", "bench"))
+            json.dump({"bench": args.bench, "python": sys.version.split()[0], "platform": sys.platform, "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                       "settings": settings, "results": results}, fileT, indent = 4)
+        #
+    #
+    return status
+# end main
+
+if __name__ == "__main__":
+    sys.exit(main())
+#
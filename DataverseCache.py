@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# Read-through cache of the Dataverse read endpoints (dataset info, versions, file listing):
+# a response younger than ttl seconds is served from the cache; an older one is revalidated
+# with If-None-Match/If-Modified-Since, the server answering 304 without body if unchanged.
+# The entries are kept in an in-memory LRU, backed by a SQLite store shared between runs.
+
+import sys, os, os.path, time
+import threading
+import sqlite3
+import collections
+
+class DataverseCache(object):
+    """ the read-through cache of the GET requests """
+
+    def __init__(self, filename = None, ttl = 60, maxsize = 1024):
+        """ filename: the on-disk store (None to keep the cache in memory only) """
+
+        self.filename   = filename
+        self.ttl        = ttl
+        self.maxsize    = maxsize
+        self.mutex      = threading.Lock()
+        self.memory     = collections.OrderedDict()
+        self.db         = None
+        self.hits       = 0
+        self.revalidated = 0
+        self.misses     = 0
+
+        if self.filename:
+            dirname = os.path.dirname(os.path.abspath(self.filename))
+            if not os.path.isdir(dirname):
+                os.makedirs(dirname)
+            #
+            self.db = sqlite3.connect(self.filename, check_same_thread = False)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("CREATE TABLE IF NOT EXISTS cache (url TEXT PRIMARY KEY, time REAL, etag TEXT, modified TEXT, content TEXT)")
+            self.db.commit()
+        #
+
+    # end __init__
+
+    def load(self, url):
+        """ the cached entry (time, etag, modified, content) of url, or None """
+        with self.mutex:
+            entry = self.memory.get(url)
+            if entry is not None:
+                self.memory.move_to_end(url)
+                return entry
+            #
+            if self.db is not None:
+                row = self.db.execute("SELECT time, etag, modified, content FROM cache WHERE url = ?", (url,)).fetchone()
+                if row is not None:
+                    entry = tuple(row)
+                    self.remember(url, entry)
+                    return entry
+                #
+            #
+        #
+        return None
+    # end load
+
+    def remember(self, url, entry):
+        self.memory[url] = entry
+        self.memory.move_to_end(url)
+        while len(self.memory) > self.maxsize:
+            self.memory.popitem(last = False)
+        #
+    # end remember
+
+    def store(self, url, entry):
+        with self.mutex:
+            self.remember(url, entry)
+            if self.db is not None:
+                self.db.execute("INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?)", (url,) + entry)
+                self.db.commit()
+            #
+        #
+    # end store
+
+    def count(self, counter):
+        """ one more hit, revalidated entry or miss; the workers share the counters """
+        with self.mutex:
+            setattr(self, counter, getattr(self, counter) + 1)
+        #
+    # end count
+
+    def get(self, url, fetch):
+        """ the response text of url; fetch(url, headers) sends the request and returns a DataverseResponse """
+
+        entry = self.load(url)
+        if (entry is not None) and ((time.time() - entry[0]) < self.ttl):
+            self.count("hits")
+            return entry[3]
+        #
+
+        headers = {}
+        if entry is not None:
+            if entry[1]:
+                headers["If-None-Match"] = entry[1]
+            #
+            if entry[2]:
+                headers["If-Modified-Since"] = entry[2]
+            #
+        #
+        response = fetch(url, headers)
+        responseHeaders = dict((name.lower(), value) for (name, value) in response.headers.items())
+
+        if (response.status == 304) and (entry is not None):
+            self.count("revalidated")
+            self.store(url, (time.time(), entry[1], entry[2], entry[3]))
+            return entry[3]
+        #
+        self.count("misses")
+        if response.status == 200:
+            self.store(url, (time.time(), responseHeaders.get("etag", ""), responseHeaders.get("last-modified", ""), response.text))
+        #
+        return response.text
+
+    # end get
+
+    def invalidate(self, pattern):
+        """ drop the entries whose URL contains pattern (a persistentId for instance) """
+        with self.mutex:
+            for url in [url for url in self.memory if pattern in url]:
+                del self.memory[url]
+            #
+            if self.db is not None:
+                self.db.execute("DELETE FROM cache WHERE instr(url, ?) > 0", (pattern,))
+                self.db.commit()
+            #
+        #
+    # end invalidate
+
+    def close(self):
+        with self.mutex:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
+            #
+        #
+    # end close
+
+# end DataverseCache
@@ -0,0 +1,1388 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# Headless engine: the JSON-create and file-add steps, without the GUI
+
+import sys, os, os.path, time, platform
+import json
+import urllib.parse
+import threading
+# subprocess (curl), tempfile and concurrent.futures are imported on first use, keeping the import fast
+from DataverseScan import scanDirectory
+from DataverseProgress import parseCurlMeter
+from DataverseRetry import DataverseRetryPolicy, retryAfter
+from DataverseLimit import GlobalLimiter
+from DataverseMetadata import DataverseMetadata
+from DataverseTransport import getSession, warmupSessions, DataverseResponse, DataverseMultipart, DataverseZipStream, DataverseFileRange, DataverseOrderedHash, ChecksumAlgorithms, fileChecksum, hashFile
+
+# the dataset fields, named as in DataverseCore
+DatasetFields = ("title", "description", "displayName", "subject", "keyword",
+                 "author", "affiliation", "identifier",
+                 "contactname", "contactaffiliation", "contactemail",
+                 "publicationCitation", "notesText",
+                 "JSONfilename", "persistentId", "DataDirectory",
+                 "ReportFilename", "ReportDescription", "DataFilename", "DataDescription",
+                 "ScanDirectory", "ScanInclude", "ScanExclude", "ScanMinSize", "ScanMaxSize", "ScanDescription",
+                 "AutoDescription")
+
+# the fields holding a list of values
+DatasetListFields = ("keyword", "author", "affiliation", "identifier", "DataFilename", "DataDescription", "ScanInclude", "ScanExclude")
+
+class DataverseEngine(object):
+    """ the Dataverse headless upload engine """
+
+    def __init__(self):
+        """ the Dataverse engine constructor """
+
+        self.os                     = platform.system()
+
+        # @shared
+        self.DATAVERSE_KEY          = "zbc9f319-194c-403c-f818-f24cf6e6aacd"
+        # @shared
+        self.DATAVERSE_SERVER       = "https://bac-dataverse.univ-lorraine.fr/api/dataverses/carel_lmops/datasets"
+        # @shared
+        self.DATASET_SERVER         = "https://bac-dataverse.univ-lorraine.fr/api/datasets"
+
+        # one curl process per request, or the pooled keep-alive sessions (see DataverseTransport)
+        self.useCurl                = False
+
+        # number of concurrent /add requests per dataset (1 to upload one file at a time)
+        self.uploadWorkers          = 4
+        # upload one file at a time, whatever uploadWorkers, for servers that lock the dataset on each /add
+        self.serializeUploads       = False
+        # runDatasets: number of datasets created at a time, and of datasets whose files are uploaded at a time
+        self.createWorkers          = 4
+        self.datasetWorkers         = 4
+        # size of the chunks read from disk and sent, whatever the file size (in bytes)
+        self.uploadChunkSize        = 1 << 20
+        # compare the checksum of each file, computed as it is read to be sent, with the one returned by the server; a file stored corrupted is removed and sent again
+        self.verifyChecksum         = True
+        # the checksum type computed while sending: the one of the server, learned from its answers
+        self.checksumType           = "MD5"
+        # derive the empty file and dataset descriptions from the measurement files (see describeDataset), unless the dataset AutoDescription says otherwise
+        self.autoDescription        = False
+        # number of processes parsing the measurement files (None: the CPU count)
+        self.describeWorkers        = None
+        # compress the files before sending them, ahead of the uploads (DataverseCompressor); None to send them as is
+        self.compressor             = None
+        # the files of this size or more (in bytes) are sent straight to the object store of the dataset through presigned URLs,
+        # then registered (see sendDirect; direct upload enabled on the store); None to send all the files through the server
+        self.directUploadSize       = None
+        # number of parts of a file sent at a time to the object store
+        self.directWorkers          = 4
+        # the bytes of the parts sent ahead kept for the checksum of the file, computed in order (the parts beyond it are read again)
+        self.directHashBudget       = 64 << 20
+        # send the files in zip archives built while they are sent, one /add request per archive (see uploadBundle)
+        self.bundleFiles            = False
+        # maximum number of files per archive (Dataverse limits the number of files unzipped from one upload)
+        self.bundleSize             = 500
+        # the upload journal (DataverseJournal), to resume an interrupted job; None to upload everything
+        self.journal                = None
+        # the deduplication index (DataverseIndex): files whose content is already in the dataset are skipped; None to upload everything
+        self.index                  = None
+        # how long to wait for a dataset lock to be released before retrying a locked upload (in seconds)
+        self.lockTimeout            = 300
+        # the read-through cache (DataverseCache) of the dataset info, versions and file listings; None to always ask the server
+        self.cache                  = None
+        # the upload progress (DataverseProgress): bytes sent per file and overall, throughput and ETA; None to not follow it
+        self.progress               = None
+        # the timing records of the requests (DataverseTimings): DNS, connect, TLS, upload, server, download; None to not record them
+        self.timings                = None
+        # the requests refused for a while (429, 503, locked, lost connection) are sent again after a jittered backoff
+        self.retry                  = DataverseRetryPolicy()
+        # the adaptive number of uploads in flight (DataverseConcurrency), up to its maximum; None for uploadWorkers uploads
+        self.adaptive               = None
+        # the bytes and requests per second of the job (DataverseLimiter), within those of GlobalLimiter; None for GlobalLimiter only
+        self.limiter                = None
+        # the curl commands running, each one taking its share of the byte limit
+        self.curlRunning            = 0
+        self.curlMutex              = threading.Lock()
+        # whether curl tells the end of the upload (time_posttransfer, curl 8.10); None until asked to curl
+        self.curlPosttransfer       = None
+
+        # the dataset JSON builder (see DataverseMetadata)
+        self.metadata               = DataverseMetadata(compact = True)
+
+        return
+
+    # end __init__
+
+    def warmup(self):
+        """ open the connections to the servers in the background """
+        if not self.useCurl:
+            warmupSessions([self.DATAVERSE_SERVER, self.DATASET_SERVER])
+        #
+    # end warmup
+
+    def encodeString(self, strT):
+        if sys.version_info[0] < 3:
+            return strT.encode('utf-8')
+        #
+        return strT
+        # end if
+    #
+
+    def decodeString(self, strT):
+        if isinstance(strT, bytes):
+            return strT.decode('utf-8', 'replace')
+        #
+        return strT
+        # end if
+    #
+
+    def makeJSON(self, dataset):
+        """ build the dataset JSON content from the dataset fields (see DatasetFields) """
+        return self.metadata.render(dataset)
+    # end makeJSON
+
+    def listFiles(self, dataset):
+        """ the (filename, description, directoryLabel) of the report and data files to upload """
+
+        DataDirectory = dataset.get("DataDirectory", "")
+        DataDescription = dataset.get("DataDescription", [])
+
+        files = []
+        ReportFilename = dataset.get("ReportFilename", "")
+        if ReportFilename and os.path.isfile(ReportFilename):
+            files.append((ReportFilename, dataset.get("ReportDescription", ""), DataDirectory))
+        #
+        DataFilename = dataset.get("DataFilename", [])
+        for ii in range(0, len(DataFilename)):
+            if DataFilename[ii] and os.path.isfile(DataFilename[ii]):
+                files.append((DataFilename[ii], DataDescription[ii] if ii < len(DataDescription) else "", DataDirectory))
+            #
+        #
+        return files
+
+    # end listFiles
+
+    def isDescribed(self, dataset):
+        """ whether the empty descriptions of the dataset are derived from its measurement files """
+        value = dataset.get("AutoDescription", None)
+        if value is None:
+            return self.autoDescription
+        #
+        if isinstance(value, str):
+            return value.strip().lower() in ("1", "true", "yes", "on")
+        #
+        return bool(value)
+    # end isDescribed
+
+    def describeDataset(self, dataset):
+        """ a copy of the dataset whose empty DataDescription, and description, are derived from the header and
+            columns of the data files (see DataverseMeasure); the other files keep their description """
+
+        from DataverseMeasure import parseMeasurements, describeMeasurement, describeMeasurements
+
+        DataFilename = dataset.get("DataFilename", [])
+        DataDescription = list(dataset.get("DataDescription", []))
+        DataDescription += [""] * (len(DataFilename) - len(DataDescription))
+        # all the files for the dataset description, only the undescribed ones otherwise
+        pending = [ii for ii in range(0, len(DataFilename)) if DataFilename[ii] and os.path.isfile(DataFilename[ii])
+                   and ((not DataDescription[ii]) or (not dataset.get("description", "")))]
+        measures = parseMeasurements([DataFilename[ii] for ii in pending], self.describeWorkers)
+
+        dataset = dict(dataset)
+        for (ii, measure) in zip(pending, measures):
+            if (measure is not None) and (not DataDescription[ii]):
+                DataDescription[ii] = describeMeasurement(measure)
+            #
+        #
+        dataset["DataDescription"] = DataDescription
+        if not dataset.get("description", ""):
+            dataset["description"] = describeMeasurements(measures)
+        #
+        return dataset
+
+    # end describeDataset
+
+    def scanFiles(self, dataset):
+        """ the (filename, description, directoryLabel) of the files under ScanDirectory, yielded while the tree is walked;
+            the directoryLabel is DataDirectory followed by the file directory relative to ScanDirectory """
+
+        ScanDirectory = dataset.get("ScanDirectory", "")
+        if not ScanDirectory:
+            return
+        #
+        DataDirectory = dataset.get("DataDirectory", "").strip("/")
+        description = dataset.get("ScanDescription", "")
+        for (filename, relative) in scanDirectory(ScanDirectory,
+                                                  include = dataset.get("ScanInclude", []),
+                                                  exclude = dataset.get("ScanExclude", []),
+                                                  minsize = dataset.get("ScanMinSize", 0),
+                                                  maxsize = dataset.get("ScanMaxSize", None)):
+            relativeDir = relative.rpartition("/")[0]
+            yield (filename, description, "/".join([part for part in (DataDirectory, relativeDir) if part]))
+        #
+
+    # end scanFiles
+
+    def streamFiles(self, dataset):
+        """ the files under ScanDirectory (see scanFiles), the empty descriptions derived from the measurement files if isDescribed """
+        if not self.isDescribed(dataset):
+            return self.scanFiles(dataset)
+        #
+        from DataverseMeasure import describeStream
+        return describeStream(self.scanFiles(dataset), self.describeWorkers)
+    # end streamFiles
+
+    def uploadJSON(self, JSONcontent, JSONfilename = None):
+        """ create the dataset on the Dataverse server and return the server response """
+
+        JSONtemp = None
+        if (not JSONfilename) and self.useCurl:
+            import tempfile
+            JSONdesc, JSONtemp = tempfile.mkstemp(suffix = ".json")
+            os.close(JSONdesc)
+            JSONfilename = JSONtemp
+        #
+
+        try:
+            if JSONfilename:
+                JSONfile = open(JSONfilename, "w", encoding = "utf-8")
+                JSONfile.write(JSONcontent)
+                JSONfile.close()
+            #
+            JSONbody = JSONcontent.encode('utf-8')
+            for attempt in range(1, self.retry.attempts + 1):
+                response, error = None, None
+                try:
+                    if self.useCurl:
+                        args = self.curlCommand("POST", self.DATAVERSE_SERVER, "--upload-file", JSONfilename)
+                        response = self.runCurl(args, operation = "create", url = self.DATAVERSE_SERVER, size = len(JSONbody))
+                    else:
+                        JSONhead = {'X-Dataverse-key': self.DATAVERSE_KEY, 'Content-Type': 'application/json'}
+                        response = getSession(self.DATAVERSE_SERVER).request("POST", self.DATAVERSE_SERVER, body = JSONbody, headers = JSONhead, limiter = self.limiter)
+                        self.recordTiming("create", self.DATAVERSE_SERVER, "", len(JSONbody), response.status, response.timing)
+                    #
+                except Exception as excT:
+                    error = excT
+                # end try
+                if (attempt >= self.retry.attempts) or (not self.retry.isRetryable(response.status if (response is not None) else 0, error)):
+                    break
+                #
+                time.sleep(self.retry.delay(attempt, retryAfter(response.headers) if (response is not None) else None))
+            #
+            if error is not None:
+                raise error
+            #
+            Stdout = response.content
+        finally:
+            if JSONtemp is not None:
+                os.remove(JSONtemp)
+            #
+        # end try
+
+        return self.decodeString(Stdout)
+
+    # end uploadJSON
+
+    def uploadFile(self, persistentId, filename, description, directoryLabel):
+        """ add one file to the dataset persistentId and return the server response """
+        return self.decodeString(self.sendFile(persistentId, filename, description, directoryLabel).content)
+    # end uploadFile
+
+    def sendFile(self, persistentId, filename, description, directoryLabel, source = None):
+        """ add one file to the dataset persistentId and return the DataverseResponse (status, headers, content, timing);
+            source: the file sent instead of filename (its compressed copy), the progress being the one of filename """
+
+        source = source or filename
+        if (self.directUploadSize is not None) and (not self.useCurl) and (os.path.getsize(source) >= self.directUploadSize):
+            response = self.sendDirect(persistentId, filename, description, directoryLabel, source)
+            if response is not None:
+                return response
+            #
+        #
+        algorithm = self.checksumType if self.verifyChecksum else None
+        if self.useCurl:
+            # curl reads the file itself: hashed alongside while curl runs, the two reads sharing the page cache
+            digests = []
+            hasher = threading.Thread(target = lambda: digests.append(hashFile(source, algorithm, self.uploadChunkSize))) if algorithm else None
+            if hasher is not None:
+                hasher.start()
+            #
+            url = "%s/:persistentId/add?persistentId=%s" % (self.DATASET_SERVER, urllib.parse.quote(persistentId, safe = ":/"))
+            # the jsonData taken literally (--form-string), before the file; the path quoted for the parser of -F
+            args = self.curlCommand("POST", url, "--form-string", "jsonData=" + self.metadata.fileData(description, directoryLabel),
+                                    "-F", "file=@\"%s\"" % source.replace("\\", "\\\\").replace("\"", "\\\""))
+            response = self.runCurl(args, filename, operation = "add", url = url, size = os.path.getsize(source))
+            if hasher is not None:
+                hasher.join()
+                response.digest = (source, algorithm, digests[0]) if digests else None
+            #
+        else:
+            body = DataverseMultipart(
+                [("jsonData", self.metadata.fileData(description, directoryLabel))],
+                [("file", os.path.basename(source), source)],
+                chunksize = self.uploadChunkSize,
+                progress = (lambda path, nbytes: self.progress.advance(filename, nbytes)) if (self.progress is not None) else None,
+                checksum = algorithm)
+            JSONhead = {'X-Dataverse-key': self.DATAVERSE_KEY, 'Content-Type': body.contentType, 'Content-Length': str(len(body))}
+            url = "%s/:persistentId/add?persistentId=%s" % (self.DATASET_SERVER, urllib.parse.quote(persistentId, safe = ":/"))
+            response = getSession(self.DATASET_SERVER).request("POST", url, body = body, headers = JSONhead, limiter = self.limiter)
+            self.recordTiming("add", url, filename, len(body), response.status, response.timing)
+            if source in body.digests:
+                response.digest = (source, algorithm, body.digests[source])
+            #
+        #
+
+        return response
+
+    # end sendFile
+
+    def sendDirect(self, persistentId, filename, description, directoryLabel, source):
+        """ send the file straight to the object store of the dataset (one PUT to a presigned URL, or its parts
+            in parallel for a multipart upload), then register it with /add, and return the DataverseResponse of /add;
+            None if the server gives no upload URL (direct upload not enabled): the file is then sent through the server;
+            the checksum, computed while the file is sent, is declared to the server (which does not read the file) """
+
+        import mimetypes
+
+        size = os.path.getsize(source)
+        quoted = urllib.parse.quote(persistentId, safe = ":/")
+        url = "%s/:persistentId/uploadurls?persistentId=%s&size=%d" % (self.DATASET_SERVER, quoted, size)
+        response = self.apiRequest(url)
+        if self.retry.isRetryable(response.status, None):
+            raise ConnectionError("cannot get the upload URLs: HTTP %d" % response.status)
+        #
+        parsed = self.parseResponse(response.text)
+        if (parsed is None) or (parsed.get("status") != "OK") or (not isinstance(parsed.get("data"), dict)):
+            return None
+        #
+        data = parsed["data"]
+        algorithm = self.checksumType
+        progress = (lambda path, nbytes: self.progress.advance(filename, nbytes)) if (self.progress is not None) else None
+        if data.get("url"):
+            body = DataverseFileRange(source, 0, size, self.uploadChunkSize, progress, checksum = algorithm)
+            # the object tagged temporary until registered, as signed by Dataverse
+            self.putObject(data["url"], body, {"x-amz-tagging": "dv-state=temp"})
+            checksum = body.digest
+        else:
+            checksum = self.putParts(data, source, size, progress, algorithm)
+        #
+
+        stored = {"storageIdentifier": data["storageIdentifier"], "fileName": os.path.basename(source),
+                  "mimeType": mimetypes.guess_type(source)[0] or "application/octet-stream",
+                  "checksum": {"@type": algorithm, "@value": checksum}}
+        body = DataverseMultipart([("jsonData", self.metadata.fileData(description, directoryLabel, stored = stored))], [])
+        JSONhead = {'X-Dataverse-key': self.DATAVERSE_KEY, 'Content-Type': body.contentType, 'Content-Length': str(len(body))}
+        url = "%s/:persistentId/add?persistentId=%s" % (self.DATASET_SERVER, quoted)
+        response = getSession(url).request("POST", url, body = body, headers = JSONhead, limiter = self.limiter)
+        self.recordTiming("register", url, filename, len(body), response.status, response.timing)
+        return response
+
+    # end sendDirect
+
+    def putObject(self, url, body, headers = None):
+        """ PUT the body (DataverseFileRange) to a presigned URL of the store, again if refused for a while; returns the ETag """
+
+        headersT = {'Content-Length': str(len(body))}
+        if headers:
+            headersT.update(headers)
+        #
+        for attempt in range(1, self.retry.attempts + 1):
+            response, error = None, None
+            try:
+                response = getSession(url).request("PUT", url, body = body, headers = headersT, limiter = self.limiter)
+                # without the signature of the URL
+                self.recordTiming("put", url.split("?", 1)[0], body.path, len(body), response.status, response.timing)
+                if (response.status >= 200) and (response.status < 300):
+                    return dict((name.lower(), value) for (name, value) in response.headers.items()).get("etag", "")
+                #
+            except Exception as excT:
+                error = excT
+            # end try
+            if (attempt >= self.retry.attempts) or (not self.retry.isRetryable(response.status if (response is not None) else 0, error)):
+                break
+            #
+            time.sleep(self.retry.delay(attempt, retryAfter(response.headers) if (response is not None) else None))
+        #
+        if error is not None:
+            raise error
+        #
+        raise ValueError("the store refused %s: HTTP %d %s" % (os.path.basename(body.path), response.status, response.text.strip()[0:200]))
+
+    # end putObject
+
+    def putParts(self, data, source, size, progress, algorithm):
+        """ send the parts of a multipart upload (data of the uploadurls answer: urls, partSize, complete, abort),
+            directWorkers at a time, then complete it; returns the checksum of the file """
+
+        import concurrent.futures
+
+        server = self.DATASET_SERVER.split("/api/", 1)[0]
+        partSize = int(data["partSize"])
+        parts = sorted([(int(number), url) for (number, url) in data["urls"].items()])
+
+        # the checksum of the whole file, in order, from the chunks read by the parts sent in parallel
+        hasher = DataverseOrderedHash(source, size, algorithm, self.directHashBudget, self.uploadChunkSize)
+
+        # set once a part fails: the parts not yet sent are not sent, the upload being aborted
+        failed = threading.Event()
+
+        def put(part):
+            if failed.is_set():
+                return None
+            #
+            offset = (part[0] - 1) * partSize
+            try:
+                return self.putObject(part[1], DataverseFileRange(source, offset, min(partSize, size - offset), self.uploadChunkSize, progress, feed = hasher.feed))
+            except BaseException:
+                failed.set()
+                raise
+            # end try
+        # end put
+
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers = max(1, int(self.directWorkers))) as executor:
+                etags = list(executor.map(put, parts))
+            #
+            checksum = hasher.digest()
+            url = server + data["complete"]
+            JSONbody = json.dumps(dict([(str(number), etag) for ((number, partUrl), etag) in zip(parts, etags)])).encode('utf-8')
+            JSONhead = {'X-Dataverse-key': self.DATAVERSE_KEY, 'Content-Type': 'application/json', 'Content-Length': str(len(JSONbody))}
+            response = getSession(url).request("PUT", url, body = JSONbody, headers = JSONhead, limiter = self.limiter)
+            if response.status >= 300:
+                raise ValueError("cannot complete the upload of %s: HTTP %d %s" % (os.path.basename(source), response.status, response.text.strip()[0:200]))
+            #
+        except BaseException:
+            # the parts already sent are dropped by the store
+            try:
+                self.apiRequest(server + data["abort"], method = "DELETE")
+            except Exception:
+                pass
+            # end try
+            raise
+        # end try
+        return checksum
+
+    # end putParts
+
+    def curlCommand(self, method, url, *options):
+        """ the arguments of a curl request to the Dataverse API, options being curl arguments, one per element:
+            run without shell, a path or a description with spaces or quotes being passed as is """
+        return ["curl", "-H", "X-Dataverse-key:%s" % self.DATAVERSE_KEY, "-X", method] + list(options) + [url]
+    # end curlCommand
+
+    def runCurl(self, args, filename = None, operation = None, url = "", size = None):
+        """ run the curl command (list of arguments, see curlCommand) and return its output as a DataverseResponse, with the HTTP status and timing
+            written out by curl; with progress, the bytes of filename sent are read from the curl progress meter
+            while it runs; with timings, the request phases are recorded as the operation """
+
+        # curl cannot be throttled chunk by chunk: each command gets its share of the byte limit when it starts
+        limiter = self.getLimiter()
+        limiter.waitRequest()
+        with self.curlMutex:
+            self.curlRunning += 1
+            running = self.curlRunning
+        #
+        rate = limiter.byteRate()
+        if rate > 0:
+            args = args + ["--limit-rate", "%d" % max(int(rate / running), 1024)]
+        #
+        try:
+            return self.execCurl(args, filename, operation, url, size)
+        finally:
+            with self.curlMutex:
+                self.curlRunning -= 1
+            #
+        # end try
+
+    # end runCurl
+
+    def execCurl(self, args, filename, operation, url, size):
+
+        import subprocess
+        args = args + ["-w", self.curlTimingFormat()]
+        if (self.progress is None) or (filename is None):
+            Stdout = subprocess.check_output(args, stderr=subprocess.STDOUT)
+            return self.curlResponse(Stdout, operation, url, filename, size)
+        #
+
+        process = subprocess.Popen(args, stdout = subprocess.PIPE, stderr = subprocess.PIPE)
+        # the response read aside, for curl never to block on a full pipe
+        output = []
+        reader = threading.Thread(target = lambda: output.append(process.stdout.read()))
+        reader.start()
+        # the meter is rewritten every second on the same line ('\r'); the other lines are kept
+        errors = []
+        line = b""
+        while True:
+            data = os.read(process.stderr.fileno(), 4096)
+            if not data:
+                break
+            #
+            line += data
+            parts = line.replace(b"\n", b"\r").split(b"\r")
+            line = parts.pop()
+            for part in parts:
+                sent = parseCurlMeter(part.decode('latin-1'))
+                if sent is not None:
+                    self.progress.sent(filename, sent)
+                elif part.strip():
+                    errors.append(part + b"\n")
+                #
+            #
+        #
+        reader.join()
+        process.stderr.close()
+        process.stdout.close()
+        returncode = process.wait()
+        Stdout = b"".join(errors) + line + b"".join(output)
+        if returncode:
+            raise subprocess.CalledProcessError(returncode, args, Stdout)
+        #
+        return self.curlResponse(Stdout, operation, url, filename, size)
+
+    # end execCurl
+
+    def getLimiter(self):
+        """ the limiter of the requests sent: the job limiter if any, the process one otherwise """
+        return self.limiter if (self.limiter is not None) else GlobalLimiter
+    # end getLimiter
+
+    def curlTimingFormat(self):
+        """ the curl --write-out format of the status and timing line, appended to the response (see curlResponse);
+            the end of the upload (time_posttransfer) is known from curl 8.10 """
+        if self.curlPosttransfer is None:
+            import subprocess
+            try:
+                version = subprocess.check_output(["curl", "--version"]).split()[1].decode('latin-1')
+                self.curlPosttransfer = tuple(int(part) for part in version.split(".")[0:2]) >= (8, 10)
+            except Exception:
+                self.curlPosttransfer = False
+            # end try
+        #
+        return "\n@timing@ %{time_namelookup} %{time_connect} %{time_appconnect} %{time_pretransfer} %{time_starttransfer} %{time_total} %{http_code} %{num_connects}" + \
+            (" %{time_posttransfer}" if self.curlPosttransfer else "")
+    # end curlTimingFormat
+
+    def curlResponse(self, Stdout, operation, url, filename, size):
+        """ the DataverseResponse of the curl output: the HTTP status and timing taken from the line written
+            out by curl (see curlTimingFormat), the content being the output without it; the timing is recorded
+            as the operation if timings are recorded """
+        content, sep, line = Stdout.rpartition(b"\n@timing@ ")
+        if not sep:
+            return DataverseResponse(0, "", {}, Stdout)
+        #
+        response = DataverseResponse(0, "", {}, content)
+        try:
+            values = line.split()
+            # the curl times are counted from the start of the request
+            dns, connect, appconnect, pretransfer, starttransfer, total = [float(value) for value in values[0:6]]
+            timing = {"reused": int(values[7]) == 0, "dns": dns, "connect": connect - dns,
+                      "tls": (appconnect - connect) if (appconnect > 0) else None, "total": total}
+            if len(values) > 8:
+                posttransfer = float(values[8])
+                timing.update({"upload": posttransfer - pretransfer, "server": starttransfer - posttransfer})
+            else:
+                # the upload not told apart: the server time includes it
+                timing.update({"upload": None, "server": starttransfer - pretransfer})
+            #
+            timing["download"] = total - starttransfer
+            if timing["reused"]:
+                timing.update({"dns": None, "connect": None, "tls": None})
+            #
+            response.status, response.timing = int(values[6]), timing
+            if (self.timings is not None) and operation:
+                if size is None:
+                    size = os.path.getsize(filename) if filename else 0
+                #
+                self.recordTiming(operation, url, filename or "", size, response.status, timing)
+            #
+        except (ValueError, IndexError, OSError):
+            pass
+        # end try
+        return response
+    # end curlResponse
+
+    def recordTiming(self, operation, url, filename, size, status, timing):
+        """ record the phases of a request, if timings are recorded """
+        if self.timings is not None:
+            self.timings.record(operation, url, filename, size, status, timing)
+        #
+    # end recordTiming
+
+    def uploadResult(self, persistentId, filename, description, directoryLabel):
+        """ upload one file and return its result: filename, status (OK, ERROR or LOCKED), server response and message """
+
+        result = self.checkJournal(persistentId, filename)
+        if result is not None:
+            if self.compressor is not None:
+                self.compressor.forget(filename)
+            #
+            return result
+        #
+        result = {"filename": filename, "status": "ERROR", "Stdout": "", "message": ""}
+        source = None
+        if self.compressor is not None:
+            try:
+                source = self.compressor.take(filename)
+            except Exception:
+                # not compressed: sent as is
+                source = None
+            # end try
+        #
+        for attempt in range(1, self.retry.attempts + 1):
+            if self.progress is not None:
+                self.progress.begin(filename)
+            #
+            result.update({"status": "ERROR", "Stdout": "", "message": ""})
+            result.pop("mismatch", None)
+            response, error = None, None
+            if self.adaptive is not None:
+                self.adaptive.acquire()
+            #
+            try:
+                response = self.sendFile(persistentId, filename, description, directoryLabel, source)
+                result["Stdout"] = self.decodeString(response.content)
+                self.checkResult(persistentId, result, response.status, response.digest)
+            except Exception as excT:
+                error = excT
+                result["message"] = str(excT)
+            # end try
+            # refused for a while: locked dataset, busy or unavailable server, lost connection
+            pushback = (result["status"] == "LOCKED") or ((result["status"] != "OK") and self.retry.isRetryable(response.status if (response is not None) else 0, error))
+            if self.adaptive is not None:
+                self.adaptive.release(pushback, response.timing.get("server") if (response is not None) else None)
+            #
+            if (not (pushback or ("mismatch" in result))) or (attempt >= self.retry.attempts):
+                break
+            #
+            if "mismatch" in result:
+                # stored corrupted: removed and sent again at once
+                if not self.deleteFile(persistentId, result["mismatch"]):
+                    break
+                #
+            elif result["status"] == "LOCKED":
+                self.waitUnlocked(persistentId)
+            else:
+                time.sleep(self.retry.delay(attempt, retryAfter(response.headers) if (response is not None) else None))
+            #
+        #
+        if "mismatch" in result:
+            result["message"] += " (file id %s left in the dataset)" % result["mismatch"]
+        #
+        if self.compressor is not None:
+            self.compressor.release(source)
+        #
+        if self.progress is not None:
+            self.progress.end(filename, result["status"])
+        #
+        return result
+
+    # end uploadResult
+
+    def checkJournal(self, persistentId, filename):
+        """ the result of a file already accepted by the server according to the journal, or None """
+        if self.journal is None:
+            return None
+        #
+        entry = self.journal.getFile(persistentId, filename)
+        if entry is None:
+            return None
+        #
+        if self.progress is not None:
+            self.progress.end(filename)
+        #
+        return {"filename": filename, "status": "OK", "Stdout": "", "message": "already uploaded (file id %s)" % entry.get("fileId")}
+    # end checkJournal
+
+    def checkResult(self, persistentId, result, httpStatus = 0, digest = None):
+        """ set the status and message of the result from the server response, and journal the accepted file;
+            digest: the (path, checksum type, checksum) of the file sent, a file stored with another checksum
+            being an error, with the id of the stored file as mismatch """
+        response = self.parseResponse(result["Stdout"])
+        files = []
+        if (response is not None) and (response.get("status") == "OK") and isinstance(response.get("data"), dict):
+            files = response["data"].get("files") or []
+        #
+        mismatch = self.checkDigest(files[0], digest) if files else None
+        if response is None:
+            # an error page of the server or of a proxy
+            result["message"] = ("HTTP %d" % httpStatus) if (httpStatus >= 400) else "invalid server response"
+        elif mismatch is not None:
+            result["message"] = mismatch
+            result["mismatch"] = (files[0].get("dataFile") or {}).get("id")
+        elif response.get("status") == "OK":
+            result["status"] = "OK"
+            self.recordAccepted(persistentId, result["filename"], response)
+        else:
+            result["message"] = str(response.get("message", ""))
+            if "lock" in result["message"].lower():
+                result["status"] = "LOCKED"
+            #
+        #
+        return result
+    # end checkResult
+
+    def checkDigest(self, fileT, digest):
+        """ None if the file entry of the server response has the checksum computed while the file was sent
+            (digest: path, checksum type, checksum) or none, the mismatch message otherwise """
+        algorithm, value = fileChecksum(fileT)
+        if (digest is None) or (not value) or (algorithm not in ChecksumAlgorithms):
+            return None
+        #
+        (path, algorithmT, checksum) = digest
+        if algorithm != algorithmT:
+            # the server computes another checksum: this file hashed again, the next ones as they are sent
+            self.checksumType = algorithm
+            checksum = hashFile(path, algorithm, self.uploadChunkSize)
+        #
+        if checksum.lower() == value.lower():
+            return None
+        #
+        return "checksum mismatch: %s %s sent, %s stored" % (algorithm, checksum, value)
+    # end checkDigest
+
+    def deleteFile(self, persistentId, fileId):
+        """ remove the file from the draft version of the dataset (a file stored corrupted); False if it cannot be """
+        if fileId is None:
+            return False
+        #
+        url = "%s/files/%s" % (self.DATASET_SERVER.rsplit("/", 1)[0], fileId)
+        try:
+            response = self.parseResponse(self.apiRequest(url, method = "DELETE").text)
+        except Exception:
+            return False
+        # end try
+        if self.cache is not None:
+            self.cache.invalidate(urllib.parse.quote(persistentId, safe = ":/"))
+        #
+        return (response is not None) and (response.get("status") == "OK")
+    # end deleteFile
+
+    def recordAccepted(self, persistentId, filename, response):
+        """ record the file accepted by the server (response of the /add request) in the journal and index """
+        if self.journal is not None:
+            self.journal.recordFile(persistentId, filename, response)
+        #
+        if self.index is not None:
+            self.index.recordRemote(persistentId, response)
+        #
+        # the dataset changed: its cached info and listings are stale
+        if self.cache is not None:
+            self.cache.invalidate(urllib.parse.quote(persistentId, safe = ":/"))
+        #
+    # end recordAccepted
+
+    def reconcileIndex(self, persistentId):
+        """ reconcile the index with the dataset files; False if the dataset content is unknown """
+        try:
+            self.index.reconcile(persistentId, self.listDatasetFiles(persistentId))
+        except Exception as excT:
+            # unknown dataset content: everything is uploaded
+            print("\n! cannot list the dataset files:\n  %s\n" % str(excT))
+            return False
+        # end try
+        return True
+    # end reconcileIndex
+
+    def indexResult(self, persistentId, filename):
+        """ the result of the file if its content is already in the dataset according to the index, or None """
+        found = self.index.findRemote(persistentId, filename)
+        if found is None:
+            return None
+        #
+        if self.progress is not None:
+            self.progress.end(filename)
+        #
+        return {"filename": filename, "status": "OK", "Stdout": "", "message": "already in the dataset as %s (file id %s)" % found}
+    # end indexResult
+
+    def skipResult(self, persistentId, filename, indexed = False):
+        """ the result of a file not to be sent, already accepted according to the journal or, if indexed, its
+            content already in the dataset according to the (reconciled) index; None if it must be uploaded;
+            checked before the file is announced to the compressor, not to be compressed for nothing """
+        result = self.checkJournal(persistentId, filename)
+        if (result is None) and indexed:
+            result = self.indexResult(persistentId, filename)
+        #
+        return result
+    # end skipResult
+
+    def poolWorkers(self, workers = None):
+        """ the number of upload threads: workers (uploadWorkers if None), the maximum of the adaptive
+            concurrency if any (the uploads in flight being then bounded by its limit), 1 if serializeUploads """
+        if self.serializeUploads:
+            return 1
+        #
+        if self.adaptive is not None:
+            workers = self.adaptive.maximum
+        #
+        workers = max(1, int(workers if workers is not None else self.uploadWorkers))
+        if not self.useCurl:
+            session = getSession(self.DATASET_SERVER)
+            session.poolsize = max(session.poolsize, workers)
+        #
+        return workers
+    # end poolWorkers
+
+    def uploadFiles(self, persistentId, files, workers = None):
+        """ add the files, a list of (filename, description, directoryLabel), on a bounded pool of workers;
+            returns the list of per-file results, in the files order """
+
+        workers = self.poolWorkers(workers)
+
+        if (workers == 1) or (len(files) <= 1):
+            results = [self.uploadResult(persistentId, *fileT) for fileT in files]
+        else:
+            import concurrent.futures
+            with concurrent.futures.ThreadPoolExecutor(max_workers = workers) as executor:
+                results = list(executor.map(lambda fileT: self.uploadResult(persistentId, *fileT), files))
+            #
+        #
+
+        # the files refused because of a dataset lock are sent again, one at a time, once the lock is released
+        for ii in range(0, len(results)):
+            if results[ii]["status"] == "LOCKED":
+                self.waitUnlocked(persistentId)
+                results[ii] = self.uploadResult(persistentId, *files[ii])
+            #
+        #
+
+        return results
+
+    # end uploadFiles
+
+    def uploadBundle(self, persistentId, files, bundleName = "bundle.zip"):
+        """ add the files, a list of (filename, description, directoryLabel), as one zip archive streamed
+            while it is sent (Dataverse unzips it, the directoryLabel being kept as the path in the archive);
+            the description of the archive being given to all its files, the files of different descriptions
+            go in one archive per description, a file alone being sent as is; always sent through the pooled
+            session, curl being unable to read a body generated on the fly; the length of a deflated archive
+            being unknown until it is sent, it goes chunked (Transfer-Encoding), the files being sent one by one
+            if the server or its proxy requires a length (411); returns the list of per-file results """
+
+        results = [self.checkJournal(persistentId, fileT[0]) for fileT in files]
+        pending = [ii for ii in range(0, len(files)) if results[ii] is None]
+        if not pending:
+            return results
+        #
+
+        descriptions = []
+        for ii in pending:
+            if files[ii][1] not in descriptions:
+                descriptions.append(files[ii][1])
+            #
+        #
+        if len(descriptions) > 1:
+            for (number, description) in enumerate(descriptions):
+                group = [ii for ii in pending if files[ii][1] == description]
+                if len(group) > 1:
+                    resultsT = self.uploadBundle(persistentId, [files[ii] for ii in group], "%s-%d.zip" % (os.path.splitext(bundleName)[0], number + 1))
+                else:
+                    resultsT = [self.uploadResult(persistentId, *files[group[0]])]
+                #
+                for (ii, result) in zip(group, resultsT):
+                    results[ii] = result
+                #
+            #
+            return results
+        #
+        description = descriptions[0]
+
+        arcnames = []
+        for ii in pending:
+            (filename, description, directoryLabel) = files[ii]
+            arcnames.append("%s/%s" % (directoryLabel.strip("/"), os.path.basename(filename)) if directoryLabel else os.path.basename(filename))
+        #
+
+        url = "%s/:persistentId/add?persistentId=%s" % (self.DATASET_SERVER, urllib.parse.quote(persistentId, safe = ":/"))
+        bundleResult = {"filename": bundleName, "status": "ERROR", "Stdout": "", "message": ""}
+        algorithm = self.checksumType if self.verifyChecksum else None
+        archive = None
+        for attempt in range(1, self.retry.attempts + 1):
+            # the progress of the files read into the archive
+            if self.progress is not None:
+                for ii in pending:
+                    self.progress.begin(files[ii][0])
+                #
+            #
+            bundleResult.update({"status": "ERROR", "Stdout": "", "message": ""})
+            response, error = None, None
+            if self.adaptive is not None:
+                self.adaptive.acquire()
+            #
+            try:
+                archive = DataverseZipStream([(files[ii][0], arcname) for (ii, arcname) in zip(pending, arcnames)], chunksize = self.uploadChunkSize,
+                                             progress = self.progress.advance if (self.progress is not None) else None, checksum = algorithm)
+                body = DataverseMultipart(
+                    [("jsonData", self.metadata.fileData(description, ""))],
+                    [("file", bundleName, archive)],
+                    chunksize = self.uploadChunkSize)
+                JSONhead = {'X-Dataverse-key': self.DATAVERSE_KEY, 'Content-Type': body.contentType}
+                response = getSession(url).request("POST", url, body = body, headers = JSONhead, limiter = self.limiter)
+                self.recordTiming("bundle", url, bundleName, sum([os.path.getsize(files[ii][0]) for ii in pending]), response.status, response.timing)
+                bundleResult["Stdout"] = response.text
+                parsed = self.parseResponse(bundleResult["Stdout"])
+                if parsed is None:
+                    bundleResult["message"] = ("HTTP %d" % response.status) if (response.status >= 400) else "invalid server response"
+                elif parsed.get("status") == "OK":
+                    bundleResult["status"] = "OK"
+                else:
+                    bundleResult["message"] = str(parsed.get("message", ""))
+                    if "lock" in bundleResult["message"].lower():
+                        bundleResult["status"] = "LOCKED"
+                    #
+                #
+            except Exception as excT:
+                error = excT
+                bundleResult["message"] = str(excT)
+            # end try
+            pushback = (bundleResult["status"] == "LOCKED") or ((bundleResult["status"] != "OK") and self.retry.isRetryable(response.status if (response is not None) else 0, error))
+            if self.adaptive is not None:
+                self.adaptive.release(pushback, response.timing.get("server") if (response is not None) else None)
+            #
+            if (not pushback) or (attempt >= self.retry.attempts):
+                break
+            #
+            if bundleResult["status"] == "LOCKED":
+                self.waitUnlocked(persistentId)
+            else:
+                time.sleep(self.retry.delay(attempt, retryAfter(response.headers) if (response is not None) else None))
+            #
+        #
+
+        if (response is not None) and (response.status == 411):
+            # a body without length refused: the files sent one by one, each with its length
+            for ii in pending:
+                results[ii] = self.uploadResult(persistentId, *files[ii])
+            #
+            return results
+        #
+
+        # the unzipped files, by path in the archive
+        unzipped = {}
+        if bundleResult["status"] == "OK":
+            for fileT in (parsed.get("data") or {}).get("files", []):
+                arcname = "%s/%s" % (fileT.get("directoryLabel", "").strip("/"), fileT.get("label", "")) if fileT.get("directoryLabel") else fileT.get("label", "")
+                unzipped[arcname] = fileT
+            #
+        #
+        digests = archive.digests if (archive is not None) else {}
+        for (ii, arcname) in zip(pending, arcnames):
+            result = {"filename": files[ii][0], "status": bundleResult["status"], "Stdout": bundleResult["Stdout"], "message": bundleResult["message"]}
+            mismatch = self.checkDigest(unzipped[arcname], (files[ii][0], algorithm, digests[arcname])) if ((arcname in unzipped) and (arcname in digests)) else None
+            if mismatch is not None:
+                fileId = (unzipped[arcname].get("dataFile") or {}).get("id")
+                if self.deleteFile(persistentId, fileId):
+                    # stored corrupted: removed and sent again alone
+                    results[ii] = self.uploadResult(persistentId, *files[ii])
+                    continue
+                #
+                result.update({"status": "ERROR", "message": "%s (file id %s left in the dataset)" % (mismatch, fileId)})
+            elif arcname in unzipped:
+                result["Stdout"] = json.dumps({"status": "OK", "data": {"files": [unzipped[arcname]]}})
+                self.recordAccepted(persistentId, files[ii][0], {"data": {"files": [unzipped[arcname]]}})
+            elif bundleResult["status"] == "OK":
+                result["message"] = "sent in %s" % bundleName
+            #
+            if self.progress is not None:
+                self.progress.end(files[ii][0], result["status"])
+            #
+            results[ii] = result
+        #
+        return results
+
+    # end uploadBundle
+
+    def uploadData(self, persistentId, dataset):
+        """ add the report and data files to the dataset; returns the list of per-file results """
+
+        files = self.listFiles(dataset)
+        if self.progress is not None:
+            self.progress.expect(files)
+        #
+        indexed = (self.index is not None) and self.reconcileIndex(persistentId)
+        results = [self.skipResult(persistentId, fileT[0], indexed) for fileT in files]
+        pending = [ii for ii in range(0, len(files)) if results[ii] is None]
+        filesT = [files[ii] for ii in pending]
+
+        if (not self.bundleFiles) or (len(filesT) <= 1):
+            if self.compressor is not None:
+                self.compressor.expect([fileT[0] for fileT in filesT])
+            #
+            resultsT = self.uploadFiles(persistentId, filesT)
+        else:
+            resultsT = []
+            bundleSize = max(1, int(self.bundleSize))
+            for ii in range(0, len(filesT), bundleSize):
+                resultsT += self.uploadBundle(persistentId, filesT[ii:ii + bundleSize], "bundle%d.zip" % (1 + ii // bundleSize))
+            #
+        #
+
+        for (ii, result) in zip(pending, resultsT):
+            results[ii] = result
+        #
+        return results
+
+    # end uploadData
+
+    def uploadGroup(self, persistentId, files, bundleName = "bundle.zip"):
+        """ upload a group of files: one by one, or as one archive if bundleFiles; returns the list of per-file results """
+
+        if self.bundleFiles and (len(files) > 1):
+            return self.uploadBundle(persistentId, files, bundleName)
+        #
+        return [self.uploadResult(persistentId, *fileT) for fileT in files]
+
+    # end uploadGroup
+
+    def uploadStream(self, persistentId, files, workers = None, callback = None):
+        """ upload the files of an iterable of (filename, description, directoryLabel), such as scanFiles still
+            walking the disk: the files are sent as they come, no more than two groups per worker waiting,
+            so that the memory does not depend on the number of files; callback(result) is called for each
+            file; returns (number of files accepted, list of the results of the other files) """
+
+        workers = self.poolWorkers(workers)
+        groupSize = max(1, int(self.bundleSize)) if self.bundleFiles else 1
+        indexed = (self.index is not None) and self.reconcileIndex(persistentId)
+
+        counts = {"accepted": 0, "bundles": 0}
+        failed = []
+        locked = []
+
+        def collect(futures):
+            for future in futures:
+                for (fileT, result) in zip(future.files, future.result()):
+                    report(fileT, result)
+                #
+            #
+        # end collect
+
+        def report(fileT, result):
+            if result["status"] == "OK":
+                counts["accepted"] += 1
+            elif result["status"] == "LOCKED":
+                locked.append(fileT)
+                return
+            else:
+                failed.append(result)
+            #
+            if callback is not None:
+                callback(result)
+            #
+        # end report
+
+        import concurrent.futures
+        with concurrent.futures.ThreadPoolExecutor(max_workers = workers) as executor:
+            pending = set()
+
+            def submit(group):
+                # the archives are deflated already
+                if (self.compressor is not None) and (not self.bundleFiles):
+                    self.compressor.expect([fileT[0] for fileT in group])
+                #
+                counts["bundles"] += 1
+                future = executor.submit(self.uploadGroup, persistentId, group, "bundle%d.zip" % counts["bundles"])
+                future.files = group
+                pending.add(future)
+            # end submit
+
+            group = []
+            for fileT in files:
+                # the files skipped (journal, index) reported at once, never announced to the compressor
+                skipped = self.skipResult(persistentId, fileT[0], indexed)
+                if skipped is not None:
+                    report(fileT, skipped)
+                    continue
+                #
+                group.append(fileT)
+                if len(group) < groupSize:
+                    continue
+                #
+                if len(pending) >= (2 * workers):
+                    concurrent.futures.wait(pending, return_when = concurrent.futures.FIRST_COMPLETED)
+                #
+                done = [future for future in pending if future.done()]
+                pending.difference_update(done)
+                collect(done)
+                submit(group)
+                group = []
+            #
+            if group:
+                submit(group)
+            #
+            # the last groups, reported as each one finishes
+            while pending:
+                done, pending = concurrent.futures.wait(pending, return_when = concurrent.futures.FIRST_COMPLETED)
+                collect(done)
+            #
+        #
+
+        # the files refused because of a dataset lock are sent again, one at a time, once the lock is released
+        for fileT in locked:
+            self.waitUnlocked(persistentId)
+            result = self.uploadResult(persistentId, *fileT)
+            if result["status"] == "OK":
+                counts["accepted"] += 1
+            else:
+                failed.append(result)
+            #
+            if callback is not None:
+                callback(result)
+            #
+        #
+
+        return counts["accepted"], failed
+
+    # end uploadStream
+
+    def apiRequest(self, url, headers = None, method = "GET"):
+        """ send a request without body (GET, DELETE) to the Dataverse API, with the additional headers, and return the DataverseResponse """
+
+        headersT = {'X-Dataverse-key': self.DATAVERSE_KEY}
+        if headers:
+            headersT.update(headers)
+        #
+        if not self.useCurl:
+            response = getSession(url).request(method, url, headers = headersT, limiter = self.limiter)
+            self.recordTiming(method.lower(), url, "", 0, response.status, response.timing)
+            return response
+        #
+
+        import subprocess
+        args = ["curl", "-s", "-i", "-X", method]
+        for (name, value) in headersT.items():
+            args += ["-H", "%s: %s" % (name, value)]
+        #
+        args += [url, "-w", self.curlTimingFormat()]
+        self.getLimiter().waitRequest()
+        Stdout = self.curlResponse(subprocess.check_output(args), method.lower(), url, "", 0).content
+        # the status line and headers, preceded by those of the proxy or of a 100 Continue if any
+        head, sep, content = Stdout.partition(b"\r\n\r\n")
+        while content.startswith(b"HTTP/") and (head.split(b" ")[1:2] == [b"100"] or b"connection established" in head.lower()):
+            head, sep, content = content.partition(b"\r\n\r\n")
+        #
+        lines = head.decode('latin-1').split("\r\n")
+        parts = lines[0].split(" ", 2)
+        headersR = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headersR[name.strip()] = value.strip()
+            #
+        #
+        return DataverseResponse(int(parts[1]) if len(parts) > 1 else 0, parts[2] if len(parts) > 2 else "", headersR, content)
+
+    # end apiRequest
+
+    def apiGet(self, url, cached = False):
+        """ the JSON response of a GET request to the Dataverse API, as a dict (None if not JSON);
+            cached: read through the cache (for the requests whose answer does not change at every call) """
+        if cached and (self.cache is not None):
+            return self.parseResponse(self.cache.get(url, self.apiRequest))
+        #
+        return self.parseResponse(self.apiRequest(url).text)
+    # end apiGet
+
+    def apiData(self, url, what):
+        """ the data of the cached GET request, or ValueError with the server message """
+        response = self.apiGet(url, cached = True)
+        if (response is None) or (response.get("status") != "OK"):
+            raise ValueError("cannot get %s: %s" % (what, (response or {}).get("message", "invalid server response")))
+        #
+        return response.get("data")
+    # end apiData
+
+    def datasetInfo(self, persistentId):
+        """ the dataset with its latest version (id, versionState, versionNumber, metadataBlocks, files...) """
+        url = "%s/:persistentId/?persistentId=%s" % (self.DATASET_SERVER, urllib.parse.quote(persistentId, safe = ":/"))
+        return self.apiData(url, "the dataset %s" % persistentId) or {}
+    # end datasetInfo
+
+    def datasetVersions(self, persistentId):
+        """ the versions of the dataset, the latest first """
+        url = "%s/:persistentId/versions?persistentId=%s" % (self.DATASET_SERVER, urllib.parse.quote(persistentId, safe = ":/"))
+        return self.apiData(url, "the versions of %s" % persistentId) or []
+    # end datasetVersions
+
+    def listDatasetFiles(self, persistentId, version = ":latest"):
+        """ the file entries of the dataset version (label, directoryLabel, dataFile with id and checksum) """
+        url = "%s/:persistentId/versions/%s/files?persistentId=%s" % (self.DATASET_SERVER, version, urllib.parse.quote(persistentId, safe = ":/"))
+        return self.apiData(url, "the files of %s" % persistentId) or []
+    # end listDatasetFiles
+
+    def waitUnlocked(self, persistentId):
+        """ wait until the dataset has no lock left (or lockTimeout elapsed) """
+
+        url = "%s/:persistentId/locks?persistentId=%s" % (self.DATASET_SERVER, urllib.parse.quote(persistentId, safe = ":/"))
+        tic = time.time()
+        delay = 0.5
+        while (time.time() - tic) < self.lockTimeout:
+            try:
+                response = self.apiGet(url)
+                if (response is not None) and (response.get("status") == "OK") and (not response.get("data")):
+                    return True
+                #
+            except Exception:
+                pass
+            # end try
+            time.sleep(delay)
+            delay = min(2.0 * delay, 10.0)
+        #
+        return False
+
+    # end waitUnlocked
+
+    def parseResponse(self, Stdout):
+        """ the JSON server response as a dict, or None """
+
+        # the curl progress meter may precede the JSON response
+        try:
+            response = json.loads(Stdout[max(Stdout.find("{"), 0):])
+        except ValueError:
+            return None
+        # end try
+        return response if isinstance(response, dict) else None
+
+    # end parseResponse
+
+    def parsePersistentId(self, Stdout):
+        """ the persistentId of a newly created dataset, or None """
+
+        response = self.parseResponse(Stdout)
+        if (response is None) or (response.get("status") != "OK"):
+            return None
+        #
+        data = response.get("data")
+        if not isinstance(data, dict):
+            return None
+        #
+        return data.get("persistentId")
+
+    # end parsePersistentId
+
+    def datasetKey(self, dataset):
+        """ the key identifying the dataset in the journal: its manifest name (see readManifest), or None if it has none
+            (not journaled, two datasets possibly sharing their title) """
+        return dataset.get("dataset") or None
+    # end datasetKey
+
+    def runDataset(self, dataset):
+        """ create the dataset (unless it has a persistentId) then upload its files """
+        return self.populateDataset(*self.prepareDataset(dataset))
+    # end runDataset
+
+    def prepareDataset(self, dataset):
+        """ the dataset (described if asked) and its result, with the persistentId of the dataset created unless it has one
+            (or the journal knows it) """
+
+        result = {"title": dataset.get("title", ""), "persistentId": dataset.get("persistentId", ""), "JSON": "", "Data": []}
+        if self.isDescribed(dataset):
+            dataset = self.describeDataset(dataset)
+        #
+
+        key = self.datasetKey(dataset) if (self.journal is not None) else None
+        if (not result["persistentId"]) and (key is not None):
+            result["persistentId"] = self.journal.getDataset(key) or ""
+        #
+        if not result["persistentId"]:
+            JSONcontent = self.makeJSON(dataset)
+            Stdout = self.uploadJSON(JSONcontent, dataset.get("JSONfilename", None))
+            result["JSON"] = Stdout
+            result["persistentId"] = self.parsePersistentId(Stdout)
+            if not result["persistentId"]:
+                raise ValueError("dataset not created: %s" % Stdout.strip())
+            #
+            if key is not None:
+                self.journal.recordDataset(key, result["persistentId"])
+            #
+        #
+        return dataset, result
+
+    # end prepareDataset
+
+    def populateDataset(self, dataset, result):
+        """ upload the files of the dataset created by prepareDataset, into its result """
+
+        result["Data"] = self.uploadData(result["persistentId"], dataset)
+
+        # the scanned files: only the failed ones are kept, the accepted ones counted
+        if dataset.get("ScanDirectory", ""):
+            result["streamed"], failed = self.uploadStream(result["persistentId"], self.streamFiles(dataset))
+            result["Data"] += failed
+        #
+
+        return result
+
+    # end populateDataset
+
+    def runDatasets(self, datasets, callback = None):
+        """ create and populate the datasets as a pipeline: createWorkers datasets created at a time, the files of each
+            one uploaded as soon as it is created (datasetWorkers datasets at a time), while the next ones are created;
+            callback(index, result) is called as each dataset ends; returns the results, in the datasets order """
+
+        import concurrent.futures, functools
+
+        results = [None] * len(datasets)
+        started = [time.time()] * len(datasets)
+        mutex = threading.Lock()
+
+        def finish(index, result):
+            result["elapsed"] = float(time.time() - started[index])
+            results[index] = result
+            if callback is not None:
+                with mutex:
+                    callback(index, result)
+                #
+            #
+        # end finish
+
+        def failure(index, persistentId, excT):
+            return {"title": datasets[index].get("title", ""), "persistentId": persistentId, "status": "ERROR", "message": str(excT), "Data": []}
+        # end failure
+
+        def prepare(index):
+            started[index] = time.time()
+            return self.prepareDataset(datasets[index])
+        # end prepare
+
+        def populate(index, dataset, result):
+            try:
+                result = self.populateDataset(dataset, result)
+                result["status"] = "ERROR" if [fileT for fileT in result["Data"] if fileT["status"] != "OK"] else "OK"
+            except Exception as excT:
+                result = failure(index, result["persistentId"], excT)
+            # end try
+            finish(index, result)
+        # end populate
+
+        def created(index, uploaders, future):
+            # in the creating thread: the uploads of the dataset queued at once
+            try:
+                (dataset, result) = future.result()
+            except Exception as excT:
+                finish(index, failure(index, datasets[index].get("persistentId", ""), excT))
+                return
+            # end try
+            uploaders.submit(populate, index, dataset, result)
+        # end created
+
+        # the connections of the uploads of all the datasets in flight, and of the creations
+        datasetWorkers = max(1, int(self.datasetWorkers))
+        if not self.useCurl:
+            session = getSession(self.DATASET_SERVER)
+            session.poolsize = max(session.poolsize, datasetWorkers * self.poolWorkers())
+        #
+        with concurrent.futures.ThreadPoolExecutor(max_workers = datasetWorkers) as uploaders:
+            # the creations all end, and their uploads are queued, before the uploaders are waited for
+            with concurrent.futures.ThreadPoolExecutor(max_workers = max(1, int(self.createWorkers))) as creators:
+                for index in range(0, len(datasets)):
+                    creators.submit(prepare, index).add_done_callback(functools.partial(created, index, uploaders))
+                #
+            #
+        #
+        return results
+
+    # end runDatasets
+
+# end DataverseEngine class
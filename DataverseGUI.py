@@ -0,0 +1,476 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# The Tkinter widgets of the interface, in their own module, loaded only when the interface is shown
+
+import sys, os, os.path, platform
+
+StyleBackground     = '#f7f9fa'
+StyleButtoncolor    = '#dae8eb'
+StyleActivecolor    = '#f1f59d'
+StyleInactivecolor  = '#f5fafa'
+
+try:
+
+    if sys.version_info[0] < 3:
+        # Python 2.7.x
+        import Tkinter as Tk
+        import ttk
+        import tkFileDialog
+    else:
+        # Python 3.x
+        import tkinter as Tk
+        import tkinter.ttk as ttk
+        import tkinter.filedialog as tkFileDialog
+    # end if
+    
+except ImportError as ierr:
+    print("\n! cannot load Tkinter:\n  " + ("{0}".format(ierr)) + "\n")
+    sys.exit(1)
+except Exception as excT:
+    print("\n! cannot load Tkinter:\n  %s\n" % str(excT))
+    sys.exit(1)
+# end try
+
+class ScrolledFrame(Tk.Frame):
+
+    def __init__(self, parent, *args, **kwargs):
+    
+        self.os = platform.system()
+
+        self.parent = parent
+
+        global StyleBackground
+        global StyleButtoncolor
+        global StyleActivecolor
+        global StyleInactivecolor
+
+        Tk.Frame.__init__(self, self.parent.root, *args, **kwargs)
+        scrollbarstyle = ttk.Style(self)
+        scrollbarstyle.layout('Dataverse.ScrollbarV', 
+            [
+                (   'Vertical.Scrollbar.trough',
+                    {
+                        'children': 
+                        [
+                            (
+                                'Vertical.Scrollbar.thumb', 
+                                {
+                                    'expand': '1',
+                                    'sticky': 'nswe'
+                                }
+                            )
+                        ],
+                        'sticky': 'ns'
+                    }
+                )
+            ])
+        scrollbarstyle.configure('Dataverse.ScrollbarV', background = StyleButtoncolor)
+        scrollbarstyle.configure('Dataverse.ScrollbarV', troughcolor = StyleBackground)
+
+        self.scrollbarv = ttk.Scrollbar(self, orient = 'vertical', style = 'Dataverse.ScrollbarV')
+        self.scrollbarv.pack(fill = Tk.Y, side = Tk.RIGHT, expand = Tk.FALSE)
+        self.canvas = Tk.Canvas(self, bd = 0, highlightthickness = 0, yscrollcommand = self.scrollbarv.set)
+        self.canvas.pack(side = Tk.LEFT, fill = Tk.BOTH, expand = Tk.TRUE)
+        if self.os == "Linux":
+            self.canvas.bind_all('<4>', self.onMouseWheel, add='+')
+            self.canvas.bind_all('<5>', self.onMouseWheel, add='+')
+        else:
+            self.canvas.bind_all("<MouseWheel>", self.onMouseWheel, add='+')
+        #
+        self.scrollbarv.config(command = self.canvas.yview)
+        self.canvas.yview_moveto(0)
+        self.frame = Tk.Frame(self.canvas, background = StyleBackground)
+        self.window = self.canvas.create_window(0, 0, window = self.frame, anchor = Tk.NW)
+        self.frame.bind('<Configure>', self.onConfigureFrame)
+        self.canvas.bind('<Configure>', self.onConfigureCanvas)
+    #
+
+    def onMouseWheel(self, event):
+        x,y = self.parent.root.winfo_pointerxy()
+        widgetm = self.parent.root.winfo_containing(x,y)
+        while widgetm is not None:
+            if isinstance(widgetm, VirtualList):
+                return widgetm.onMouseWheel(event)
+            #
+            widgetm = widgetm.master
+        #
+        widget = self.canvas.focus_get()
+        scrollableWidgets = [self.parent.DescriptionEdit, self.parent.NotesEdit, self.parent.JSONstdoutEdit, self.parent.DataStdoutEdit]
+        if (widget in scrollableWidgets):
+            x,y = self.parent.root.winfo_pointerxy()
+            widgetm = self.parent.root.winfo_containing(x,y)
+            if (widgetm is widget):
+                yview = widget.yview()
+                if yview[0] > 0.0 or yview[1] < 1.0:
+                    return "break"
+                #
+            #
+        #
+        if self.os == "Linux":
+            if event.num == 4:
+                self.canvas.yview_scroll(-1, "units")
+            elif event.num == 5:
+                self.canvas.yview_scroll(1, "units")
+            #
+        else:     
+            self.canvas.yview_scroll(-1 * (event.delta / 120), "units")
+        #
+        return "break"
+    #
+
+    def onConfigureFrame(self, event):
+        self.canvas.config(scrollregion = "0 0 %s %s" % (self.frame.winfo_reqwidth(), self.frame.winfo_reqheight()))
+        if self.frame.winfo_reqwidth() != self.canvas.winfo_width():
+            self.canvas.config(width = self.frame.winfo_reqwidth())
+        #
+    #
+
+    def onConfigureCanvas(self, event):
+        if self.frame.winfo_reqwidth() != self.canvas.winfo_width():
+            self.canvas.itemconfigure(self.window, width = self.canvas.winfo_width())
+        #
+    #
+
+# end ScrolledFrame
+
+class MessageBox(Tk.Toplevel):
+
+    def __init__(self, parent, title, message,
+        callbackA = None, callbackB = None,
+        labelA = "OK", labelB = "Cancel",
+        TwoButton = True):
+
+        self.window = None
+        if (parent is None) or (parent.dialogshown):
+            return
+        #
+
+        global StyleBackground
+        global StyleButtoncolor
+        global StyleActivecolor
+        global StyleInactivecolor
+ 
+        self.parent = parent
+        self.window = Tk.Toplevel(self.parent.root)
+        self.window.title(title)
+
+        spx  = 18
+        spy  = 6
+
+        self.topFrame = Tk.Frame(self.window, background = StyleBackground)
+        self.topFrame.pack(fill = Tk.X, side = Tk.TOP, padx = spx, pady = spy)
+        self.message = Tk.Label(self.topFrame, text = message)
+        self.message.pack(side = Tk.LEFT, fill = Tk.X, expand = 1)
+
+        self.btnstyle = ttk.Style()
+        self.btnstyle.configure("MessageBox.TButton", foreground="black", background = StyleButtoncolor, focuscolor='none')
+        self.btnstyle.map('MessageBox.TButton', background = [('active', StyleActivecolor), ])
+
+        self.bottomFrame = Tk.Frame(self.window, background = StyleBackground)
+        self.bottomFrame.pack(fill = Tk.X, side = Tk.TOP, padx = spx, pady = spy)        
+        self.buttonA = ttk.Button(self.bottomFrame, text = labelA if labelA else "OK")
+        if TwoButton:
+            self.buttonA = ttk.Button(self.bottomFrame, text = labelA if labelA else "OK")   
+            self.buttonA.pack(side = Tk.LEFT, fill = Tk.X, expand = 1)
+        else:
+            self.LLabel = Tk.Label(self.bottomFrame, text = " ", background = StyleBackground)
+            self.LLabel.pack(fill = Tk.X, side = Tk.LEFT, expand = True, padx = spx, pady = spy)
+            self.buttonA = ttk.Button(self.bottomFrame, width = 16, text = labelA if labelA else "OK")   
+            self.buttonA.pack(side = Tk.LEFT, padx = spx, pady = spy)
+            self.RLabel = Tk.Label(self.bottomFrame, text = " ", background = StyleBackground)
+            self.RLabel.pack(fill = Tk.X, side = Tk.LEFT, expand = True, padx = spx, pady = spy)
+        #
+        self.buttonA.configure(style="MessageBox.TButton")
+        self.buttonA.bind("<ButtonRelease-1>", self.onButtonA)
+        if TwoButton:
+            self.buttonB = ttk.Button(self.bottomFrame, text = labelB if labelB else "Cancel")
+            self.buttonB.pack(side = Tk.LEFT, fill = Tk.BOTH, expand = 1)
+            self.buttonB.configure(style="MessageBox.TButton")
+            self.buttonB.bind("<ButtonRelease-1>", self.onButtonB)
+        else:
+            self.buttonB = None
+        #
+
+        self.labelA = labelA
+        self.labelB = labelB
+        self.callbackA = callbackA
+        self.callbackB = callbackB
+        self.retvalue = None
+
+        self.window.deiconify()
+        self.window.wm_attributes("-topmost", True)
+        self.window.protocol('WM_DELETE_WINDOW', self.onClose)
+
+        # center the window
+        x = self.parent.root.winfo_x()
+        y = self.parent.root.winfo_y()
+        rw = self.parent.root.winfo_width()
+        rh = self.parent.root.winfo_height()
+        ix = x + (rw - self.parent.MessageBoxWidth) / 2
+        iy = y + (rh - self.parent.MessageBoxHeight) / 2
+        self.window.geometry("+%d+%d" % (ix, iy))
+
+        self.window.minsize(160, 90)
+
+        if (os.name == "nt"):
+            self.window.iconbitmap(r'iconmain.ico')
+        else:
+            iconmain = Tk.PhotoImage(file='iconmain.gif')
+            self.window.tk.call('wm', 'iconphoto', self.window._w, iconmain)
+        # end if
+
+        self.window.mainloop()
+        self.destroy()
+    # end __init__
+
+    def destroy(self):
+        if self.window is not None:
+            self.parent.MessageBoxWidth = self.window.winfo_width()
+            self.parent.MessageBoxHeight = self.window.winfo_height()
+            self.window.quit()
+            self.window.destroy()
+            self.parent.root.deiconify()
+            self.window = None
+        #
+    #
+
+    def onButtonA(self, event = None):
+        if self.window is not None:
+            self.retvalue = self.labelA
+            self.destroy()
+            if self.callbackA is not None:
+                self.callbackA()
+            #
+        #
+    #
+
+    def onButtonB(self, event = None):
+        if self.window is not None:
+            self.retvalue = self.labelB
+            self.destroy()
+            if self.callbackB is not None:
+                self.callbackB()
+            #
+        #
+    #
+
+    def onClose(self):
+        if self.window is not None:
+            self.destroy()
+        #
+    #
+# end MessageBox
+
+# rows of strings kept by column, each column being one of the dataset lists (author, affiliation...),
+# modified in place: the dataset lists and the table are always the same
+class DataverseTable(object):
+
+    def __init__(self, columns):
+        self.columns = columns
+        rowsCount = max([len(column) for column in self.columns])
+        for column in self.columns:
+            column.extend([""] * (rowsCount - len(column)))
+        #
+    # end __init__
+
+    def __len__(self):
+        return len(self.columns[0])
+    # end __len__
+
+    def get(self, row, col):
+        column = self.columns[col]
+        return (column[row] or "") if row < len(column) else ""
+    # end get
+
+    def set(self, row, col, value):
+        if row >= len(self):
+            if not value:
+                return
+            #
+            for column in self.columns:
+                column.extend([""] * (row + 1 - len(column)))
+            #
+        #
+        self.columns[col][row] = value
+    # end set
+
+    def append(self, values):
+        for (column, value) in zip(self.columns, values):
+            column.append(value)
+        #
+    # end append
+
+    def trim(self):
+        """ remove the empty rows at the end """
+        rowsCount = len(self)
+        while (rowsCount > 0) and (not [column for column in self.columns if column[rowsCount - 1]]):
+            rowsCount -= 1
+        #
+        for column in self.columns:
+            del column[rowsCount:]
+        #
+    # end trim
+
+# end DataverseTable
+
+# an editable list of any length: only the visible rows are widgets, filled with the table
+# rows under the scroll position, so that thousands of rows load and scroll at once;
+# an empty row always follows the table, typing in it adds a row
+class VirtualList(Tk.Frame):
+
+    def __init__(self, parent, core, table, headers, visible = 5, browse = None, weights = None, addcommand = None):
+
+        global StyleBackground
+        global StyleActivecolor
+
+        Tk.Frame.__init__(self, parent, background = StyleBackground)
+
+        self.core       = core
+        self.table      = table
+        self.visible    = visible
+        self.first      = 0
+        self.rows       = []
+
+        columnsCount = len(self.table.columns)
+        weights = weights if weights else [1] * columnsCount
+
+        self.body = Tk.Frame(self, background = StyleBackground)
+        self.body.pack(side = Tk.LEFT, fill = Tk.X, expand = 1)
+        self.scrollbar = ttk.Scrollbar(self, orient = 'vertical', style = 'Dataverse.ScrollbarV', command = self.onScroll)
+        self.scrollbar.pack(side = Tk.LEFT, fill = Tk.Y)
+
+        # the grid columns: row number, then the table columns, the browse button after the first one
+        gridColumns = [1 + col + (1 if (browse and col > 0) else 0) for col in range(0, columnsCount)]
+        for col in range(0, columnsCount):
+            self.body.columnconfigure(gridColumns[col], weight = weights[col])
+        #
+        for col in range(0, columnsCount):
+            Tk.Label(self.body, text = headers[col], anchor = Tk.W, background = StyleBackground).grid(row = 0, column = gridColumns[col], sticky = Tk.EW)
+        #
+        if addcommand is not None:
+            addButton = ttk.Button(self.body, width = 4, text = "+", command = addcommand)
+            addButton.configure(style = "Black.TButton")
+            addButton.grid(row = 0, column = 0)
+        #
+
+        Validate = (self.body.register(self.core.onInputValidate), '%P')
+        for ii in range(0, self.visible):
+            label = Tk.Label(self.body, width = 6, anchor = Tk.E, background = StyleBackground)
+            label.grid(row = ii + 1, column = 0, sticky = Tk.E)
+            entries = []
+            for col in range(0, columnsCount):
+                entryT = Tk.Entry(self.body, validate = "key", vcmd = Validate, highlightthickness = 2, background = "white", selectbackground = "pale turquoise", selectforeground = "black")
+                entryT.grid(row = ii + 1, column = gridColumns[col], sticky = Tk.EW)
+                entryT.config(highlightbackground = StyleBackground, highlightcolor = StyleActivecolor)
+                entryT.prev = None
+                entryT.next = None
+                entryT.virtual = self
+                entryT.position = (ii, col)
+                entryT.bind("<Up>", self.onKeyUp)
+                entryT.bind("<Down>", self.onKeyDown)
+                entries.append(entryT)
+            #
+            button = None
+            if browse:
+                button = ttk.Button(self.body, width = 4, text = "...")
+                button.grid(row = ii + 1, column = gridColumns[0] + 1, padx = (2, 2))
+                button.configure(style = "Black.TButton")
+                button.bind("<ButtonRelease-1>", self.core.onBrowse)
+                self.core.Buttons[button] = (entries[0], browse)
+            #
+            self.rows.append((label, entries, button))
+        #
+
+        self.render()
+
+    # end __init__
+
+    def length(self):
+        """ the number of rows to scroll through: the table and an empty row """
+        return max(len(self.table) + 1, self.visible)
+    # end length
+
+    def store(self):
+        """ copy the visible entries to the table """
+        for ii in range(0, self.visible):
+            for (col, entryT) in enumerate(self.rows[ii][1]):
+                value = entryT.get()
+                if value != self.table.get(self.first + ii, col):
+                    self.table.set(self.first + ii, col, value)
+                #
+            #
+        #
+    # end store
+
+    def render(self):
+        """ fill the visible rows with the table rows from first """
+        for ii in range(0, self.visible):
+            label, entries, button = self.rows[ii]
+            label["text"] = "#%d " % (self.first + ii + 1)
+            for (col, entryT) in enumerate(entries):
+                entryT.delete(0, Tk.END)
+                entryT.insert(0, self.table.get(self.first + ii, col))
+                entryT.prev = None
+                entryT.next = None
+            #
+        #
+        length = float(self.length())
+        self.scrollbar.set(self.first / length, (self.first + self.visible) / length)
+    # end render
+
+    def scrollTo(self, first):
+        self.store()
+        self.first = max(0, min(int(first), self.length() - self.visible))
+        self.render()
+    # end scrollTo
+
+    def scrollEnd(self):
+        self.scrollTo(self.length())
+    # end scrollEnd
+
+    def onScroll(self, action, value, unit = None):
+        if action == "moveto":
+            self.scrollTo(round(float(value) * self.length()))
+        elif action == "scroll":
+            self.scrollTo(self.first + int(value) * (self.visible if unit == "pages" else 1))
+        #
+    # end onScroll
+
+    def onMouseWheel(self, event):
+        if (event.num == 4) or (getattr(event, "delta", 0) > 0):
+            self.scrollTo(self.first - 1)
+        else:
+            self.scrollTo(self.first + 1)
+        #
+        return "break"
+    # end onMouseWheel
+
+    def onKeyUp(self, event):
+        ii, col = event.widget.position
+        if ii > 0:
+            self.rows[ii - 1][1][col].focus_set()
+        else:
+            self.scrollTo(self.first - 1)
+        #
+        return "break"
+    # end onKeyUp
+
+    def onKeyDown(self, event):
+        ii, col = event.widget.position
+        if ii < (self.visible - 1):
+            self.rows[ii + 1][1][col].focus_set()
+        else:
+            self.scrollTo(self.first + 1)
+        #
+        return "break"
+    # end onKeyDown
+
+# end VirtualList
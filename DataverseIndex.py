@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# Deduplication index: the checksums of the local files (computed once per size and mtime)
+# and of the files present in each dataset, in a SQLite database, so that a file whose
+# content is already in the dataset is skipped before any byte is sent
+
+import sys, os, os.path, time
+import threading
+import sqlite3
+from DataverseTransport import fileChecksum, hashFile
+
+class DataverseIndex(object):
+    """ the persistent deduplication index """
+
+    def __init__(self, filename, chunksize = 1 << 20):
+
+        self.filename   = filename
+        self.chunksize  = chunksize
+        self.mutex      = threading.Lock()
+
+        dirname = os.path.dirname(os.path.abspath(self.filename))
+        if not os.path.isdir(dirname):
+            os.makedirs(dirname)
+        #
+        # the uploads run on several threads, all serialized by the mutex
+        self.db = sqlite3.connect(self.filename, check_same_thread = False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS local (path TEXT, algorithm TEXT, size INTEGER, mtime REAL, checksum TEXT, PRIMARY KEY (path, algorithm))")
+        self.db.execute("CREATE TABLE IF NOT EXISTS remote (persistentId TEXT, path TEXT, fileId INTEGER, algorithm TEXT, checksum TEXT, PRIMARY KEY (persistentId, path))")
+        self.db.execute("CREATE INDEX IF NOT EXISTS remote_checksum ON remote (persistentId, algorithm, checksum)")
+        self.db.commit()
+
+    # end __init__
+
+    def close(self):
+        with self.mutex:
+            self.db.close()
+        #
+    # end close
+
+    def localChecksum(self, path, algorithm = "MD5"):
+        """ the checksum of the local file, computed only if the file changed since the last time """
+
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        with self.mutex:
+            row = self.db.execute("SELECT size, mtime, checksum FROM local WHERE path = ? AND algorithm = ?", (path, algorithm)).fetchone()
+        #
+        if (row is not None) and (row[0] == stat.st_size) and (abs(row[1] - stat.st_mtime) <= 1e-3):
+            return row[2]
+        #
+
+        checksum = hashFile(path, algorithm, self.chunksize)
+        with self.mutex:
+            self.db.execute("INSERT OR REPLACE INTO local VALUES (?, ?, ?, ?, ?)", (path, algorithm, stat.st_size, stat.st_mtime, checksum))
+            self.db.commit()
+        #
+        return checksum
+
+    # end localChecksum
+
+    def remoteEntry(self, fileT):
+        """ (path in the dataset, file id, checksum type, checksum) of a file entry of a Dataverse response """
+        dataFile = fileT.get("dataFile") or {}
+        algorithm, value = fileChecksum(fileT)
+        label = fileT.get("label") or dataFile.get("filename", "")
+        path = "%s/%s" % (fileT["directoryLabel"].strip("/"), label) if fileT.get("directoryLabel") else label
+        return path, dataFile.get("id"), algorithm, value
+    # end remoteEntry
+
+    def reconcile(self, persistentId, files):
+        """ replace the dataset files by the listing returned by the server (list of file entries) """
+        rows = []
+        for fileT in files:
+            path, fileId, algorithm, checksum = self.remoteEntry(fileT)
+            if checksum:
+                rows.append((persistentId, path, fileId, algorithm, checksum))
+            #
+        #
+        with self.mutex:
+            self.db.execute("DELETE FROM remote WHERE persistentId = ?", (persistentId,))
+            self.db.executemany("INSERT OR REPLACE INTO remote VALUES (?, ?, ?, ?, ?)", rows)
+            self.db.commit()
+        #
+        return len(rows)
+    # end reconcile
+
+    def recordRemote(self, persistentId, response):
+        """ add the files of an /add response to the dataset files """
+        try:
+            files = response["data"]["files"]
+        except (KeyError, TypeError):
+            return
+        # end try
+        with self.mutex:
+            for fileT in files:
+                path, fileId, algorithm, checksum = self.remoteEntry(fileT)
+                if checksum:
+                    self.db.execute("INSERT OR REPLACE INTO remote VALUES (?, ?, ?, ?, ?)", (persistentId, path, fileId, algorithm, checksum))
+                #
+            #
+            self.db.commit()
+        #
+    # end recordRemote
+
+    def algorithms(self, persistentId):
+        """ the checksum types used by the dataset files """
+        with self.mutex:
+            return [row[0] for row in self.db.execute("SELECT DISTINCT algorithm FROM remote WHERE persistentId = ?", (persistentId,))]
+        #
+    # end algorithms
+
+    def findRemote(self, persistentId, path):
+        """ (path in the dataset, file id) of a dataset file with the same content as the local file, or None """
+        for algorithm in self.algorithms(persistentId):
+            checksum = self.localChecksum(path, algorithm)
+            with self.mutex:
+                row = self.db.execute("SELECT path, fileId FROM remote WHERE persistentId = ? AND algorithm = ? AND checksum = ?", (persistentId, algorithm, checksum)).fetchone()
+            #
+            if row is not None:
+                return row
+            #
+        #
+        return None
+    # end findRemote
+
+# end DataverseIndex
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# Upload journal: the datasets created and the files accepted by the server, appended
+# to a JSON lines file as soon as the server answers, so that an interrupted job
+# resumes from the first file that did not finish
+
+import sys, os, os.path, time
+import threading
+import json
+
+class DataverseJournal(object):
+    """ the on-disk journal of an upload job """
+
+    def __init__(self, filename):
+
+        self.filename   = filename
+        self.mutex      = threading.Lock()
+        self.datasets   = {}
+        self.files      = {}
+
+        if os.path.isfile(self.filename):
+            with open(self.filename, "r", encoding = "utf-8") as fileT:
+                for line in fileT:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # the last line may be truncated if the job was killed while writing it
+                        continue
+                    # end try
+                    if entry.get("type") == "dataset":
+                        self.datasets[entry["key"]] = entry
+                    elif entry.get("type") == "file":
+                        self.files[(entry["persistentId"], entry["filename"])] = entry
+                    #
+                #
+            #
+        else:
+            dirname = os.path.dirname(os.path.abspath(self.filename))
+            if not os.path.isdir(dirname):
+                os.makedirs(dirname)
+            #
+        # end if
+
+    # end __init__
+
+    def append(self, entry):
+        with open(self.filename, "a", encoding = "utf-8") as fileT:
+            fileT.write(json.dumps(entry) + "\n")
+            fileT.flush()
+            os.fsync(fileT.fileno())
+        #
+    # end append
+
+    def getDataset(self, key):
+        """ the persistentId of the dataset created under key, or None """
+        with self.mutex:
+            entry = self.datasets.get(key)
+        #
+        return entry["persistentId"] if entry else None
+    # end getDataset
+
+    def recordDataset(self, key, persistentId):
+        entry = {"type": "dataset", "key": key, "persistentId": persistentId, "time": time.time()}
+        with self.mutex:
+            self.datasets[key] = entry
+            self.append(entry)
+        #
+    # end recordDataset
+
+    def getFile(self, persistentId, filename):
+        """ the journal entry of the file if it was accepted and did not change since, or None """
+        filename = os.path.abspath(filename)
+        with self.mutex:
+            entry = self.files.get((persistentId, filename))
+        #
+        if entry is None:
+            return None
+        #
+        try:
+            stat = os.stat(filename)
+        except OSError:
+            return None
+        # end try
+        if (stat.st_size != entry["size"]) or (abs(stat.st_mtime - entry["mtime"]) > 1e-3):
+            return None
+        #
+        return entry
+    # end getFile
+
+    def recordFile(self, persistentId, filename, response):
+        """ record the file accepted by the server, with the file id and checksum of the response """
+
+        filename = os.path.abspath(filename)
+        stat = os.stat(filename)
+        fileId, checksum = None, None
+        try:
+            dataFile = response["data"]["files"][0]["dataFile"]
+            fileId = dataFile.get("id")
+            checksum = dataFile.get("checksum") or ({"type": "MD5", "value": dataFile["md5"]} if dataFile.get("md5") else None)
+        except (KeyError, IndexError, TypeError):
+            pass
+        # end try
+        entry = {"type": "file", "persistentId": persistentId, "filename": filename,
+                 "size": stat.st_size, "mtime": stat.st_mtime,
+                 "fileId": fileId, "checksum": checksum, "time": time.time()}
+        with self.mutex:
+            self.files[(persistentId, filename)] = entry
+            self.append(entry)
+        #
+        return entry
+
+    # end recordFile
+
+# end DataverseJournal
@@ -0,0 +1,266 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# Upload limits: token buckets on the bytes per second put on the wire and on the requests per second,
+# for an upload job not to starve the other users of a shared link (such as the live acquisition of
+# the instruments); the transport takes the tokens of every chunk sent, in turn (first come, first
+# served), so that the concurrent uploads share the budget fairly; a job limiter also takes the tokens
+# of the process limiter (GlobalLimiter), and both can be changed while the uploads run:
+#
+#   GlobalLimiter.setLimits(bytesPerSecond = 50e6)
+#   engine.limiter = DataverseLimiter(bytesPerSecond = 10e6, requestsPerSecond = 5)
+#   ...
+#   engine.limiter.setLimits(bytesPerSecond = 100e6)      # night window
+
+import sys, os, time
+import threading
+
+# the unit suffixes of the rates (powers of 1000, as the MB/s shown by the progress)
+RateUnits = {"k": 1e3, "K": 1e3, "M": 1e6, "G": 1e9}
+
+def parseRate(strT):
+    """ the rate of a string such as 500k, 10M or 1.5G (per second); 0 or an empty string for no limit """
+    strT = str(strT).strip()
+    if strT.endswith("/s"):
+        strT = strT[:-2]
+    #
+    if strT.endswith("B"):
+        strT = strT[:-1]
+    #
+    if not strT:
+        return 0.0
+    #
+    if strT[-1] in RateUnits:
+        return max(float(strT[:-1]) * RateUnits[strT[-1]], 0.0)
+    #
+    return max(float(strT), 0.0)
+# end parseRate
+
+class DataverseTokenBucket(object):
+    """ rate tokens per second, at most burst of them saved while idle; a taker borrows the missing tokens
+        and waits until they are refilled, the next taker waiting after it (first come, first served) """
+
+    def __init__(self, rate = 0.0, burst = None):
+        """ rate: 0 for no limit; burst: rate (one second of tokens) if None """
+        self.mutex      = threading.Lock()
+        self.rate       = 0.0
+        self.burst      = 0.0
+        self.tokens     = 0.0
+        self.stamp      = time.monotonic()
+        self.setRate(rate, burst)
+    # end __init__
+
+    def refill(self, now):
+        if self.rate > 0:
+            self.tokens = min(self.tokens + ((now - self.stamp) * self.rate), self.burst)
+        #
+        self.stamp = now
+    # end refill
+
+    def setRate(self, rate, burst = None):
+        """ change the rate, for the next tokens taken (those already borrowed are refilled at the former rate) """
+        with self.mutex:
+            self.refill(time.monotonic())
+            self.rate = max(float(rate or 0.0), 0.0)
+            self.burst = float(burst) if burst else self.rate
+            self.tokens = min(self.tokens, self.burst)
+        #
+    # end setRate
+
+    def reserve(self, tokens):
+        """ take tokens and return the seconds to wait before using them (0 without limit) """
+        if self.rate <= 0:
+            return 0.0
+        #
+        with self.mutex:
+            if self.rate <= 0:
+                return 0.0
+            #
+            now = time.monotonic()
+            self.refill(now)
+            self.tokens -= tokens
+            return (-self.tokens / self.rate) if (self.tokens < 0) else 0.0
+        #
+    # end reserve
+
+# end DataverseTokenBucket
+
+class DataverseLimiter(object):
+    """ the bytes per second and requests per second of an upload job (0: no limit), within those of its parent """
+
+    # the most bytes sent at once under a byte limit, for the concurrent uploads to take turns
+    quantum = 1 << 16
+
+    def __init__(self, bytesPerSecond = 0, requestsPerSecond = 0, parent = None):
+        """ parent: a limiter whose budget is shared with other jobs; GlobalLimiter is the last one in any case """
+        self.bytesBucket    = DataverseTokenBucket(bytesPerSecond)
+        self.requestsBucket = DataverseTokenBucket(requestsPerSecond)
+        self.parent         = parent
+    # end __init__
+
+    @property
+    def bytesPerSecond(self):
+        return self.bytesBucket.rate
+    # end bytesPerSecond
+
+    @property
+    def requestsPerSecond(self):
+        return self.requestsBucket.rate
+    # end requestsPerSecond
+
+    def setLimits(self, bytesPerSecond = None, requestsPerSecond = None):
+        """ change the limits while the uploads run (None: unchanged, 0: no limit) """
+        if bytesPerSecond is not None:
+            self.bytesBucket.setRate(bytesPerSecond)
+        #
+        if requestsPerSecond is not None:
+            self.requestsBucket.setRate(requestsPerSecond)
+        #
+    # end setLimits
+
+    def chain(self):
+        """ this limiter, its parents and GlobalLimiter """
+        limiter = self
+        while limiter is not None:
+            yield limiter
+            if limiter is GlobalLimiter:
+                return
+            #
+            limiter = limiter.parent
+        #
+        yield GlobalLimiter
+    # end chain
+
+    def limited(self):
+        """ whether a byte limit applies (the chunks are then cut to quantum) """
+        return any([limiter.bytesBucket.rate > 0 for limiter in self.chain()])
+    # end limited
+
+    def byteRate(self):
+        """ the lowest byte limit of the chain (0: no limit) """
+        rates = [limiter.bytesBucket.rate for limiter in self.chain() if limiter.bytesBucket.rate > 0]
+        return min(rates) if rates else 0.0
+    # end byteRate
+
+    def reserveBytes(self, nbytes):
+        return max([limiter.bytesBucket.reserve(nbytes) for limiter in self.chain()])
+    # end reserveBytes
+
+    def reserveRequest(self):
+        return max([limiter.requestsBucket.reserve(1) for limiter in self.chain()])
+    # end reserveRequest
+
+    def waitBytes(self, nbytes):
+        """ wait for nbytes to be sent within the limits """
+        delay = self.reserveBytes(nbytes)
+        if delay > 0:
+            time.sleep(delay)
+        #
+    # end waitBytes
+
+    def waitRequest(self):
+        """ wait for a request to be sent within the limits """
+        delay = self.reserveRequest()
+        if delay > 0:
+            time.sleep(delay)
+        #
+    # end waitRequest
+
+    async def waitBytesAsync(self, nbytes):
+        import asyncio
+        delay = self.reserveBytes(nbytes)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        #
+    # end waitBytesAsync
+
+    async def waitRequestAsync(self):
+        import asyncio
+        delay = self.reserveRequest()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        #
+    # end waitRequestAsync
+
+    def throttle(self, body):
+        """ the chunks of body (bytes or an iterable of chunks), cut to quantum and sent within the byte limit """
+        if isinstance(body, (bytes, bytearray)):
+            body = [body]
+        #
+        for chunk in body:
+            if not self.limited():
+                yield chunk
+                continue
+            #
+            view = memoryview(chunk)
+            for start in range(0, len(view), self.quantum):
+                piece = view[start:start + self.quantum]
+                self.waitBytes(len(piece))
+                yield piece
+            #
+        #
+    # end throttle
+
+# end DataverseLimiter
+
+# the limits of the whole process, shared by its jobs; set from DATAVERSE_MAX_RATE (bytes per second)
+# and DATAVERSE_MAX_REQUESTS (requests per second) if defined
+GlobalLimiter = DataverseLimiter()
+try:
+    GlobalLimiter.setLimits(parseRate(os.environ.get("DATAVERSE_MAX_RATE", "")), parseRate(os.environ.get("DATAVERSE_MAX_REQUESTS", "")))
+except ValueError:
+    pass
+# end try
+
+def readLimits(filename):
+    """ the limits of a file of lines "rate = 10M" (bytes per second) and "requests = 5" (per second), as a dict """
+    limits = {}
+    with open(filename, "r", encoding = "utf-8") as fileT:
+        for line in fileT:
+            line = line.split("#", 1)[0].strip()
+            if "=" not in line:
+                continue
+            #
+            name, value = [strT.strip() for strT in line.split("=", 1)]
+            if name == "rate":
+                limits["bytesPerSecond"] = parseRate(value)
+            elif name == "requests":
+                limits["requestsPerSecond"] = parseRate(value)
+            #
+        #
+    #
+    return limits
+# end readLimits
+
+def watchLimits(filename, limiter, interval = 2.0):
+    """ apply the limits of filename (see readLimits) to limiter whenever the file changes, from a daemon thread """
+
+    def watch():
+        stamp = None
+        while True:
+            try:
+                stampT = os.path.getmtime(filename)
+                if stampT != stamp:
+                    stamp = stampT
+                    limiter.setLimits(**readLimits(filename))
+                #
+            except (OSError, ValueError):
+                pass
+            # end try
+            time.sleep(interval)
+        #
+    # end watch
+
+    thread = threading.Thread(target = watch)
+    thread.daemon = True
+    thread.start()
+    return thread
+
+# end watchLimits
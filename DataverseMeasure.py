@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# Measurement files: the '#' header (Date, User, Experiment, Comment, Columns (delimiter = TAB): ...)
+# and the numeric table of the files written by the acquisition platforms (see zinc_oxide.txt),
+# summarized per column (rows, min, max, mean, NaN count) to derive the file and dataset descriptions;
+# the table is loaded by NumPy if installed (whole columns at once), read line by line otherwise;
+# a directory of thousands of files is parsed on a process pool
+
+import sys, os, os.path, time
+import math
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+# end try
+
+# the delimiter names of the Columns line
+Delimiters = {"TAB": "\t", "COMMA": ",", "SEMICOLON": ";", "SPACE": None, "BLANK": None}
+
+# the header bytes read to tell a measurement file (a '#' line first)
+HeaderSize = 1 << 16
+
+# the files parsed in the calling process below this number (a process pool costs more than it saves)
+PoolThreshold = 16
+
+def parseHeader(lines):
+    """ the fields of the header lines (without '#'): "Key: value" lines, the others kept as Title;
+        Columns is split on the delimiter, given in the line as (delimiter = TAB) """
+    header = {"Title": [], "Columns": [], "delimiter": None}
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        #
+        key, sep, value = line.partition(":")
+        key, value = key.strip(), value.strip()
+        if (not sep) or (not key):
+            header["Title"].append(line)
+            continue
+        #
+        if key.startswith("Columns"):
+            delimiter = None
+            if "delimiter" in key:
+                name = key.partition("delimiter")[2].strip(" =()").upper()
+                delimiter = Delimiters.get(name, name or None)
+            #
+            header["delimiter"] = delimiter
+            header["Columns"] = [column.strip() for column in value.split(delimiter)] if value else []
+        else:
+            header[key] = value
+        #
+    #
+    return header
+# end parseHeader
+
+def readHeader(filename):
+    """ the header of a measurement file and the byte offset of its table, or (None, 0) if it is not one
+        (no '#' header with a Columns line) """
+    with open(filename, "rb") as fileT:
+        head = fileT.read(HeaderSize)
+    #
+    if not head.startswith(b"#"):
+        return None, 0
+    #
+    lines = []
+    offset = 0
+    for line in head.splitlines(True):
+        if not line.startswith(b"#"):
+            break
+        #
+        try:
+            lines.append(line.decode("utf-8").lstrip("#"))
+        except UnicodeDecodeError:
+            lines.append(line.decode("latin-1").lstrip("#"))
+        # end try
+        offset += len(line)
+    #
+    header = parseHeader(lines)
+    if not header["Columns"]:
+        return None, 0
+    #
+    return header, offset
+# end readHeader
+
+def summarizeArray(data):
+    """ the rows and the per-column min, max, mean and NaN count of a 2D NumPy array """
+    import warnings
+    nans = numpy.isnan(data).sum(axis = 0)
+    with warnings.catch_warnings():
+        # the columns of NaN only: NaN summaries, without warning
+        warnings.simplefilter("ignore", RuntimeWarning)
+        mins = numpy.nanmin(data, axis = 0)
+        maxs = numpy.nanmax(data, axis = 0)
+        means = numpy.nanmean(data, axis = 0)
+    #
+    return data.shape[0], [(float(mins[ii]), float(maxs[ii]), float(means[ii]), int(nans[ii])) for ii in range(0, data.shape[1])]
+# end summarizeArray
+
+def summarizeLines(fileT, delimiter):
+    """ the rows and the per-column min, max, mean and NaN count of the table lines, read one by one
+        (without NumPy); a field that is not a number counts as NaN """
+    rows = 0
+    stats = []
+    for line in fileT:
+        fields = line.split(delimiter)
+        if (not fields) or (not line.strip()) or line.startswith("#"):
+            continue
+        #
+        rows += 1
+        while len(stats) < len(fields):
+            # min, max, sum, count, NaN
+            stats.append([math.inf, -math.inf, 0.0, 0, rows - 1])
+        #
+        for ii in range(0, len(stats)):
+            try:
+                value = float(fields[ii])
+            except (ValueError, IndexError):
+                value = math.nan
+            # end try
+            stat = stats[ii]
+            if math.isnan(value):
+                stat[4] += 1
+                continue
+            #
+            stat[0] = min(stat[0], value)
+            stat[1] = max(stat[1], value)
+            stat[2] += value
+            stat[3] += 1
+        #
+    #
+    return rows, [(stat[0], stat[1], stat[2] / stat[3], stat[4]) if stat[3] else (math.nan, math.nan, math.nan, stat[4]) for stat in stats]
+# end summarizeLines
+
+def parseMeasurement(filename):
+    """ the header and the per-column summary of a measurement file, as a dict
+        (filename, header, rows, columns: [{name, min, max, mean, nan}]), or None if it is not one """
+
+    try:
+        header, offset = readHeader(filename)
+        if header is None:
+            return None
+        #
+        delimiter = header["delimiter"]
+        with open(filename, "r", encoding = "utf-8", errors = "replace", newline = None) as fileT:
+            fileT.seek(offset)
+            rows = None
+            if numpy is not None:
+                import warnings
+                try:
+                    with warnings.catch_warnings():
+                        # an empty table
+                        warnings.simplefilter("ignore", UserWarning)
+                        data = numpy.loadtxt(fileT, comments = "#", delimiter = delimiter, ndmin = 2, dtype = float)
+                    #
+                    rows, stats = summarizeArray(data)
+                except ValueError:
+                    # rows of different lengths or text fields: read line by line
+                    fileT.seek(offset)
+                # end try
+            #
+            if rows is None:
+                rows, stats = summarizeLines(fileT, delimiter)
+            #
+        #
+    except (OSError, ValueError):
+        return None
+    # end try
+
+    names = header["Columns"]
+    columns = []
+    for ii in range(0, len(stats)):
+        (minimum, maximum, mean, nan) = stats[ii]
+        columns.append({"name": names[ii] if (ii < len(names) and names[ii]) else ("column %d" % (ii + 1)),
+                        "min": None if math.isnan(minimum) else minimum,
+                        "max": None if math.isnan(maximum) else maximum,
+                        "mean": None if math.isnan(mean) else mean,
+                        "nan": nan})
+    #
+    return {"filename": filename, "header": header, "rows": rows, "columns": columns}
+
+# end parseMeasurement
+
+def formatNumber(value):
+    return "-" if value is None else ("%.4g" % value)
+# end formatNumber
+
+def describeMeasurement(measure):
+    """ the description of a measurement file, from its header and column summary """
+    header = measure["header"]
+    strT = ": ".join([header[key] for key in ("Experiment", "Comment") if header.get(key)])
+    who = ", ".join([header[key] for key in ("Date", "User") if header.get(key)])
+    if who:
+        strT += (" (%s)" % who) if strT else who
+    #
+    columns = []
+    for column in measure["columns"]:
+        strC = "%s [%s, %s] mean %s" % (column["name"], formatNumber(column["min"]), formatNumber(column["max"]), formatNumber(column["mean"]))
+        if column["nan"]:
+            strC += ", %d NaN" % column["nan"]
+        #
+        columns.append(strC)
+    #
+    strT += "%s%d rows x %d columns: %s" % (". " if strT else "", measure["rows"], len(columns), "; ".join(columns))
+    return strT
+# end describeMeasurement
+
+def describeMeasurements(measures):
+    """ the description of a dataset of measurement files: experiments, comments, dates, users, files and rows """
+    measures = [measure for measure in measures if measure is not None]
+    if not measures:
+        return ""
+    #
+
+    def unique(key):
+        values = []
+        for measure in measures:
+            value = measure["header"].get(key, "")
+            if value and (value not in values):
+                values.append(value)
+            #
+        #
+        return values
+    # end unique
+
+    strT = "; ".join(unique("Experiment") + unique("Comment"))
+    dates = sorted(unique("Date"))
+    if dates:
+        strT += "%sMeasured %s" % (". " if strT else "", ("on " + dates[0]) if len(dates) == 1 else ("from %s to %s" % (dates[0], dates[-1])))
+        users = unique("User")
+        if users:
+            strT += " by " + ", ".join(users)
+        #
+    #
+    strT += "%s%d measurement file(s), %d rows." % (". " if strT else "", len(measures), sum([measure["rows"] for measure in measures]))
+    return strT
+# end describeMeasurements
+
+def parseMeasurements(filenames, workers = None):
+    """ parseMeasurement of each file, in order, on a pool of workers processes (the CPU count if None)
+        unless there are only a few files """
+    filenames = list(filenames)
+    if (len(filenames) < PoolThreshold) or (workers == 1):
+        return [parseMeasurement(filename) for filename in filenames]
+    #
+    import concurrent.futures
+    workers = workers or os.cpu_count() or 1
+    with concurrent.futures.ProcessPoolExecutor(max_workers = workers) as pool:
+        return list(pool.map(parseMeasurement, filenames, chunksize = max(1, len(filenames) // (4 * workers))))
+    #
+# end parseMeasurements
+
+def describeStream(files, workers = None, groupSize = 256):
+    """ the (filename, description, directoryLabel) of files (such as DataverseEngine.scanFiles), an empty
+        description derived from the file if it is a measurement one; parsed groupSize files at a time on a process pool """
+    import itertools
+    files = iter(files)
+    pool = None
+    try:
+        while True:
+            group = list(itertools.islice(files, groupSize))
+            if not group:
+                break
+            #
+            filenames = [fileT[0] for fileT in group if not fileT[1]]
+            if (pool is None) and (len(filenames) >= PoolThreshold) and (workers != 1):
+                import concurrent.futures
+                pool = concurrent.futures.ProcessPoolExecutor(max_workers = workers or os.cpu_count() or 1)
+            #
+            measures = iter(pool.map(parseMeasurement, filenames, chunksize = 8) if (pool is not None) else map(parseMeasurement, filenames))
+            for fileT in group:
+                measure = next(measures) if (not fileT[1]) else None
+                yield (fileT[0], describeMeasurement(measure) if (measure is not None) else fileT[1], fileT[2])
+            #
+        #
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        #
+    # end try
+# end describeStream
@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# Dataset metadata: the citation block fields built as Python objects from the dataset fields
+# (see DatasetFields in DataverseEngine) and rendered with the json serializer, so that any value
+# (quotes, backslashes, accents) gives a valid document; the parts that do not depend on the dataset
+# (envelope, language, producer) are rendered once and reused for every dataset
+
+import sys, os, time
+import json
+import datetime
+
+def primitive(typeName, value, multiple = False):
+    return {"typeName": typeName, "multiple": multiple, "typeClass": "primitive", "value": value}
+# end primitive
+
+def vocabulary(typeName, value, multiple = False):
+    return {"typeName": typeName, "multiple": multiple, "typeClass": "controlledVocabulary", "value": value}
+# end vocabulary
+
+def compound(typeName, values, multiple = True):
+    return {"typeName": typeName, "multiple": multiple, "typeClass": "compound", "value": values}
+# end compound
+
+# the dataset version, the citation block being inserted in place of the markers
+DatasetEnvelope = {
+    "datasetVersion": {
+        "termsOfUse": "CC0 Waiver",
+        "license": "CC0",
+        "protocol": "doi",
+        "authority": "10.502",
+        "identifier": "CC1/21D1",
+        "metadataBlocks": {
+            "citation": {
+                "fields": ["@FIELDS@"],
+                "displayName": "@DISPLAYNAME@"
+            }
+        }
+    }
+}
+
+# the fields shared by all the datasets
+StaticFields = {
+    "language": vocabulary("language", ["English"], multiple = True),
+    "producer": compound("producer", [{"producerName": primitive("producerName", "Université de Lorraine")}]),
+}
+
+class DataverseMetadata(object):
+    """ the dataset JSON builder """
+
+    def __init__(self, compact = False):
+        """ compact: render without indentation nor spaces (smaller payload), or indented for reading """
+
+        self.compact    = compact
+        # the rendered static parts, by (name, compact)
+        self.rendered   = {}
+
+    # end __init__
+
+    def dumps(self, obj, depth = 0):
+        """ render obj as if nested depth levels deep in an indented document """
+        if self.compact:
+            return json.dumps(obj, ensure_ascii = False, separators = (",", ":"))
+        #
+        # the json strings hold no raw line feed: each one starts a new line of the document
+        return json.dumps(obj, ensure_ascii = False, indent = 4).replace("\n", "\n" + "    " * depth)
+    # end dumps
+
+    def static(self, name, obj, depth = 0):
+        """ the rendering of a static part, done once """
+        key = (name, self.compact)
+        text = self.rendered.get(key)
+        if text is None:
+            text = self.dumps(obj, depth)
+            self.rendered[key] = text
+        #
+        return text
+    # end static
+
+    def authors(self, dataset):
+        """ the author entries: the authors with their affiliation and ORCID identifier """
+        author = dataset.get("author", [])
+        affiliation = dataset.get("affiliation", [])
+        identifier = dataset.get("identifier", [])
+        entries = []
+        for ii in range(0, len(author)):
+            tAffiliation = affiliation[ii] if ii < len(affiliation) else ""
+            tIdentifier = identifier[ii] if ii < len(identifier) else ""
+            if (author[ii] != "") and (tAffiliation != ""):
+                entries.append({
+                    "authorAffiliation": primitive("authorAffiliation", tAffiliation),
+                    "authorName": primitive("authorName", author[ii]),
+                    "authorIdentifierScheme": vocabulary("authorIdentifierScheme", "ORCID"),
+                    "authorIdentifier": primitive("authorIdentifier", tIdentifier)})
+            #
+        #
+        return entries
+    # end authors
+
+    def keywords(self, dataset):
+        return [{"keywordValue": primitive("keywordValue", keyword)} for keyword in dataset.get("keyword", []) if keyword != ""]
+    # end keywords
+
+    def contact(self, dataset):
+        return {"datasetContactName": primitive("datasetContactName", dataset.get("contactname", "")),
+                "datasetContactAffiliation": primitive("datasetContactAffiliation", dataset.get("contactaffiliation", "")),
+                "datasetContactEmail": primitive("datasetContactEmail", dataset.get("contactemail", ""))}
+    # end contact
+
+    def fields(self, dataset, tDate = None):
+        """ the citation fields of the dataset, in the order of the Dataverse form; None marks the static fields """
+
+        if tDate is None:
+            tDate = datetime.datetime.now().strftime("%Y-%m-%d")
+        #
+        return [
+            primitive("title", dataset.get("title", "")),
+            ("language", None),
+            ("producer", None),
+            compound("dsDescription", [{"dsDescriptionValue": primitive("dsDescriptionValue", dataset.get("description", "")),
+                                        "dsDescriptionDate": primitive("dsDescriptionDate", tDate)}]),
+            compound("author", self.authors(dataset)),
+            vocabulary("subject", [dataset.get("subject", "")], multiple = True),
+            compound("publication", [{"publicationCitation": primitive("publicationCitation", dataset.get("publicationCitation", ""))}]),
+            primitive("notesText", dataset.get("notesText", "")),
+            compound("keyword", self.keywords(dataset)),
+            primitive("depositor", dataset.get("contactname", "")),
+            primitive("dateOfDeposit", tDate),
+            compound("datasetContact", [self.contact(dataset)]),
+        ]
+
+    # end fields
+
+    def render(self, dataset, tDate = None):
+        """ the dataset JSON content, ready to POST to the dataverse """
+
+        # depth of the citation fields in the document: datasetVersion, metadataBlocks, citation, fields
+        depth = 5
+        parts = []
+        for field in self.fields(dataset, tDate):
+            if isinstance(field, tuple):
+                parts.append(self.static(field[0], StaticFields[field[0]], depth))
+            else:
+                parts.append(self.dumps(field, depth))
+            #
+        #
+
+        # the envelope, cut once around the markers, so that no dataset value is ever searched for a marker
+        key = ("envelope", self.compact)
+        envelope = self.rendered.get(key)
+        if envelope is None:
+            head, tail = self.dumps(DatasetEnvelope).split("\"@FIELDS@\"")
+            middle, tail = tail.split("\"@DISPLAYNAME@\"")
+            envelope = (head, middle, tail)
+            self.rendered[key] = envelope
+        #
+        separator = "," if self.compact else (",\n" + "    " * depth)
+        JSONcontent = envelope[0] + separator.join(parts) + envelope[1] + self.dumps(dataset.get("displayName", "")) + envelope[2]
+        return JSONcontent if self.compact else (JSONcontent + "\n")
+
+    # end render
+
+    def fileData(self, description, directoryLabel, categories = ("Data",), stored = None):
+        """ the jsonData of a file added to a dataset; stored: the fields of a file already sent to the store of the
+            dataset (storageIdentifier, fileName, mimeType, checksum), only registered """
+        data = {"description": description, "directoryLabel": directoryLabel, "categories": list(categories), "restrict": "false"}
+        if stored:
+            data.update(stored)
+        #
+        return json.dumps(data, ensure_ascii = False, separators = (",", ":"))
+    # end fileData
+
+# end DataverseMetadata
@@ -0,0 +1,251 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# Upload progress: the bytes sent per file and overall, fed by the transport (DataverseMultipart,
+# DataverseZipStream) or by the curl progress meter, with the throughput over the last seconds
+# and the time left; shared by the upload threads, read by the batch and the interface
+
+import sys, os, time
+import threading
+import collections
+
+# the unit suffixes of the curl progress meter (powers of 1024)
+CurlUnits = {"k": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40, "P": 1 << 50}
+
+def parseCurlSize(strT):
+    """ the number of bytes of a curl progress meter field such as 512, 100k or 1234M """
+    strT = strT.strip()
+    if strT and (strT[-1] in CurlUnits):
+        return int(float(strT[:-1]) * CurlUnits[strT[-1]])
+    #
+    return int(strT)
+# end parseCurlSize
+
+def parseCurlMeter(line):
+    """ the bytes uploaded according to a line of the curl progress meter, or None if it is not a meter line:
+        % Total  % Received  % Xferd  Average Dload  Upload  Time Total  Spent  Left  Current Speed """
+    fields = line.split()
+    if (len(fields) < 12) or (not fields[0].isdigit()):
+        return None
+    #
+    try:
+        return parseCurlSize(fields[5])
+    except ValueError:
+        return None
+    # end try
+# end parseCurlMeter
+
+def formatSize(size):
+    """ the size in B, kB, MB or GB """
+    for (unit, value) in (("GB", 1e9), ("MB", 1e6), ("kB", 1e3)):
+        if size >= value:
+            return "%.1f %s" % (size / value, unit)
+        #
+    #
+    return "%d B" % size
+# end formatSize
+
+def formatDuration(seconds):
+    if seconds is None:
+        return "-:--:--"
+    #
+    seconds = int(seconds + 0.5)
+    return "%d:%02d:%02d" % (seconds // 3600, (seconds // 60) % 60, seconds % 60)
+# end formatDuration
+
+class DataverseProgress(object):
+    """ the progress of the uploads of a job """
+
+    def __init__(self, callback = None, interval = 0.5, window = 10.0):
+        """ callback(progress) is called from the upload threads at most every interval seconds;
+            the throughput is averaged over the last window seconds """
+
+        self.callback       = callback
+        self.interval       = interval
+        self.window         = window
+        self.mutex          = threading.Lock()
+
+        self.tic            = time.time()
+        # the files and bytes expected: announced by expect() or counted when their upload begins
+        self.filesTotal     = 0
+        self.bytesTotal     = 0
+        self.expected       = {}
+        # the files ended (accepted, skipped or failed) and their bytes
+        self.filesDone      = 0
+        self.filesFailed    = 0
+        self.bytesDone      = 0
+        # the bytes put on the wire, resent bytes included (for the throughput)
+        self.bytesSent      = 0
+        # the files being sent: filename -> [bytes sent, size, start time]
+        self.current        = {}
+        # (time, bytesSent) samples of the last window seconds
+        self.samples        = collections.deque([(self.tic, 0)])
+        self.reported       = 0.0
+
+    # end __init__
+
+    def expect(self, files):
+        """ announce the files to upload, a list of (filename, ...), for the totals to be known from the start """
+        with self.mutex:
+            for fileT in files:
+                if fileT[0] in self.expected:
+                    continue
+                #
+                try:
+                    size = os.path.getsize(fileT[0])
+                except OSError:
+                    size = 0
+                # end try
+                self.expected[fileT[0]] = size
+                self.filesTotal += 1
+                self.bytesTotal += size
+            #
+        #
+    # end expect
+
+    def begin(self, filename, size = None):
+        """ the upload of filename begins (again if it was locked) """
+        with self.mutex:
+            if filename not in self.expected:
+                if size is None:
+                    try:
+                        size = os.path.getsize(filename)
+                    except OSError:
+                        size = 0
+                    # end try
+                #
+                self.expected[filename] = size
+                self.filesTotal += 1
+                self.bytesTotal += size
+            #
+            self.current[filename] = [0, self.expected[filename], time.time()]
+        #
+    # end begin
+
+    def advance(self, filename, nbytes):
+        """ nbytes more of filename sent """
+        with self.mutex:
+            fileT = self.current.get(filename)
+            if fileT is not None:
+                fileT[0] += nbytes
+            #
+            self.bytesSent += nbytes
+            now = time.time()
+            self.samples.append((now, self.bytesSent))
+            while (len(self.samples) > 2) and ((now - self.samples[1][0]) >= self.window):
+                self.samples.popleft()
+            #
+        #
+        self.report()
+    # end advance
+
+    def report(self):
+        """ call the callback, unless called less than interval seconds ago """
+        if self.callback is None:
+            return
+        #
+        with self.mutex:
+            now = time.time()
+            if (now - self.reported) < self.interval:
+                return
+            #
+            self.reported = now
+        #
+        self.callback(self)
+    # end report
+
+    def sent(self, filename, total):
+        """ total bytes of filename sent so far (the curl progress meter gives totals) """
+        with self.mutex:
+            fileT = self.current.get(filename)
+            nbytes = (total - fileT[0]) if fileT is not None else 0
+        #
+        if nbytes > 0:
+            self.advance(filename, nbytes)
+        #
+    # end sent
+
+    def end(self, filename, status = "OK"):
+        """ filename ended with the status of its result (OK, ERROR or LOCKED: to be sent again) """
+        with self.mutex:
+            self.current.pop(filename, None)
+            if status == "LOCKED":
+                return
+            #
+            # a file skipped without being announced (journal, index) is counted now
+            if filename not in self.expected:
+                self.filesTotal += 1
+            #
+            # forgotten once ended, so that the memory does not grow with a streamed tree
+            self.filesDone += 1
+            self.bytesDone += self.expected.pop(filename, 0)
+            if status != "OK":
+                self.filesFailed += 1
+            #
+        #
+        self.report()
+    # end end
+
+    def rate(self):
+        """ the throughput over the last window seconds, in bytes per second """
+        with self.mutex:
+            (toc, last), (tic, first) = self.samples[-1], self.samples[0]
+            now = time.time()
+        #
+        # no byte for a while: stalled
+        if (now - toc) >= self.window:
+            return 0.0
+        #
+        return (last - first) / max(now - tic, 1e-3)
+    # end rate
+
+    def snapshot(self):
+        """ the progress as a dict: files and bytes done and expected, throughput (bytes/s), ETA (s, None if unknown),
+            stalled, and the files being sent """
+        rate = self.rate()
+        now = time.time()
+        with self.mutex:
+            bytesCurrent = sum([min(fileT[0], fileT[1]) for fileT in self.current.values()])
+            bytesDone = self.bytesDone + bytesCurrent
+            current = [{"filename": filename, "sent": fileT[0], "size": fileT[1], "rate": fileT[0] / max(now - fileT[2], 1e-3)}
+                       for (filename, fileT) in self.current.items()]
+            snapshot = {"filesDone": self.filesDone, "filesFailed": self.filesFailed, "filesTotal": self.filesTotal,
+                        "bytesDone": bytesDone, "bytesTotal": self.bytesTotal, "bytesSent": self.bytesSent,
+                        "elapsed": now - self.tic, "rate": rate, "current": current}
+        #
+        # no estimate before a second of samples
+        left = max(snapshot["bytesTotal"] - bytesDone, 0)
+        if left == 0:
+            snapshot["eta"] = 0.0
+        elif (rate > 0) and (snapshot["elapsed"] >= 1.0):
+            snapshot["eta"] = left / rate
+        else:
+            snapshot["eta"] = None
+        #
+        # nothing sent for window seconds while files are left
+        snapshot["stalled"] = (left > 0) and (rate == 0) and (snapshot["elapsed"] >= self.window)
+        return snapshot
+    # end snapshot
+
+    def format(self, snapshot = None):
+        """ the progress in one line: files, bytes, MB/s and ETA """
+        snapshot = snapshot or self.snapshot()
+        strT = "%d/%d file(s)  %s/%s  %.2f MB/s  ETA %s" % (snapshot["filesDone"], snapshot["filesTotal"],
+            formatSize(snapshot["bytesDone"]), formatSize(snapshot["bytesTotal"]), snapshot["rate"] / 1e6, formatDuration(snapshot["eta"]))
+        if snapshot["filesFailed"]:
+            strT += "  (%d failed)" % snapshot["filesFailed"]
+        #
+        if snapshot["stalled"]:
+            strT += "  stalled"
+        #
+        return strT
+    # end format
+
+# end DataverseProgress
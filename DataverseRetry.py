@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# Server pushback: the retry policy of the requests refused for a while (429, 502, 503, 504, lost
+# connection) with a jittered exponential backoff, and the adaptive number of parallel uploads
+# (additive increase while the server answers quickly, multiplicative decrease when it pushes back),
+# so that an upload job runs as fast as the shared server allows without overloading it
+
+import sys, os, time
+import threading
+import random
+
+# the HTTP statuses of a server busy or unavailable for a while
+RetryStatuses = (429, 502, 503, 504)
+
+def retryAfter(headers):
+    """ the delay asked by the Retry-After header (seconds, or HTTP date), or None """
+    value = None
+    for (name, valueT) in (headers or {}).items():
+        if name.lower() == "retry-after":
+            value = valueT
+            break
+        #
+    #
+    if not value:
+        return None
+    #
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    # end try
+    try:
+        import email.utils
+        return max(email.utils.parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+    # end try
+# end retryAfter
+
+class DataverseRetryPolicy(object):
+    """ how many times and after how long a refused request is sent again """
+
+    def __init__(self, attempts = 5, base = 1.0, cap = 60.0):
+        """ attempts: number of tries of a request (1: no retry); the delay before the try n (from 1)
+            is drawn in [0, min(cap, base * 2^n)] (full jitter), or is the Retry-After of the server """
+        self.attempts   = max(1, int(attempts))
+        self.base       = base
+        self.cap        = cap
+    # end __init__
+
+    def delay(self, attempt, after = None):
+        """ the delay before sending again a request refused attempt times (from 1) """
+        if after is not None:
+            return min(after, self.cap)
+        #
+        return random.uniform(0.0, min(self.cap, self.base * (2 ** attempt)))
+    # end delay
+
+    def isRetryable(self, status = 0, error = None):
+        """ whether a request answered with the HTTP status, or failed with error, can succeed later """
+        if status in RetryStatuses:
+            return True
+        #
+        if error is None:
+            return False
+        #
+        # lost or refused connection, timeout, truncated answer (curl: could not connect, timeout, empty reply, send or receive error)
+        if isinstance(error, (ConnectionError, TimeoutError, EOFError)):
+            return True
+        #
+        returncode = getattr(error, "returncode", None)
+        return returncode in (7, 28, 52, 55, 56)
+    # end isRetryable
+
+# end DataverseRetryPolicy
+
+class DataverseConcurrency(object):
+    """ the number of uploads in flight, adapted to the server (AIMD): one more every limit uploads
+        answered within latencyFactor times the best latency (plus latencySlack seconds, for the jitter of
+        the fast answers), kept while the answers are slower, halved when the server pushes back """
+
+    def __init__(self, initial = 4, minimum = 1, maximum = 32, latencyFactor = 3.0, latencySlack = 0.05, decrease = 0.5):
+
+        self.minimum        = max(1, int(minimum))
+        self.maximum        = max(self.minimum, int(maximum))
+        self.limit          = float(min(max(initial, self.minimum), self.maximum))
+        self.latencyFactor  = latencyFactor
+        self.latencySlack   = latencySlack
+        self.decrease       = decrease
+        self.condition      = threading.Condition()
+        self.inflight       = 0
+        # the best latency seen (seconds), the slow answers being compared to it
+        self.bestLatency    = None
+        # no decrease again before the uploads in flight at the last decrease have ended
+        self.recovering     = 0
+        # (time, limit) at each change, for the reports
+        self.history        = [(time.time(), self.limit)]
+
+    # end __init__
+
+    def acquire(self):
+        """ wait for a slot among the limit uploads in flight """
+        with self.condition:
+            while self.inflight >= int(self.limit):
+                self.condition.wait()
+            #
+            self.inflight += 1
+        #
+    # end acquire
+
+    def release(self, pushback = False, latency = None):
+        """ the upload ended: pushback if the server refused it for a while (429, 503, locked, lost connection);
+            latency: the server time until its answer, in seconds, whatever the file size (None if unknown) """
+        with self.condition:
+            self.inflight -= 1
+            if self.recovering > 0:
+                self.recovering -= 1
+            #
+            if pushback:
+                if self.recovering == 0:
+                    self.setLimit(self.limit * self.decrease)
+                    self.recovering = self.inflight
+                #
+            elif latency is not None:
+                if (self.bestLatency is None) or (latency < self.bestLatency):
+                    self.bestLatency = latency
+                #
+                # answered quickly: one more upload in flight once limit uploads are answered
+                if latency <= ((self.latencyFactor * self.bestLatency) + self.latencySlack):
+                    self.setLimit(self.limit + (1.0 / self.limit))
+                #
+            #
+            self.condition.notify_all()
+        #
+    # end release
+
+    def setLimit(self, limit):
+        limit = min(max(limit, float(self.minimum)), float(self.maximum))
+        if int(limit) != int(self.limit):
+            self.history.append((time.time(), limit))
+        #
+        self.limit = limit
+    # end setLimit
+
+# end DataverseConcurrency
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# Directory scan: the files of an acquisition tree, yielded one by one while os.scandir walks it,
+# so that the upload starts at the first match and the memory does not grow with the tree
+
+import sys, os, os.path
+import fnmatch
+
+def matchPattern(relative, name, patterns):
+    """ True if the file matches one of the glob patterns: on its path relative to the scanned
+        directory ('/' separated) if the pattern holds a '/', on its name otherwise """
+    for pattern in patterns:
+        if fnmatch.fnmatch(relative if ("/" in pattern) else name, pattern):
+            return True
+        #
+    #
+    return False
+# end matchPattern
+
+def scanDirectory(root, include = None, exclude = None, minsize = 0, maxsize = None, followlinks = False):
+    """ yield (path, path relative to root) of the files under root matching include (all if empty),
+        not matching exclude, and whose size is in [minsize, maxsize]; the excluded and unreadable directories are not walked """
+
+    include = list(include or [])
+    exclude = list(exclude or [])
+    minsize = int(minsize or 0)
+    maxsize = int(maxsize) if maxsize else None
+
+    # the directories to walk, as (path, path relative to root)
+    stack = [(root, "")]
+    while stack:
+        directory, relativeDir = stack.pop()
+        try:
+            entries = os.scandir(directory)
+        except OSError as excT:
+            print("\n! cannot scan the directory '%s':\n  %s\n" % (directory, str(excT)))
+            continue
+        # end try
+        subdirs = []
+        with entries:
+            for entry in entries:
+                relative = (relativeDir + "/" + entry.name) if relativeDir else entry.name
+                try:
+                    if entry.is_dir(follow_symlinks = followlinks):
+                        if not (exclude and matchPattern(relative, entry.name, exclude)):
+                            subdirs.append((entry.path, relative))
+                        #
+                        continue
+                    #
+                    if not entry.is_file():
+                        continue
+                    #
+                    if include and (not matchPattern(relative, entry.name, include)):
+                        continue
+                    #
+                    if exclude and matchPattern(relative, entry.name, exclude):
+                        continue
+                    #
+                    if minsize or maxsize:
+                        size = entry.stat().st_size
+                        if (size < minsize) or ((maxsize is not None) and (size > maxsize)):
+                            continue
+                        #
+                    #
+                except OSError:
+                    # removed or unreadable meanwhile
+                    continue
+                # end try
+                yield entry.path, relative
+            #
+        #
+        # the subdirectories in name order, the first one walked next
+        subdirs.sort(reverse = True)
+        stack.extend(subdirs)
+    #
+
+# end scanDirectory
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# Request timings: the phases of every HTTP request (DNS, connect, TLS, upload, server until the
+# first response byte, download, total, in seconds) with the operation, file size and HTTP status,
+# appended to a JSON lines or CSV file, to tell a slow uplink from a slow Dataverse or storage;
+# a phase is null (empty in CSV) if not measured, such as DNS, connect and TLS on a reused connection
+
+import sys, os, os.path, time
+import threading
+import json
+
+# the columns of a timing record
+TimingFields = ["time", "operation", "url", "filename", "size", "status", "reused",
+                "dns", "connect", "tls", "upload", "server", "download", "total"]
+
+# the phases, as measured by the transports (see DataverseResponse.timing)
+TimingPhases = ["dns", "connect", "tls", "upload", "server", "download", "total"]
+
+class DataverseTimings(object):
+    """ the on-disk timing records of an upload job """
+
+    def __init__(self, filename, format = None):
+        """ format: "jsonl" or "csv"; guessed from the file extension if None (.csv, JSON lines otherwise) """
+
+        self.filename   = filename
+        self.format     = format or ("csv" if filename.lower().endswith(".csv") else "jsonl")
+        self.mutex      = threading.Lock()
+
+        dirname = os.path.dirname(os.path.abspath(self.filename))
+        if not os.path.isdir(dirname):
+            os.makedirs(dirname)
+        #
+        self.fileT = open(self.filename, "a", encoding = "utf-8", newline = "")
+        self.writer = None
+        if self.format == "csv":
+            import csv
+            self.writer = csv.DictWriter(self.fileT, fieldnames = TimingFields, extrasaction = "ignore")
+            # a new file: the header first
+            if self.fileT.tell() == 0:
+                self.writer.writeheader()
+            #
+        #
+
+    # end __init__
+
+    def record(self, operation, url, filename = "", size = 0, status = 0, timing = None):
+        """ append the record of a request; timing is the dict of the phases (DataverseResponse.timing) """
+
+        timing = timing or {}
+        entry = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "operation": operation, "url": url,
+                 "filename": filename, "size": size, "status": status, "reused": timing.get("reused")}
+        for phase in TimingPhases:
+            value = timing.get(phase)
+            entry[phase] = round(value, 6) if (value is not None) else None
+        #
+        with self.mutex:
+            if self.fileT is None:
+                return entry
+            #
+            if self.writer is not None:
+                self.writer.writerow(entry)
+            else:
+                self.fileT.write(json.dumps(entry) + "\n")
+            #
+            self.fileT.flush()
+        #
+        return entry
+
+    # end record
+
+    def close(self):
+        with self.mutex:
+            if self.fileT is not None:
+                self.fileT.close()
+                self.fileT = None
+            #
+        #
+    # end close
+
+# end DataverseTimings
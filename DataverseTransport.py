@@ -0,0 +1,670 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# HTTP transport: one pool of keep-alive connections per server, shared by the whole process,
+# so that the TCP and TLS handshakes are paid once and not for every uploaded file
+# (ssl, http.client, urllib.request, zipfile... are imported on first use: a curl or dry run job does not load them);
+# each response carries the timing of its phases (see DataverseTiming); the files are hashed in the same read
+# that feeds the socket, the checksum being compared with the one the server returns (no second read of the file)
+
+import sys, os, time
+import threading
+import json
+import urllib.parse
+import hashlib
+from DataverseLimit import GlobalLimiter
+
+SessionsMutex = threading.Lock()
+Sessions = {}
+
+# the Dataverse checksum types and their hashlib names
+ChecksumAlgorithms = {"MD5": "md5", "SHA-1": "sha1", "SHA-256": "sha256", "SHA-512": "sha512"}
+
+def newHash(algorithm):
+    """ the hashlib object of the Dataverse checksum type (MD5 if unknown) """
+    return hashlib.new(ChecksumAlgorithms.get(algorithm, "md5"))
+# end newHash
+
+def hashFile(path, algorithm = "MD5", chunksize = 1 << 20):
+    """ the hex checksum of the file """
+    hashT = newHash(algorithm)
+    with open(path, 'rb') as fileT:
+        chunk = fileT.read(chunksize)
+        while chunk:
+            hashT.update(chunk)
+            chunk = fileT.read(chunksize)
+        #
+    #
+    return hashT.hexdigest()
+# end hashFile
+
+def fileChecksum(fileT):
+    """ the (checksum type, checksum) of a file entry of a Dataverse response, (None, None) if not given """
+    dataFile = fileT.get("dataFile") or {}
+    checksum = dataFile.get("checksum") or {}
+    algorithm, value = checksum.get("type"), checksum.get("value")
+    if (not value) and dataFile.get("md5"):
+        algorithm, value = "MD5", dataFile["md5"]
+    #
+    return algorithm, value
+# end fileChecksum
+
+def getProxy(scheme, host):
+    """ the proxy of the server (urlsplit) according to the http_proxy/https_proxy/no_proxy environment variables, or None """
+    import urllib.request
+    proxies = urllib.request.getproxies()
+    if (scheme in proxies) and (not urllib.request.proxy_bypass(host)):
+        return urllib.parse.urlsplit(proxies[scheme])
+    #
+    return None
+# end getProxy
+
+class DataverseResponse(object):
+    """ the server response: status, headers and body, and the timing of the request phases in seconds
+        (dns, connect, tls, upload, server, download, total; reused: on a kept-alive connection);
+        digest: the (path, checksum type, checksum) of the file sent, computed while it was read, if asked """
+
+    def __init__(self, status, reason, headers, content, timing = None):
+        self.status     = status
+        self.reason     = reason
+        self.headers    = headers
+        self.content    = content
+        self.timing     = timing if (timing is not None) else {}
+        self.digest     = None
+    # end __init__
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', 'replace')
+    # end text
+
+    def json(self):
+        return json.loads(self.text)
+    # end json
+
+# end DataverseResponse
+
+# the connection classes timing their phases, by scheme (see timedConnectionClass)
+TimedConnections = {}
+
+def timedConnectionClass(scheme):
+    """ the http.client connection class of the scheme whose connect() times its phases in the dict
+        of its timing attribute: DNS resolution, TCP connection (and proxy tunnel), TLS handshake;
+        defined on first use, http.client being imported then """
+
+    cls = TimedConnections.get(scheme)
+    if cls is not None:
+        return cls
+    #
+
+    import socket
+    import http.client
+
+    class TimedHTTPConnection(http.client.HTTPConnection):
+        """ the address resolved apart, then connected to without resolving it again """
+
+        timing = None
+
+        def connect(self):
+            timing = self.timing if (self.timing is not None) else {}
+            tic = time.perf_counter()
+            addresses = socket.getaddrinfo(self.host, self.port, 0, socket.SOCK_STREAM)
+            timing["dns"] = time.perf_counter() - tic
+            host = self.host
+            tic = time.perf_counter()
+            try:
+                for (ii, (family, socktype, proto, canonname, sockaddr)) in enumerate(addresses):
+                    self.host = sockaddr[0]
+                    try:
+                        super().connect()
+                        break
+                    except OSError:
+                        if ii == (len(addresses) - 1):
+                            raise
+                        #
+                    # end try
+                #
+            finally:
+                # the name, for the Host header and the TLS server name
+                self.host = host
+            # end try
+            timing["connect"] = time.perf_counter() - tic
+        # end connect
+
+    # end TimedHTTPConnection
+
+    class TimedHTTPSConnection(http.client.HTTPSConnection, TimedHTTPConnection):
+        """ the TLS handshake timed after the TCP connection of TimedHTTPConnection (next in the method order) """
+
+        def connect(self):
+            timing = self.timing if (self.timing is not None) else {}
+            self.timing = timing
+            tic = time.perf_counter()
+            super().connect()
+            timing["tls"] = max(time.perf_counter() - tic - timing.get("dns", 0.0) - timing.get("connect", 0.0), 0.0)
+        # end connect
+
+    # end TimedHTTPSConnection
+
+    TimedConnections.update({"http": TimedHTTPConnection, "https": TimedHTTPSConnection})
+    return TimedConnections[scheme]
+
+# end timedConnectionClass
+
+class DataverseSession(object):
+    """ a pool of keep-alive connections to one server (scheme, host, port) """
+
+    def __init__(self, scheme, host, port, poolsize = 8, timeout = 600):
+
+        self.scheme     = scheme
+        self.host       = host
+        self.port       = port
+        self.poolsize   = poolsize
+        self.timeout    = timeout
+        self.context    = None
+        if scheme == "https":
+            import ssl
+            self.context = ssl.create_default_context()
+        #
+        self.mutex      = threading.Lock()
+        self.idle       = []
+        self.warming    = None
+
+        # honour the http_proxy/https_proxy/no_proxy environment variables
+        self.proxy      = getProxy(scheme, host)
+
+    # end __init__
+
+    def newConnection(self):
+        """ a new connection, timing its phases in its timing attribute once connected """
+        connection = timedConnectionClass(self.scheme)
+        if self.proxy is not None:
+            proxyPort = self.proxy.port or (443 if self.proxy.scheme == "https" else 80)
+            if self.scheme == "https":
+                conn = connection(self.proxy.hostname, proxyPort, timeout = self.timeout, context = self.context)
+                conn.set_tunnel(self.host, self.port)
+            else:
+                conn = connection(self.proxy.hostname, proxyPort, timeout = self.timeout)
+            #
+        elif self.scheme == "https":
+            conn = connection(self.host, self.port, timeout = self.timeout, context = self.context)
+        else:
+            conn = connection(self.host, self.port, timeout = self.timeout)
+        # end if
+        return conn
+    # end newConnection
+
+    def getConnection(self):
+        """ an idle connection if any, or a new one; the bool tells whether it was reused """
+        with self.mutex:
+            if self.idle:
+                return self.idle.pop(), True
+            #
+        #
+        return self.newConnection(), False
+    # end getConnection
+
+    def releaseConnection(self, conn):
+        with self.mutex:
+            if len(self.idle) < self.poolsize:
+                self.idle.append(conn)
+                return
+            #
+        #
+        conn.close()
+    # end releaseConnection
+
+    def request(self, method, url, body = None, headers = None, limiter = None):
+        """ send the request on a pooled connection and read the whole response,
+            within the requests and bytes per second of limiter (DataverseLimiter, GlobalLimiter if None) """
+
+        import http.client
+
+        urlT = urllib.parse.urlsplit(url)
+        path = urlT.path or "/"
+        if urlT.query:
+            path += "?" + urlT.query
+        #
+        if (self.proxy is not None) and (self.scheme == "http"):
+            path = url
+        #
+
+        headersT = {"Connection": "keep-alive"}
+        if headers:
+            headersT.update(headers)
+        #
+        limiter = limiter if (limiter is not None) else GlobalLimiter
+        limiter.waitRequest()
+
+        while True:
+            start = time.perf_counter()
+            conn, reused = self.getConnection()
+            timing = {"reused": reused}
+            try:
+                if not reused:
+                    conn.timing = timing
+                    conn.connect()
+                #
+                tic = time.perf_counter()
+                if (body is not None) and limiter.limited():
+                    if isinstance(body, bytes):
+                        headersT.setdefault("Content-Length", str(len(body)))
+                    #
+                    conn.request(method, path, body = limiter.throttle(body), headers = headersT)
+                else:
+                    conn.request(method, path, body = body, headers = headersT)
+                #
+                timing["upload"] = time.perf_counter() - tic
+                tic = time.perf_counter()
+                response = conn.getresponse()
+                timing["server"] = time.perf_counter() - tic
+                tic = time.perf_counter()
+                content = response.read()
+                timing["download"] = time.perf_counter() - tic
+                timing["total"] = time.perf_counter() - start
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError, http.client.BadStatusLine) as excT:
+                conn.close()
+                # the server closed the idle connection meanwhile: retry once on a fresh one
+                if reused:
+                    continue
+                #
+                raise
+            except Exception:
+                conn.close()
+                raise
+            # end try
+            if response.will_close:
+                conn.close()
+            else:
+                self.releaseConnection(conn)
+            #
+            return DataverseResponse(response.status, response.reason, dict(response.getheaders()), content, timing)
+        #
+
+    # end request
+
+    def warmup(self, path = "/api/info/version"):
+        """ open a connection (TCP and TLS handshakes) in the background, ready for the first upload """
+
+        def warm():
+            try:
+                self.request("GET", "%s://%s:%d%s" % (self.scheme, self.host, self.port, path))
+            except Exception:
+                pass
+            # end try
+        # end warm
+
+        if (self.warming is None) or (not self.warming.is_alive()):
+            self.warming = threading.Thread(target = warm)
+            self.warming.daemon = True
+            self.warming.start()
+        #
+        return self.warming
+
+    # end warmup
+
+    def close(self):
+        with self.mutex:
+            idle, self.idle = self.idle, []
+        #
+        for conn in idle:
+            conn.close()
+        #
+    # end close
+
+# end DataverseSession
+
+def getSession(url):
+    """ the shared session of the server hosting url """
+
+    urlT = urllib.parse.urlsplit(url)
+    scheme = urlT.scheme.lower() or "https"
+    port = urlT.port or (443 if scheme == "https" else 80)
+    key = (scheme, urlT.hostname, port)
+    with SessionsMutex:
+        session = Sessions.get(key)
+        if session is None:
+            session = DataverseSession(scheme, urlT.hostname, port)
+            Sessions[key] = session
+        #
+    #
+    return session
+
+# end getSession
+
+def warmupSessions(urls):
+    """ warm the sessions of the servers in the background """
+    servers = []
+    for url in urls:
+        session = getSession(url)
+        if session not in servers:
+            servers.append(session)
+            session.warmup()
+        #
+    #
+    return servers
+# end warmupSessions
+
+def closeSessions():
+    with SessionsMutex:
+        sessions = list(Sessions.values())
+        Sessions.clear()
+    #
+    for session in sessions:
+        session.close()
+    #
+# end closeSessions
+
+class DataverseMultipart(object):
+    """ a multipart/form-data body streamed from disk: the files are read in chunks of chunksize bytes
+        while they are sent, so that the memory used does not depend on the files size;
+        fields is a list of (name, value) and files a list of (name, filename, source), source being
+        the file path or an iterable of chunks (DataverseZipStream): the length is then unknown (None)
+        and the body is sent with the chunked transfer encoding; progress(path, nbytes) is called as the
+        file bytes are sent (see DataverseProgress); checksum: the checksum type (MD5, SHA-1...) of the files
+        computed as they are read, in digests (path -> hex checksum) once the body is sent """
+
+    def __init__(self, fields, files, chunksize = 1 << 20, progress = None, checksum = None):
+
+        import uuid
+        import mimetypes
+
+        self.boundary       = uuid.uuid4().hex
+        self.contentType    = "multipart/form-data; boundary=%s" % self.boundary
+        self.chunksize      = chunksize
+        self.progress       = progress
+        self.checksum       = checksum
+        self.digests        = {}
+
+        # the parts, as (bytes before the file, path of the file or None)
+        self.parts = []
+        head = b""
+        for (name, value) in fields:
+            head += ("--%s\r\nContent-Disposition: form-data; name=\"%s\"\r\n\r\n" % (self.boundary, name)).encode('utf-8')
+            head += (value.encode('utf-8') if not isinstance(value, bytes) else value) + b"\r\n"
+        #
+        for (name, filename, path) in files:
+            contentType = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+            head += ("--%s\r\nContent-Disposition: form-data; name=\"%s\"; filename=\"%s\"\r\nContent-Type: %s\r\n\r\n" % (self.boundary, name, filename.replace("\"", "%22"), contentType)).encode('utf-8')
+            self.parts.append((head, path))
+            head = b"\r\n"
+        #
+        self.tail = head + ("--%s--\r\n" % self.boundary).encode('utf-8')
+
+        self.length = len(self.tail)
+        for (head, path) in self.parts:
+            if not isinstance(path, str):
+                self.length = None
+                break
+            #
+            self.length += len(head) + os.path.getsize(path)
+        #
+
+    # end __init__
+
+    def __len__(self):
+        return self.length
+    # end __len__
+
+    def __iter__(self):
+        """ the body chunks; iterating again reads the files again (to resend the request) """
+        self.digests = {}
+        for (head, path) in self.parts:
+            if not isinstance(path, str):
+                yield head
+                for chunk in path:
+                    yield chunk
+                #
+                continue
+            #
+            hashT = newHash(self.checksum) if self.checksum else None
+            with open(path, 'rb') as fileT:
+                # the part header goes with the first chunk
+                chunk = head + fileT.read(max(self.chunksize - len(head), 1))
+                nbytes = len(chunk) - len(head)
+                while chunk:
+                    if hashT is not None:
+                        hashT.update(memoryview(chunk)[len(chunk) - nbytes:])
+                    #
+                    yield chunk
+                    # resumed once the chunk is sent
+                    if self.progress is not None:
+                        self.progress(path, nbytes)
+                    #
+                    chunk = fileT.read(self.chunksize)
+                    nbytes = len(chunk)
+                #
+            #
+            if hashT is not None:
+                self.digests[path] = hashT.hexdigest()
+            #
+        #
+        yield self.tail
+    # end __iter__
+
+# end DataverseMultipart
+
+class DataverseFileRange(object):
+    """ the length bytes of a file from offset, streamed from disk as a request body (such as a part of a direct
+        upload to the object store); progress(path, nbytes) is called as they are sent; checksum: the checksum
+        type of the bytes computed as they are read, in digest once the body is sent; feed(offset, chunk) is
+        called with each chunk read and its offset in the file (such as DataverseOrderedHash.feed) """
+
+    def __init__(self, path, offset = 0, length = None, chunksize = 1 << 20, progress = None, checksum = None, feed = None):
+        self.path           = path
+        self.offset         = offset
+        self.length         = (os.path.getsize(path) - offset) if (length is None) else length
+        self.chunksize      = chunksize
+        self.progress       = progress
+        self.checksum       = checksum
+        self.feed           = feed
+        self.digest         = None
+    # end __init__
+
+    def __len__(self):
+        return self.length
+    # end __len__
+
+    def __iter__(self):
+        """ the chunks; iterating again reads the range again (to resend the request) """
+        hashT = newHash(self.checksum) if self.checksum else None
+        self.digest = None
+        with open(self.path, 'rb') as fileT:
+            fileT.seek(self.offset)
+            left = self.length
+            while left > 0:
+                chunk = fileT.read(min(self.chunksize, left))
+                if not chunk:
+                    raise EOFError("%s: %d bytes missing (file truncated while sent)" % (self.path, left))
+                #
+                if hashT is not None:
+                    hashT.update(chunk)
+                #
+                if self.feed is not None:
+                    self.feed(self.offset + self.length - left, chunk)
+                #
+                yield chunk
+                if self.progress is not None:
+                    self.progress(self.path, len(chunk))
+                #
+                left -= len(chunk)
+            #
+        #
+        if hashT is not None:
+            self.digest = hashT.hexdigest()
+        #
+    # end __iter__
+
+# end DataverseFileRange
+
+class DataverseOrderedHash(object):
+    """ the checksum of a file whose ranges are sent in parallel (the parts of a direct upload), from the chunks
+        read to be sent: hashed at once when they come in the file order, kept (up to budget bytes) when they come
+        ahead; the ranges neither hashed nor kept (parts larger than the budget) are read again by digest """
+
+    def __init__(self, path, size, algorithm = "MD5", budget = 64 << 20, chunksize = 1 << 20):
+        self.path           = path
+        self.size           = size
+        self.budget         = budget
+        self.chunksize      = chunksize
+        self.hashT          = newHash(algorithm)
+        self.mutex          = threading.Lock()
+        # the bytes hashed, from the start of the file
+        self.position       = 0
+        # offset -> chunk, ahead of position
+        self.kept           = {}
+        self.keptSize       = 0
+        # the bytes read again by digest
+        self.reread         = 0
+    # end __init__
+
+    def feed(self, offset, chunk):
+        """ the chunk at offset in the file, read to be sent (again if the request is sent again) """
+        with self.mutex:
+            if (offset + len(chunk)) <= self.position:
+                return
+            #
+            if offset <= self.position:
+                self.hashT.update(memoryview(chunk)[self.position - offset:])
+                self.position = offset + len(chunk)
+                # the kept chunks now in order
+                while self.position in self.kept:
+                    chunk = self.kept.pop(self.position)
+                    self.keptSize -= len(chunk)
+                    self.hashT.update(chunk)
+                    self.position += len(chunk)
+                #
+            elif (offset not in self.kept) and ((self.keptSize + len(chunk)) <= self.budget):
+                self.kept[offset] = chunk
+                self.keptSize += len(chunk)
+            #
+        #
+    # end feed
+
+    def digest(self):
+        """ the checksum, once all the ranges are sent: the ranges not fed in order nor kept are read again """
+        with self.mutex:
+            with open(self.path, "rb") as fileT:
+                while self.position < self.size:
+                    chunk = self.kept.pop(self.position, None)
+                    if chunk is None:
+                        # up to the next chunk kept
+                        end = min([offset for offset in self.kept if offset > self.position] + [self.size])
+                        fileT.seek(self.position)
+                        chunk = fileT.read(min(self.chunksize, end - self.position))
+                        if not chunk:
+                            raise EOFError("%s: %d bytes missing (file truncated while sent)" % (self.path, self.size - self.position))
+                        #
+                        self.reread += len(chunk)
+                    #
+                    self.hashT.update(chunk)
+                    self.position += len(chunk)
+                #
+            #
+            self.kept, self.keptSize = {}, 0
+            return self.hashT.hexdigest()
+        #
+    # end digest
+
+# end DataverseOrderedHash
+
+class DataverseZipBuffer(object):
+    """ the write-only, non-seekable file where zipfile writes the archive; the bytes are taken out with drain() """
+
+    def __init__(self):
+        self.chunks     = []
+        self.position   = 0
+    # end __init__
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+    # end write
+
+    def tell(self):
+        return self.position
+    # end tell
+
+    def flush(self):
+        pass
+    # end flush
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+    # end drain
+
+# end DataverseZipBuffer
+
+class DataverseZipStream(object):
+    """ a zip archive of files, generated while it is sent, without temporary archive on disk;
+        files is a list of (path, name in the archive) """
+
+    def __init__(self, files, compression = None, chunksize = 1 << 20, progress = None, checksum = None):
+        """ compression: zipfile.ZIP_DEFLATED if None; progress(path, nbytes) is called as the files
+            are read into the archive; checksum: the checksum type of the files computed as they are read,
+            in digests (name in the archive -> hex checksum) """
+        import zipfile
+        self.files          = files
+        self.compression    = zipfile.ZIP_DEFLATED if compression is None else compression
+        self.chunksize      = chunksize
+        self.progress       = progress
+        self.checksum       = checksum
+        self.digests        = {}
+    # end __init__
+
+    def __iter__(self):
+        import zipfile
+        buffer = DataverseZipBuffer()
+        self.digests = {}
+        with zipfile.ZipFile(buffer, "w", self.compression) as archive:
+            for (path, arcname) in self.files:
+                hashT = newHash(self.checksum) if self.checksum else None
+                stat = os.stat(path)
+                info = zipfile.ZipInfo(arcname, time.localtime(stat.st_mtime)[0:6])
+                info.compress_type = self.compression
+                # the size is known beforehand, for zipfile to choose the ZIP64 extensions if needed
+                info.file_size = stat.st_size
+                with open(path, 'rb') as fileT, archive.open(info, "w") as zipT:
+                    chunk = fileT.read(self.chunksize)
+                    while chunk:
+                        if hashT is not None:
+                            hashT.update(chunk)
+                        #
+                        zipT.write(chunk)
+                        data = buffer.drain()
+                        if data:
+                            yield data
+                        #
+                        if self.progress is not None:
+                            self.progress(path, len(chunk))
+                        #
+                        chunk = fileT.read(self.chunksize)
+                    #
+                #
+                if hashT is not None:
+                    self.digests[arcname] = hashT.hexdigest()
+                #
+                data = buffer.drain()
+                if data:
+                    yield data
+                #
+            #
+        #
+        # the central directory
+        data = buffer.drain()
+        if data:
+            yield data
+        #
+    # end __iter__
+
+# end DataverseZipStream
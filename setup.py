@@ -20,9 +20,13 @@ setup(
     long_description_content_type='text/markdown',
     author='Pr. Sidi Hamady',
     url='https://gitlab.univ-lorraine.fr/hamady/dataverse-utility',
-    install_requires=['requests', 'tkinter'],
+    install_requires=['tkinter'],
+    extras_require={'numpy': ['numpy']},
     download_url='https://gitlab.univ-lorraine.fr/hamady/dataverse-utility.git',
-    py_modules=["DataverseUtility"],
+    py_modules=["DataverseCore", "DataverseEngine", "DataverseMetadata", "DataverseTransport", "DataverseAsync", "DataverseJournal", "DataverseIndex", "DataverseScan", "DataverseCache", "DataverseProgress", "DataverseTiming", "DataverseRetry", "DataverseLimit", "DataverseMeasure", "DataverseCompress", "DataverseBatch", "DataverseGUI", "DataverseBenchmark"],
+    entry_points={
+        'console_scripts': ['dataverse-batch=DataverseBatch:main'],
+    },
     data_files=[
         ('.', ['iconmain.png']),
     ],
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# The fixtures of the tests: the Dataverse stand-in of DataverseBenchmark served from a thread,
+# and the engines pointed at it
+#   python -m pytest -q
+
+import sys, os, os.path, time
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from DataverseBenchmark import makeMockHandler
+from DataverseEngine import DataverseEngine
+
+@pytest.fixture
+def mockServer():
+    """ startServer(**options) starts a stand-in (makeMockHandler options, no latency nor bandwidth limit by default)
+        and returns its base URL; the stand-ins are stopped at the end of the test """
+
+    import http.server
+
+    servers = []
+
+    def startServer(latency = 0, bandwidth = 0, **options):
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), makeMockHandler(latency, bandwidth, **options))
+        server.daemon_threads = True
+        thread = threading.Thread(target = server.serve_forever, kwargs = {"poll_interval": 0.05})
+        thread.daemon = True
+        thread.start()
+        servers.append(server)
+        return "http://127.0.0.1:%d" % server.server_address[1]
+    # end startServer
+
+    yield startServer
+
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+    #
+# end mockServer
+
+@pytest.fixture
+def makeEngine(mockServer):
+    """ makeEngine(engineClass, **options) the engine (DataverseEngine by default) of a new stand-in started with options,
+        retrying at once """
+
+    def make(engineClass = DataverseEngine, **options):
+        url = mockServer(**options)
+        engine = engineClass()
+        engine.DATAVERSE_KEY = "key"
+        engine.DATAVERSE_SERVER = url + "/api/dataverses/test/datasets"
+        engine.DATASET_SERVER = url + "/api/datasets"
+        engine.retry.base = 0.001
+        engine.lockTimeout = 5
+        return engine
+    # end make
+
+    return make
+# end makeEngine
+
+@pytest.fixture
+def makeFile(tmp_path):
+    """ makeFile(name, content) writes the file under the test directory and returns its path """
+
+    def make(name, content = b"x"):
+        path = tmp_path / name
+        path.parent.mkdir(parents = True, exist_ok = True)
+        path.write_bytes(content if isinstance(content, bytes) else content.encode("utf-8"))
+        return str(path)
+    # end make
+
+    return make
+# end makeFile
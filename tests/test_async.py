@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# The asyncio engine: several datasets populated concurrently, and its client reading the answers
+# without body on a kept-alive connection without waiting for the server to close it
+
+import sys, os, os.path, time
+import asyncio
+import json
+
+import pytest
+from DataverseAsync import AsyncDataverseEngine, AsyncDataverseSession
+import DataverseBatch
+
+# the canned answers of the server, by path
+Answers = {
+    "/nocontent": b"HTTP/1.1 204 No Content\r\n\r\n",
+    "/notmodified": b"HTTP/1.1 304 Not Modified\r\nETag: \"v1\"\r\n\r\n",
+    "/head": b"HTTP/1.1 200 OK\r\nContent-Length: 1000\r\n\r\n",
+    "/nolength": b"HTTP/1.1 200 OK\r\n\r\n",
+    "/json": b"HTTP/1.1 200 OK\r\nContent-Length: 15\r\n\r\n{\"status\":\"OK\"}",
+    "/close": b"HTTP/1.1 200 OK\r\nConnection: close\r\n\r\nuntil the end",
+}
+
+async def serve(reader, writer):
+    """ the canned answer of each request, the connection kept open unless the answer closes it """
+    while True:
+        requestLine = await reader.readline()
+        if not requestLine:
+            break
+        #
+        while (await reader.readline()) not in (b"\r\n", b""):
+            pass
+        #
+        path = requestLine.split()[1].decode("ascii")
+        writer.write(Answers[path])
+        await writer.drain()
+        if path == "/close":
+            break
+        #
+    #
+    writer.close()
+# end serve
+
+def testBodiless():
+    async def run():
+        server = await asyncio.start_server(serve, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        session = AsyncDataverseSession("http", "127.0.0.1", port, timeout = 5)
+        url = "http://127.0.0.1:%d" % port
+        responses = []
+        tic = time.perf_counter()
+        for (method, path) in (("DELETE", "/nocontent"), ("GET", "/notmodified"), ("HEAD", "/head"), ("GET", "/nolength"), ("GET", "/json")):
+            responses.append(await session.request(method, url + path))
+        #
+        elapsed = time.perf_counter() - tic
+        closing = await session.request("GET", url + "/close")
+        session.close()
+        server.close()
+        await server.wait_closed()
+        return responses, closing, elapsed
+    # end run
+
+    responses, closing, elapsed = asyncio.run(run())
+    assert [response.status for response in responses] == [204, 304, 200, 200, 200]
+    assert [response.content for response in responses] == [b"", b"", b"", b"", b"{\"status\":\"OK\"}"]
+    # all on the connection opened by the first one, none waiting for the timeout
+    assert [response.timing["reused"] for response in responses] == [False, True, True, True, True]
+    assert elapsed < 2.0
+    assert closing.content == b"until the end"
+# end testBodiless
+
+def testDatasets(makeEngine, makeFile):
+    engine = makeEngine(AsyncDataverseEngine)
+    engine.concurrency = 4
+    datasets = [{"title": "Sample %d" % ii, "DataFilename": [makeFile("s%d/%s.txt" % (ii, name), name) for name in ("a", "b", "c")]}
+                for ii in range(0, 5)]
+    results = asyncio.run(engine.runDatasets(datasets))
+    assert [result["title"] for result in results] == ["Sample %d" % ii for ii in range(0, 5)]
+    assert all([result["status"] == "OK" for result in results])
+    assert len(set([result["persistentId"] for result in results])) == 5
+    for result in results:
+        assert sorted([entry["label"] for entry in engine.listDatasetFiles(result["persistentId"])]) == ["a.txt", "b.txt", "c.txt"]
+    #
+# end testDatasets
+
+def testProxyRefused(makeFile, tmp_path, monkeypatch):
+    """ the asyncio engine does not go through proxies: refused, rather than bypassing the proxy """
+    for name in ("no_proxy", "NO_PROXY", "https_proxy", "HTTPS_PROXY"):
+        monkeypatch.delenv(name, raising = False)
+    #
+    monkeypatch.setenv("https_proxy", "http://proxy.example.org:3128")
+    engine = AsyncDataverseEngine()
+    engine.DATAVERSE_SERVER = "https://dataverse.example.org/api/dataverses/test/datasets"
+    engine.DATASET_SERVER = "https://dataverse.example.org/api/datasets"
+    assert engine.proxies() == ["dataverse.example.org"]
+    with pytest.raises(ValueError):
+        engine.getSession(engine.DATASET_SERVER)
+    #
+    manifest = tmp_path / "campaign.json"
+    manifest.write_text(json.dumps({"datasets": [{"dataset": "S1", "title": "Sample", "DataFilename": [makeFile("a.txt")]}]}), encoding = "utf-8")
+    assert DataverseBatch.main([str(manifest), "--asyncio", "--key", "key", "--dataverse-server", engine.DATAVERSE_SERVER,
+                                "--dataset-server", engine.DATASET_SERVER, "--no-journal"]) == 2
+    # excluded by no_proxy: connected straight
+    monkeypatch.setenv("no_proxy", "dataverse.example.org")
+    assert engine.proxies() == []
+# end testProxyRefused
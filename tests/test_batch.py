@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# The headless engine and the batch tool: the manifests (JSON, TOML, CSV) read alike, the datasets
+# created and populated without the GUI, the dry run sending nothing, and the exit status
+
+import sys, os, os.path, time
+import json
+
+from DataverseBatch import readManifest, main
+
+def writeManifests(tmp_path):
+    """ the same campaign as JSON, TOML and CSV """
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "a.txt").write_bytes(b"alpha")
+    (tmp_path / "data" / "b.txt").write_bytes(b"beta")
+    (tmp_path / "campaign.json").write_text(json.dumps({
+        "defaults": {"author": ["Doe, Jane"], "affiliation": ["Lab"]},
+        "datasets": [{"dataset": "S1", "title": "Sample 1", "keyword": ["ZnO", "IV"], "DataFilename": ["data/a.txt", "data/b.txt"], "DataDescription": ["first", "second"]},
+                     {"dataset": "S2", "title": "Sample 2", "keyword": ["ZnO"], "DataFilename": ["data/b.txt"], "DataDescription": [""]}]}), encoding = "utf-8")
+    (tmp_path / "campaign.toml").write_text(
+        "[defaults]\nauthor = [\"Doe, Jane\"]\naffiliation = [\"Lab\"]\n\n"
+        "[[datasets]]\ndataset = \"S1\"\ntitle = \"Sample 1\"\nkeyword = [\"ZnO\", \"IV\"]\nDataFilename = [\"data/a.txt\", \"data/b.txt\"]\nDataDescription = [\"first\", \"second\"]\n\n"
+        "[[datasets]]\ndataset = \"S2\"\ntitle = \"Sample 2\"\nkeyword = \"ZnO\"\nDataFilename = \"data/b.txt\"\nDataDescription = \"\"\n", encoding = "utf-8")
+    (tmp_path / "campaign.csv").write_text(
+        "dataset,title,author,affiliation,keyword,DataFilename,DataDescription\n"
+        "S1,Sample 1,\"Doe, Jane\",Lab,ZnO;IV,data/a.txt,first\n"
+        "S1,,,,,data/b.txt,second\n"
+        "S2,Sample 2,\"Doe, Jane\",Lab,ZnO,data/b.txt,\n", encoding = "utf-8")
+# end writeManifests
+
+def testManifests(tmp_path):
+    writeManifests(tmp_path)
+    fields = ("dataset", "title", "author", "affiliation", "keyword", "DataFilename", "DataDescription")
+    manifests = [[dict((field, dataset.get(field)) for field in fields) for dataset in readManifest(str(tmp_path / ("campaign." + ext)))[1]]
+                 for ext in ("json", "toml", "csv")]
+    assert manifests[0] == manifests[1] == manifests[2]
+    assert manifests[0][0]["DataFilename"] == [str(tmp_path / "data" / "a.txt"), str(tmp_path / "data" / "b.txt")]
+    assert manifests[0][1]["author"] == ["Doe, Jane"]
+# end testManifests
+
+def testRun(makeEngine, tmp_path):
+    writeManifests(tmp_path)
+    engine = makeEngine()
+    output = str(tmp_path / "results.json")
+    status = main([str(tmp_path / "campaign.toml"), "--key", "key", "--dataverse-server", engine.DATAVERSE_SERVER, "--dataset-server", engine.DATASET_SERVER,
+                   "--no-journal", "--output", output])
+    assert status == 0
+    with open(output, "r", encoding = "utf-8") as fileT:
+        results = json.load(fileT)
+    #
+    assert [(result["title"], result["status"], len(result["Data"])) for result in results] == [("Sample 1", "OK", 2), ("Sample 2", "OK", 1)]
+    listed = engine.listDatasetFiles(results[0]["persistentId"])
+    assert sorted([(entry["label"], entry["description"]) for entry in listed]) == [("a.txt", "first"), ("b.txt", "second")]
+# end testRun
+
+def testDryRun(tmp_path, capsys):
+    """ the JSON built and the files listed, nothing sent (the server does not exist) """
+    writeManifests(tmp_path)
+    output = str(tmp_path / "results.json")
+    assert main([str(tmp_path / "campaign.json"), "--dry-run", "--key", "key", "--dataverse-server", "http://unknown.invalid/api/dataverses/test/datasets",
+                 "--output", output]) == 0
+    with open(output, "r", encoding = "utf-8") as fileT:
+        results = json.load(fileT)
+    #
+    metadata = json.loads(results[0]["JSON"])["datasetVersion"]["metadataBlocks"]["citation"]["fields"]
+    assert [field["value"] for field in metadata if field["typeName"] == "title"] == ["Sample 1"]
+    assert [fileT["description"] for fileT in results[0]["Data"]] == ["first", "second"]
+    assert not results[0]["persistentId"]
+# end testDryRun
+
+def testFailedStatus(makeEngine, tmp_path):
+    """ a file refused, not sent again: the other files sent, the job failed """
+    writeManifests(tmp_path)
+    engine = makeEngine(refuse = 1)
+    output = str(tmp_path / "results.json")
+    assert main([str(tmp_path / "campaign.json"), "--key", "key", "--dataverse-server", engine.DATAVERSE_SERVER, "--dataset-server", engine.DATASET_SERVER,
+                 "--no-journal", "--retries", "0", "--workers", "1", "--output", output]) == 1
+    with open(output, "r", encoding = "utf-8") as fileT:
+        results = json.load(fileT)
+    #
+    assert [result["status"] for result in results] == ["ERROR", "OK"]
+    assert [fileT["status"] for fileT in results[0]["Data"]] == ["ERROR", "OK"]
+# end testFailedStatus
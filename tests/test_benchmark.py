@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# The benchmarks and their stand-in of Dataverse: the upload cases run and reported, the reports compared,
+# and the stand-in answers readable on a kept-alive connection
+
+import sys, os, os.path, time
+import socket
+import json
+import urllib.parse
+
+import DataverseBenchmark
+
+def receive(sock):
+    """ all the bytes received until the server is silent for a while """
+    data = b""
+    sock.settimeout(0.3)
+    try:
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            #
+            data += chunk
+        #
+    except socket.timeout:
+        pass
+    # end try
+    return data
+# end receive
+
+def testAbortKeptAlive(mockServer):
+    """ the abort of a multipart upload answered 204 without body, the connection kept for the next request """
+    url = urllib.parse.urlsplit(mockServer(partSize = 1000))
+    with socket.create_connection((url.hostname, url.port)) as sock:
+        sock.sendall(b"DELETE /api/datasets/mpupload?uploadid=1&storageidentifier=s3://bucket:1 HTTP/1.1\r\nHost: mock\r\n\r\n")
+        head, sep, content = receive(sock).partition(b"\r\n\r\n")
+        assert head.startswith(b"HTTP/1.1 204 ")
+        assert sep and (content == b"")
+        assert b"content-length" not in head.lower()
+        sock.sendall(b"GET /api/datasets/:persistentId/locks?persistentId=doi:10.5072/FK2/0 HTTP/1.1\r\nHost: mock\r\n\r\n")
+        head, sep, content = receive(sock).partition(b"\r\n\r\n")
+        assert head.startswith(b"HTTP/1.1 200 ")
+        assert json.loads(content.decode("utf-8")) == {"status": "OK", "data": []}
+    #
+# end testAbortKeptAlive
+
+def testUpload(tmp_path):
+    """ a small run of the upload benchmark, reported and compared with itself """
+    report = str(tmp_path / "upload.json")
+    status = DataverseBenchmark.main(["upload", "--sizes", "1k,100k", "--counts", "3", "--workers", "2", "--modes", "python,asyncio,zip",
+                                      "--repeat", "1", "--directory", str(tmp_path), "--output", report])
+    assert status == 0
+    with open(report, "r", encoding = "utf-8") as fileT:
+        results = json.load(fileT)
+    #
+    assert results["bench"] == "upload"
+    assert sorted([(result["mode"], result["size"]) for result in results["results"]]) == \
+        sorted([(mode, size) for mode in ("python", "asyncio", "zip") for size in (1000, 100000)])
+    assert all([(result["failed"] == 0) and (result["median_s"] > 0) and (result["count"] == 3) for result in results["results"]])
+
+    ratios = str(tmp_path / "ratios.json")
+    assert DataverseBenchmark.main(["compare", report, report, "--output", ratios]) == 0
+    with open(ratios, "r", encoding = "utf-8") as fileT:
+        assert [result["ratio"] for result in json.load(fileT)["results"]] == [1.0] * 6
+    #
+# end testUpload
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# Zip bundles: many small files sent in one archive built while it is sent, unzipped by the server
+# with their directories and descriptions, and sent one by one if the server requires a length
+
+import sys, os, os.path, time
+import io
+import zipfile
+import hashlib
+
+from DataverseTransport import DataverseZipStream
+
+def listed(engine, persistentId):
+    return sorted([(entry["directoryLabel"], entry["label"], entry.get("description", ""), entry["dataFile"]["checksum"]["value"])
+                   for entry in engine.listDatasetFiles(persistentId)])
+# end listed
+
+def testZipStream(makeFile):
+    files = [(makeFile("a.txt", b"alpha" * 1000), "raw/a.txt"), (makeFile("b.txt", b"beta"), "b.txt")]
+    stream = DataverseZipStream(files, chunksize = 1024, checksum = "MD5")
+    data = b"".join(stream)
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.namelist() == ["raw/a.txt", "b.txt"]
+        assert archive.read("raw/a.txt") == b"alpha" * 1000
+    #
+    assert stream.digests == {"raw/a.txt": hashlib.md5(b"alpha" * 1000).hexdigest(), "b.txt": hashlib.md5(b"beta").hexdigest()}
+    # sent again: the same archive
+    assert b"".join(stream) == data
+# end testZipStream
+
+def testBundle(makeEngine, makeFile):
+    engine = makeEngine()
+    engine.bundleFiles = True
+    contents = dict(("f%d.txt" % ii, b"%d\n" % ii * 100) for ii in range(0, 6))
+    result = engine.runDataset({"title": "Sample", "DataFilename": [makeFile(name, content) for (name, content) in sorted(contents.items())],
+                                "DataDirectory": "run 1"})
+    assert [fileT["status"] for fileT in result["Data"]] == ["OK"] * 6
+    assert listed(engine, result["persistentId"]) == [("run 1", name, "", hashlib.md5(content).hexdigest()) for (name, content) in sorted(contents.items())]
+# end testBundle
+
+def testDescriptionsKept(makeEngine, makeFile):
+    """ one archive per description, the file alone with its description sent as is """
+    engine = makeEngine()
+    engine.bundleFiles = True
+    descriptions = ["IV curve", "IV curve", "spectrum", "IV curve", "spectrum", "image"]
+    files = [makeFile("f%d.txt" % ii, b"%d" % ii) for ii in range(0, 6)]
+    result = engine.runDataset({"title": "Sample", "DataFilename": files, "DataDescription": descriptions})
+    assert [fileT["status"] for fileT in result["Data"]] == ["OK"] * 6
+    assert [(label, description) for (directoryLabel, label, description, checksum) in listed(engine, result["persistentId"])] == \
+        [("f%d.txt" % ii, descriptions[ii]) for ii in range(0, 6)]
+# end testDescriptionsKept
+
+def testLengthRequired(makeEngine, makeFile):
+    """ the archive sent chunked refused (411): the files sent one by one """
+    engine = makeEngine(lengthRequired = True)
+    engine.bundleFiles = True
+    files = [makeFile("f%d.txt" % ii, b"%d" % ii) for ii in range(0, 3)]
+    result = engine.runDataset({"title": "Sample", "DataFilename": files})
+    assert [fileT["status"] for fileT in result["Data"]] == ["OK"] * 3
+    assert [label for (directoryLabel, label, description, checksum) in listed(engine, result["persistentId"])] == ["f0.txt", "f1.txt", "f2.txt"]
+# end testLengthRequired
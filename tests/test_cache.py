@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# The read-through cache: fresh answers served from it, stale ones revalidated (ETag, 304), kept between
+# runs, dropped when the dataset changes, and used by the batch tool only if asked
+
+import sys, os, os.path, time
+import json
+import threading
+
+from DataverseCache import DataverseCache
+from DataverseTransport import DataverseResponse
+from DataverseBatch import main
+
+class Server(object):
+    """ the answers of a server to the GET requests: the content with its ETag, 304 if the client has it """
+
+    def __init__(self, content):
+        self.content    = content
+        self.requests   = []
+    # end __init__
+
+    def fetch(self, url, headers):
+        self.requests.append(dict(headers))
+        etag = "\"%d\"" % len(self.content)
+        if headers.get("If-None-Match") == etag:
+            return DataverseResponse(304, "Not Modified", {"ETag": etag}, b"")
+        #
+        return DataverseResponse(200, "OK", {"ETag": etag}, self.content.encode("utf-8"))
+    # end fetch
+
+# end Server
+
+def testRevalidated(tmp_path):
+    server = Server("{\"status\": \"OK\", \"data\": []}")
+    cache = DataverseCache(str(tmp_path / "cache.sqlite"), ttl = 60)
+    assert cache.get("http://server/api/files", server.fetch) == server.content
+    assert cache.get("http://server/api/files", server.fetch) == server.content
+    assert (cache.misses, cache.hits, len(server.requests)) == (1, 1, 1)
+    cache.close()
+
+    # the next run: kept on disk, revalidated once stale
+    cache = DataverseCache(str(tmp_path / "cache.sqlite"), ttl = 0)
+    assert cache.get("http://server/api/files", server.fetch) == server.content
+    assert server.requests[-1] == {"If-None-Match": "\"%d\"" % len(server.content)}
+    assert (cache.revalidated, cache.misses) == (1, 0)
+
+    # changed on the server
+    server.content = "{\"status\": \"OK\", \"data\": [1]}"
+    assert cache.get("http://server/api/files", server.fetch) == server.content
+    assert cache.misses == 1
+    cache.close()
+# end testRevalidated
+
+def testCounted(tmp_path):
+    """ the hits of concurrent workers all counted """
+    server = Server("{}")
+    cache = DataverseCache(None, ttl = 60)
+    cache.get("http://server/api/files", server.fetch)
+
+    def work():
+        for ii in range(0, 2000):
+            cache.get("http://server/api/files", server.fetch)
+        #
+    # end work
+
+    threads = [threading.Thread(target = work) for ii in range(0, 8)]
+    for thread in threads:
+        thread.start()
+    #
+    for thread in threads:
+        thread.join()
+    #
+    assert cache.hits == 16000
+# end testCounted
+
+def testInvalidated(makeEngine, makeFile):
+    """ the listing of a dataset read from the cache until a file is added to it """
+    engine = makeEngine()
+    engine.cache = DataverseCache(None, ttl = 60)
+    result = engine.runDataset({"title": "Sample", "DataFilename": [makeFile("a.txt")]})
+    assert len(engine.listDatasetFiles(result["persistentId"])) == 1
+    assert len(engine.listDatasetFiles(result["persistentId"])) == 1
+    assert engine.cache.hits == 1
+    engine.uploadResult(result["persistentId"], makeFile("b.txt"), "", "")
+    assert len(engine.listDatasetFiles(result["persistentId"])) == 2
+# end testInvalidated
+
+def testOptIn(makeEngine, makeFile, tmp_path, monkeypatch):
+    """ nothing written under the home directory unless --cache """
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    engine = makeEngine()
+    manifest = tmp_path / "campaign.json"
+    manifest.write_text(json.dumps({"datasets": [{"dataset": "S1", "title": "Sample", "DataFilename": [makeFile("a.txt")]}]}), encoding = "utf-8")
+    options = [str(manifest), "--key", "key", "--dataverse-server", engine.DATAVERSE_SERVER, "--dataset-server", engine.DATASET_SERVER, "--no-journal"]
+    assert main(options) == 0
+    assert not os.path.exists(str(tmp_path / "home"))
+    assert main(options + ["--cache"]) == 0
+    assert os.path.isfile(str(tmp_path / "home" / ".dataverse-utility" / "cache.sqlite"))
+# end testOptIn
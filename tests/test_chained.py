@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# Create and Upload: the dataset created and its files sent to it in the same upload, its persistentId
+# shown meanwhile whatever its length, and nothing sent if it is not created
+
+import sys, os, os.path, time
+
+import DataverseCore
+
+def createAndUpload(engine, files, DATAVERSE_SERVER = None):
+    """ the Create and Upload action of the interface, run without window; returns the events it posted """
+    core = DataverseCore.DataverseCore()
+    core.DATAVERSE_KEY, core.DATASET_SERVER, core.retry = engine.DATAVERSE_KEY, engine.DATASET_SERVER, engine.retry
+    core.DATAVERSE_SERVER = DATAVERSE_SERVER or engine.DATAVERSE_SERVER
+    core.ReportFilename = ""
+    core.DataFilename = files
+    core.DataDescription = [""] * len(files)
+    core.JSONfilename = ""
+    # the persistentId of the form, replaced by the one of the new dataset
+    core.persistentId = "doi:10.5072/FK2/OLD"
+    core.actionText = "All"
+    core.JSONcontent = core.makeJSON(core.getDataset())
+    thread = DataverseCore.UploadThread(id = 1, func = core.run)
+    thread.start()
+    thread.join(30)
+    events = []
+    while not core.events.empty():
+        events.append(core.events.get_nowait())
+    #
+    return core, events
+# end createAndUpload
+
+def testChained(makeEngine, makeFile):
+    engine = makeEngine()
+    files = [makeFile("f%d.txt" % ii) for ii in range(0, 3)]
+    core, events = createAndUpload(engine, files)
+    kinds = [kind for (actionText, kind, value) in events]
+    assert kinds[0] == "created"
+    assert (kinds.count("file"), kinds[-1]) == (3, "done")
+    Stdout, persistentId, elapsed = events[0][2]
+    assert persistentId == engine.parsePersistentId(Stdout) != "doi:10.5072/FK2/OLD"
+    # sent to the new dataset, without a second action
+    assert sorted([entry["label"] for entry in engine.listDatasetFiles(persistentId)]) == ["f0.txt", "f1.txt", "f2.txt"]
+    assert engine.listDatasetFiles("doi:10.5072/FK2/OLD") == []
+    assert events[-1][2][0] == "3 file(s) accepted, 0 failed"
+# end testChained
+
+def testNotCreated(makeEngine, makeFile):
+    """ the creation refused: no file sent, the answer of the server shown """
+    engine = makeEngine()
+    core, events = createAndUpload(engine, [makeFile("a.txt")], DATAVERSE_SERVER = engine.DATAVERSE_SERVER.replace("/dataverses/", "/unknown/"))
+    assert [kind for (actionText, kind, value) in events] == ["created", "done"]
+    assert events[0][2][1] is None
+    assert "dataset not created" in events[-1][2][0]
+# end testNotCreated
+
+def testPersistentId():
+    """ the persistentId read from the answer, not cut to the length of a DOI """
+    core = DataverseCore.DataverseCore()
+    for persistentId in ("doi:10.5072/FK2/ABC", "doi:10.80427/FK2/NBWPDH/LONGER", "hdl:20.500.12345/67"):
+        assert core.parsePersistentId("{\"status\": \"OK\", \"data\": {\"id\": 7, \"persistentId\": \"%s\"}}" % persistentId) == persistentId
+    #
+    assert core.parsePersistentId("{\"status\": \"ERROR\", \"message\": \"not allowed\"}") is None
+# end testPersistentId
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# Checksum verification: the files are hashed in the read that sends them, a file stored corrupted is
+# removed and sent again, and the parts of a direct upload are hashed in order from the chunks sent
+
+import sys, os, os.path, time
+import asyncio
+import hashlib
+import json
+
+import DataverseEngine
+from DataverseTransport import DataverseMultipart, DataverseFileRange, DataverseOrderedHash
+from DataverseAsync import AsyncDataverseEngine
+
+def listed(engine, persistentId):
+    return [(entry["label"], entry["dataFile"]["checksum"]["value"]) for entry in engine.listDatasetFiles(persistentId)]
+# end listed
+
+def testMultipartDigest(makeFile):
+    content = os.urandom(300000)
+    path = makeFile("a.bin", content)
+    body = DataverseMultipart([("jsonData", "{}")], [("file", "a.bin", path)], chunksize = 4096, checksum = "SHA-256")
+    assert len(b"".join(body)) == len(body)
+    assert body.digests[path] == hashlib.sha256(content).hexdigest()
+# end testMultipartDigest
+
+def checkCorrupted(engine, makeFile):
+    content = os.urandom(100000)
+    dataset = {"title": "Sample", "DataFilename": [makeFile("a.bin", content)]}
+    if isinstance(engine, AsyncDataverseEngine):
+        result = asyncio.run(engine.runDatasets([dataset]))[0]
+    else:
+        result = engine.runDataset(dataset)
+    #
+    assert result["Data"][0]["status"] == "OK", result["Data"][0]["message"]
+    # the corrupted copy removed, the one sent again kept
+    assert listed(engine, result["persistentId"]) == [("a.bin", hashlib.md5(content).hexdigest())]
+# end checkCorrupted
+
+def testCorruptedSentAgain(makeEngine, makeFile):
+    checkCorrupted(makeEngine(corrupt = 1), makeFile)
+# end testCorruptedSentAgain
+
+def testCorruptedSentAgainAsync(makeEngine, makeFile):
+    checkCorrupted(makeEngine(AsyncDataverseEngine, corrupt = 1), makeFile)
+# end testCorruptedSentAgainAsync
+
+def testCorruptedLeft(makeEngine, makeFile):
+    """ corrupted at each try: reported with the id of the file left in the dataset """
+    engine = makeEngine(corrupt = 10)
+    engine.retry.attempts = 2
+    result = engine.runDataset({"title": "Sample", "DataFilename": [makeFile("a.bin", b"alpha")]})
+    assert result["Data"][0]["status"] == "ERROR"
+    assert result["Data"][0]["message"].startswith("checksum mismatch: MD5 %s sent" % hashlib.md5(b"alpha").hexdigest())
+    assert result["Data"][0]["message"].endswith("left in the dataset)")
+    assert len(listed(engine, result["persistentId"])) == 1
+# end testCorruptedLeft
+
+def testNotVerified(makeEngine, makeFile):
+    engine = makeEngine(corrupt = 1)
+    engine.verifyChecksum = False
+    result = engine.runDataset({"title": "Sample", "DataFilename": [makeFile("a.bin", b"alpha")]})
+    assert result["Data"][0]["status"] == "OK"
+    assert listed(engine, result["persistentId"])[0][1] != hashlib.md5(b"alpha").hexdigest()
+# end testNotVerified
+
+def testServerAlgorithm(makeEngine, makeFile):
+    """ a server computing SHA-1: this file hashed again, the next ones with SHA-1 as they are sent """
+    engine = makeEngine()
+    path = makeFile("a.bin", b"alpha")
+    entry = {"dataFile": {"checksum": {"type": "SHA-1", "value": hashlib.sha1(b"alpha").hexdigest()}}}
+    assert engine.checkDigest(entry, (path, "MD5", hashlib.md5(b"alpha").hexdigest())) is None
+    assert engine.checksumType == "SHA-1"
+    entry["dataFile"]["checksum"]["value"] = hashlib.sha1(b"beta").hexdigest()
+    assert engine.checkDigest(entry, (path, "SHA-1", hashlib.sha1(b"alpha").hexdigest())).startswith("checksum mismatch")
+# end testServerAlgorithm
+
+def testOrderedHash(makeFile):
+    content = os.urandom(10 * 1000)
+    path = makeFile("a.bin", content)
+    ranges = [DataverseFileRange(path, offset, 1000, chunksize = 300) for offset in range(0, len(content), 1000)]
+
+    # the parts read out of order, the first one last, and one of them twice (sent again)
+    hasher = DataverseOrderedHash(path, len(content), "MD5", budget = len(content))
+    for fileRange in ranges[1:] + [ranges[3], ranges[0]]:
+        fileRange.feed = hasher.feed
+        list(fileRange)
+    #
+    assert hasher.digest() == hashlib.md5(content).hexdigest()
+    assert hasher.reread == 0
+
+    # beyond the budget: the chunks not kept read again
+    hasher = DataverseOrderedHash(path, len(content), "MD5", budget = 3000, chunksize = 700)
+    for fileRange in ranges[1:] + [ranges[0]]:
+        fileRange.feed = hasher.feed
+        list(fileRange)
+    #
+    assert hasher.digest() == hashlib.md5(content).hexdigest()
+    assert hasher.reread == len(content) - 1000 - 3000
+# end testOrderedHash
+
+def testDirectParts(makeEngine, makeFile, monkeypatch):
+    """ a direct upload in parts: the checksum declared computed from the parts sent, without reading the file again """
+    monkeypatch.setattr(DataverseEngine, "hashFile", None)
+    engine = makeEngine(partSize = 100000)
+    engine.directUploadSize = 0
+    engine.uploadChunkSize = 16384
+    content = os.urandom(350000)
+    result = engine.runDataset({"title": "Sample", "DataFilename": [makeFile("a.bin", content)]})
+    fileT = result["Data"][0]
+    assert fileT["status"] == "OK", fileT["message"]
+    dataFile = json.loads(fileT["Stdout"])["data"]["files"][0]["dataFile"]
+    assert dataFile["storageIdentifier"].startswith("s3://")
+    assert dataFile["filesize"] == len(content)
+    assert dataFile["checksum"] == {"type": "MD5", "value": hashlib.md5(content).hexdigest()}
+# end testDirectParts
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# Compression before upload: the tables sent compressed, the other files as they are, and the
+# compressed copies removed once sent, or never made for the files skipped
+
+import sys, os, os.path, time
+import asyncio
+
+import pytest
+from DataverseCompress import DataverseCompressor
+from DataverseJournal import DataverseJournal
+from DataverseAsync import AsyncDataverseEngine
+
+TABLE = b"".join([b"%.3f\t%.6e\n" % (0.001 * ii, 1e-6 * ii * ii) for ii in range(0, 20000)])
+
+@pytest.fixture
+def compressor(tmp_path):
+    compressorT = DataverseCompressor("gzip", workers = 2, lookahead = 1, directory = str(tmp_path))
+    yield compressorT
+    compressorT.close()
+# end compressor
+
+def leftCopies(compressor):
+    return [name for (root, dirs, names) in os.walk(compressor.directory) for name in names]
+# end leftCopies
+
+def labels(engine, persistentId):
+    return sorted([entry["label"] for entry in engine.listDatasetFiles(persistentId)])
+# end labels
+
+def testCompressed(makeEngine, makeFile, compressor):
+    engine = makeEngine()
+    engine.compressor = compressor
+    files = [makeFile("table.txt", TABLE), makeFile("noise.bin", os.urandom(200000))]
+    result = engine.runDataset({"title": "Sample", "DataFilename": files})
+    assert [fileT["status"] for fileT in result["Data"]] == ["OK", "OK"]
+    # the table compressed, the random bytes (above the threshold) sent as they are
+    assert labels(engine, result["persistentId"]) == ["noise.bin", "table.txt.gz"]
+    assert compressor.bytesIn == len(TABLE)
+    assert compressor.bytesOut < (0.8 * len(TABLE))
+    assert compressor.futures == {}
+    assert leftCopies(compressor) == []
+# end testCompressed
+
+def testRelease(makeFile, compressor):
+    path = makeFile("table.txt", TABLE)
+    compressor.expect([path])
+    copy = compressor.take(path)
+    assert copy.endswith("table.txt.gz") and os.path.isfile(copy)
+    compressor.release(copy)
+    assert not os.path.exists(copy)
+    assert leftCopies(compressor) == []
+    # nothing to remove for a file sent as is
+    compressor.release(None)
+# end testRelease
+
+def testForget(makeFile, compressor):
+    first, second = makeFile("a.txt", TABLE), makeFile("b.txt", TABLE)
+    compressor.expect([first, second])
+    # the second one compressed ahead, then skipped
+    compressor.release(compressor.take(first))
+    assert second in compressor.futures
+    compressor.forget(second)
+    # the copy removed once compressed, by a callback of the future
+    tic = time.time()
+    while leftCopies(compressor) and ((time.time() - tic) < 5.0):
+        time.sleep(0.01)
+    #
+    assert compressor.futures == {}
+    assert not compressor.expected
+    assert leftCopies(compressor) == []
+# end testForget
+
+def run(engine, dataset):
+    if isinstance(engine, AsyncDataverseEngine):
+        return asyncio.run(engine.runDatasets([dataset]))[0]
+    #
+    return engine.runDataset(dataset)
+# end run
+
+def checkSkipped(engine, makeFile, compressor, tmp_path):
+    """ the files of a resumed job accepted already: not compressed for nothing, the new one sent compressed """
+    files = [makeFile("t%d.txt" % ii, TABLE + (b"%d\n" % ii)) for ii in range(0, 4)]
+    dataset = {"dataset": "S1", "title": "Sample", "DataFilename": files[0:3]}
+    engine.journal = DataverseJournal(str(tmp_path / "campaign.journal"))
+    run(engine, dataset)
+    engine.compressor = compressor
+    dataset["DataFilename"] = files
+    result = run(engine, dataset)
+    assert [fileT["status"] for fileT in result["Data"]] == ["OK"] * 4
+    assert all([fileT["message"].startswith("already uploaded") for fileT in result["Data"][0:3]])
+    assert "t3.txt.gz" in labels(engine, result["persistentId"])
+    assert compressor.bytesIn == os.path.getsize(files[3])
+    assert compressor.futures == {}
+    assert not compressor.expected
+    assert leftCopies(compressor) == []
+# end checkSkipped
+
+def testSkipped(makeEngine, makeFile, compressor, tmp_path):
+    checkSkipped(makeEngine(), makeFile, compressor, tmp_path)
+# end testSkipped
+
+def testSkippedAsync(makeEngine, makeFile, compressor, tmp_path):
+    checkSkipped(makeEngine(AsyncDataverseEngine), makeFile, compressor, tmp_path)
+# end testSkippedAsync
+
+def testSkippedStream(makeEngine, makeFile, compressor, tmp_path):
+    """ the scanned files accepted already: skipped before they are announced to the compressor """
+    engine = makeEngine()
+    engine.journal = DataverseJournal(str(tmp_path / "campaign.journal"))
+    scan = tmp_path / "scan"
+    files = [makeFile("scan/t%d.txt" % ii, TABLE + (b"%d\n" % ii)) for ii in range(0, 3)]
+    dataset = {"dataset": "S1", "title": "Sample", "ScanDirectory": str(scan)}
+    assert engine.runDataset(dataset)["streamed"] == 3
+    makeFile("scan/t3.txt", TABLE)
+    engine.compressor = compressor
+    assert engine.runDataset(dataset)["streamed"] == 4
+    assert compressor.bytesIn == len(TABLE)
+    assert compressor.futures == {}
+    assert leftCopies(compressor) == []
+# end testSkippedStream
@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# The curl transport: the paths, descriptions and directories of the scanned and described files,
+# with spaces, quotes and semicolons, reach the server unchanged
+
+import sys, os, os.path, time
+import shutil
+import json
+
+import pytest
+
+pytestmark = pytest.mark.skipif(shutil.which("curl") is None, reason = "curl not installed")
+
+def testAwkwardNames(makeEngine, makeFile):
+    engine = makeEngine()
+    engine.useCurl = True
+    # the double quotes of the name itself are percent-encoded by curl, as by the browsers
+    path = makeFile("run \"1\"/it's a test; v=2.txt", b"1.0\t2.0\n")
+    description = "Experiment: \"I-V\" at 300 K; it's {ok} \\n"
+    result = engine.runDataset({"title": "Sample", "DataFilename": [path], "DataDescription": [description], "DataDirectory": "run 1/raw data"})
+    fileT = result["Data"][0]
+    assert fileT["status"] == "OK", fileT["message"]
+    entry = json.loads(fileT["Stdout"][fileT["Stdout"].find("{"):])["data"]["files"][0]
+    assert entry["label"] == os.path.basename(path)
+    assert entry["directoryLabel"] == "run 1/raw data"
+# end testAwkwardNames
+
+def testCommand(makeEngine):
+    engine = makeEngine()
+    args = engine.curlCommand("POST", "http://server/api", "--form-string", "jsonData={\"description\":\"a 'b' c\"}")
+    assert args[0] == "curl"
+    assert args[-1] == "http://server/api"
+    assert "jsonData={\"description\":\"a 'b' c\"}" in args
+# end testCommand
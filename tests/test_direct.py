@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# The direct uploads: the files sent to the object store through presigned URLs (one PUT, or parts in
+# parallel then completed), registered with their checksum, the multipart upload aborted if a part fails,
+# and the files sent through the server if it does not allow direct uploads
+
+import sys, os, os.path, time
+import json
+import hashlib
+
+import pytest
+from DataverseTiming import DataverseTimings
+from DataverseRetry import DataverseRetryPolicy
+
+def upload(engine, makeFile, tmp_path, contents):
+    """ the result of the files sent, their entries in the dataset and the requests sent (operation, status) """
+    engine.timings = DataverseTimings(str(tmp_path / "timings.jsonl"))
+    files = [makeFile(name, content) for (name, content) in contents]
+    result = engine.runDataset({"title": "Sample", "DataFilename": files})
+    engine.timings.close()
+    with open(str(tmp_path / "timings.jsonl"), "r", encoding = "utf-8") as fileT:
+        requests = [json.loads(line) for line in fileT]
+    #
+    entries = dict((entry["label"], entry) for entry in engine.listDatasetFiles(result["persistentId"]))
+    return result, entries, [(request["operation"], request["status"]) for request in requests if request["operation"] != "create"]
+# end upload
+
+def testSingle(makeEngine, makeFile, tmp_path):
+    engine = makeEngine(partSize = 1 << 20)
+    engine.directUploadSize = 0
+    content = os.urandom(500000)
+    result, entries, requests = upload(engine, makeFile, tmp_path, [("a.bin", content)])
+    assert [fileT["status"] for fileT in result["Data"]] == ["OK"]
+    # to the store, then registered: the server does not receive the file
+    assert requests == [("get", 200), ("put", 200), ("register", 200)]
+    entry = entries["a.bin"]["dataFile"]
+    assert entry["storageIdentifier"].startswith("s3://bucket:")
+    assert (entry["filesize"], entry["checksum"]["value"]) == (500000, hashlib.md5(content).hexdigest())
+# end testSingle
+
+def testMultipart(makeEngine, makeFile, tmp_path):
+    """ the parts sent in parallel, completed, the checksum of the whole file computed while sending them """
+    engine = makeEngine(partSize = 256 << 10)
+    engine.directUploadSize = 0
+    engine.directWorkers = 3
+    engine.directHashBudget = 256 << 10
+    content = os.urandom((1 << 20) + 100)
+    result, entries, requests = upload(engine, makeFile, tmp_path, [("a.bin", content)])
+    assert [fileT["status"] for fileT in result["Data"]] == ["OK"]
+    assert requests == [("get", 200)] + [("put", 200)] * 5 + [("register", 200)]
+    entry = entries["a.bin"]["dataFile"]
+    assert (entry["filesize"], entry["checksum"]["value"]) == (len(content), hashlib.md5(content).hexdigest())
+# end testMultipart
+
+def testAborted(makeEngine, makeFile, tmp_path):
+    """ a part refused by the store: the upload aborted (204, its parts dropped), the file failed, not registered """
+    engine = makeEngine(partSize = 256 << 10)
+    engine.directUploadSize = 0
+    engine.directWorkers = 1
+    engine.retry = DataverseRetryPolicy(attempts = 1)
+    putObject = engine.putObject
+
+    def failing(url, body, headers = None):
+        if "partNumber=3&" in url:
+            raise ConnectionError("part refused")
+        #
+        return putObject(url, body, headers)
+    # end failing
+
+    engine.putObject = failing
+    result, entries, requests = upload(engine, makeFile, tmp_path, [("a.bin", os.urandom(1 << 20))])
+    assert result["Data"][0]["status"] == "ERROR"
+    assert "part refused" in result["Data"][0]["message"]
+    assert requests == [("get", 200), ("put", 200), ("put", 200), ("delete", 204)]
+    assert entries == {}
+# end testAborted
+
+def testNotEnabled(makeEngine, makeFile, tmp_path):
+    """ no upload URL (direct upload not enabled on the store): sent through the server """
+    engine = makeEngine(partSize = 0)
+    engine.directUploadSize = 0
+    content = os.urandom(100000)
+    result, entries, requests = upload(engine, makeFile, tmp_path, [("a.bin", content)])
+    assert [fileT["status"] for fileT in result["Data"]] == ["OK"]
+    assert requests == [("get", 400), ("add", 200)]
+    assert "storageIdentifier" not in entries["a.bin"]["dataFile"]
+    assert entries["a.bin"]["dataFile"]["checksum"]["value"] == hashlib.md5(content).hexdigest()
+# end testNotEnabled
+
+def testThreshold(makeEngine, makeFile, tmp_path):
+    """ only the files of directUploadSize bytes or more sent to the store """
+    engine = makeEngine(partSize = 1 << 20)
+    engine.directUploadSize = 10000
+    engine.uploadWorkers = 1
+    result, entries, requests = upload(engine, makeFile, tmp_path, [("small.txt", b"s" * 100), ("large.bin", os.urandom(20000))])
+    assert [fileT["status"] for fileT in result["Data"]] == ["OK", "OK"]
+    assert requests == [("add", 200), ("get", 200), ("put", 200), ("register", 200)]
+    assert ("storageIdentifier" in entries["large.bin"]["dataFile"], "storageIdentifier" in entries["small.txt"]["dataFile"]) == (True, False)
+# end testThreshold
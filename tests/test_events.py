@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# The events of the interface: the upload thread posting its events (each file, the progress, the end)
+# without touching the widgets, the Tk loop woken for each one, and the queue drained on the Tk thread
+
+import sys, os, os.path, time
+
+import DataverseCore
+
+class Widget(object):
+    """ the widgets updated by onEvents: the text inserted, the label text """
+    def __init__(self):
+        self.text = ""
+        self.options = {}
+    # end __init__
+    def insert(self, index, text):
+        self.text += text
+    # end insert
+    def see(self, index):
+        pass
+    # end see
+    def __setitem__(self, key, value):
+        self.options[key] = value
+    # end __setitem__
+# end Widget
+
+class Root(object):
+    """ the Tk root window: the virtual events generated, from the upload thread """
+    def __init__(self):
+        self.generated = []
+    # end __init__
+    def event_generate(self, sequence, when = None):
+        self.generated.append((sequence, when))
+    # end event_generate
+# end Root
+
+def makeCore(engine, files, actionText = "Data"):
+    core = DataverseCore.DataverseCore()
+    for name in ("DATAVERSE_KEY", "DATAVERSE_SERVER", "DATASET_SERVER", "retry"):
+        setattr(core, name, getattr(engine, name))
+    #
+    core.ReportFilename = ""
+    core.DataFilename = files
+    core.DataDescription = ["file %d" % ii for ii in range(0, len(files))]
+    core.JSONfilename = ""
+    core.actionText = actionText
+    return core
+# end makeCore
+
+def drain(core):
+    events = []
+    while not core.events.empty():
+        events.append(core.events.get_nowait())
+    #
+    return events
+# end drain
+
+def upload(core):
+    thread = DataverseCore.UploadThread(id = 1, func = core.run)
+    thread.start()
+    thread.join(30)
+    assert not thread.is_alive()
+# end upload
+
+def testPosted(makeEngine, makeFile):
+    engine = makeEngine()
+    core = makeCore(engine, [makeFile("f%d.txt" % ii) for ii in range(0, 4)])
+    core.persistentId = engine.parsePersistentId(engine.uploadJSON(engine.makeJSON({"title": "Sample"})))
+    upload(core)
+    events = drain(core)
+    kinds = [kind for (actionText, kind, value) in events]
+    assert kinds.count("file") == 4
+    assert kinds[-2:] == ["progress", "done"]
+    assert sorted([os.path.basename(value["filename"]) for (actionText, kind, value) in events if kind == "file"]) == ["f%d.txt" % ii for ii in range(0, 4)]
+    assert events[-1][2][0] == "4 file(s) accepted, 0 failed"
+    assert (events[-2][2]["filesDone"], events[-2][2]["filesTotal"]) == (4, 4)
+# end testPosted
+
+def testDoneOnFailure(makeEngine, makeFile):
+    """ the end posted even if the upload fails, so that the interface is released """
+    core = makeCore(makeEngine(), [makeFile("a.txt")], actionText = "All")
+    core.DATAVERSE_SERVER = "http://127.0.0.1:1/api/dataverses/test/datasets"
+    core.retry.attempts = 1
+    upload(core)
+    events = drain(core)
+    assert [kind for (actionText, kind, value) in events] == ["done"]
+    assert "cannot upload" in events[-1][2][0]
+# end testDoneOnFailure
+
+def testDrained():
+    """ the Tk loop woken for each event, the widgets updated and the interface released on the Tk thread """
+    core = DataverseCore.DataverseCore()
+    core.root = Root()
+    core.DataStdoutEdit = Widget()
+    core.ProgressLabel = Widget()
+    core.progress = DataverseCore.DataverseProgress()
+    core.running = True
+    core.thread = object()
+    core.postEvent("Data", "file", {"status": "OK", "filename": "a.txt", "Stdout": "{\"status\": \"OK\"}", "message": ""})
+    core.postEvent("Data", "progress", core.progress.snapshot())
+    core.postEvent("Data", "done", ("1 file(s) accepted, 0 failed", 0.5))
+    assert core.root.generated == [("<<DataverseEvent>>", "tail")] * 3
+    assert core.isRunning()
+    core.onEvents()
+    assert core.events.empty()
+    assert core.DataStdoutEdit.text == "OK: a.txt\n{\"status\": \"OK\"}\n\n"
+    assert "text" in core.ProgressLabel.options
+    assert (core.isRunning(), core.thread, core.Stdout) == (False, None, "1 file(s) accepted, 0 failed")
+# end testDrained
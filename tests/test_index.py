@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# The deduplication index: a file whose content is already in the dataset is skipped, with the thread
+# and the asyncio engines, and sent again once removed from the dataset
+
+import sys, os, os.path, time
+import asyncio
+import json
+
+import DataverseIndex
+from DataverseIndex import DataverseIndex as Index
+from DataverseAsync import AsyncDataverseEngine
+from DataverseBatch import main
+
+def runDataset(engine, dataset):
+    if isinstance(engine, AsyncDataverseEngine):
+        return asyncio.run(engine.runDatasets([dataset]))[0]
+    #
+    return engine.runDataset(dataset)
+# end runDataset
+
+def checkSkipped(engine, makeFile, tmp_path):
+    engine.index = Index(str(tmp_path / "index.sqlite"))
+    first = runDataset(engine, {"title": "Sample", "DataFilename": [makeFile("a.txt", b"alpha"), makeFile("b.txt", b"beta")]})
+    assert [fileT["status"] for fileT in first["Data"]] == ["OK", "OK"]
+
+    # the same contents under other names, and a new one
+    dataset = {"title": "Sample", "persistentId": first["persistentId"],
+               "DataFilename": [makeFile("copy/a.txt", b"alpha"), makeFile("copy/b.txt", b"beta"), makeFile("c.txt", b"gamma")]}
+    second = runDataset(engine, dataset)
+    messages = [fileT["message"] for fileT in second["Data"]]
+    assert [fileT["status"] for fileT in second["Data"]] == ["OK", "OK", "OK"]
+    assert messages[0].startswith("already in the dataset as a.txt")
+    assert messages[1].startswith("already in the dataset as b.txt")
+    assert not messages[2]
+# end checkSkipped
+
+def testSkipped(makeEngine, makeFile, tmp_path):
+    checkSkipped(makeEngine(), makeFile, tmp_path)
+# end testSkipped
+
+def testSkippedAsync(makeEngine, makeFile, tmp_path):
+    checkSkipped(makeEngine(AsyncDataverseEngine), makeFile, tmp_path)
+# end testSkippedAsync
+
+def testSentAgainOnceRemoved(makeEngine, makeFile, tmp_path):
+    engine = makeEngine()
+    engine.index = Index(str(tmp_path / "index.sqlite"))
+    path = makeFile("a.txt", b"alpha")
+    first = engine.runDataset({"title": "Sample", "DataFilename": [path]})
+    fileId = json.loads(first["Data"][0]["Stdout"])["data"]["files"][0]["dataFile"]["id"]
+    assert engine.deleteFile(first["persistentId"], fileId)
+
+    # the index reconciled with the dataset listing: the content is no longer there
+    second = engine.runDataset({"title": "Sample", "persistentId": first["persistentId"], "DataFilename": [path]})
+    assert second["Data"][0]["status"] == "OK"
+    assert not second["Data"][0]["message"]
+# end testSentAgainOnceRemoved
+
+def testLocalChecksumKept(makeFile, tmp_path, monkeypatch):
+    calls = []
+    hashFile = DataverseIndex.hashFile
+    monkeypatch.setattr(DataverseIndex, "hashFile", lambda *args: calls.append(args) or hashFile(*args))
+    index = Index(str(tmp_path / "index.sqlite"))
+    path = makeFile("a.txt", b"alpha")
+    assert index.localChecksum(path) == index.localChecksum(path) == "2c1743a391305fbf367df8e4f069f9f9"
+    assert len(calls) == 1
+
+    # changed: hashed again
+    with open(path, "ab") as fileT:
+        fileT.write(b"!")
+    #
+    os.utime(path, (time.time() + 10, time.time() + 10))
+    index.localChecksum(path)
+    assert len(calls) == 2
+# end testLocalChecksumKept
+
+def testBatchDedupAsync(mockServer, makeFile, tmp_path):
+    """ --dedup with --asyncio: the second run sends nothing """
+    url = mockServer()
+    makeFile("a.txt", b"alpha")
+    manifest = tmp_path / "campaign.json"
+    dataset = {"dataset": "S1", "title": "Sample", "DataFilename": ["a.txt"]}
+
+    def run():
+        manifest.write_text(json.dumps({"server": {"key": "key", "dataverse": url + "/api/dataverses/test/datasets", "dataset": url + "/api/datasets"},
+                                        "datasets": [dataset]}), encoding = "utf-8")
+        return main([str(manifest), "--asyncio", "--dedup", "--index", str(tmp_path / "index.sqlite"), "--no-journal", "--no-cache", "--output", str(tmp_path / "results.json")])
+    # end run
+
+    assert run() == 0
+    # the same dataset: its file known by the index only
+    dataset["persistentId"] = json.loads((tmp_path / "results.json").read_text(encoding = "utf-8"))[0]["persistentId"]
+    assert run() == 0
+    results = json.loads((tmp_path / "results.json").read_text(encoding = "utf-8"))
+    assert results[0]["Data"][0]["message"].startswith("already in the dataset")
+# end testBatchDedupAsync
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# The upload journal: an interrupted job resumes without creating its datasets again nor sending
+# the files already accepted
+
+import sys, os, os.path, time
+import json
+
+import pytest
+from DataverseJournal import DataverseJournal
+from DataverseBatch import readManifest
+
+def writeManifest(tmp_path, datasets):
+    path = tmp_path / "campaign.json"
+    path.write_text(json.dumps({"datasets": datasets}), encoding = "utf-8")
+    return str(path)
+# end writeManifest
+
+def testResume(makeEngine, makeFile, tmp_path):
+    files = [makeFile("a.txt", b"alpha"), makeFile("b.txt", b"beta")]
+    dataset = {"dataset": "S1", "title": "Sample", "DataFilename": files}
+    engine = makeEngine()
+    engine.journal = DataverseJournal(str(tmp_path / "campaign.journal"))
+    first = engine.runDataset(dataset)
+    assert first["persistentId"] and first["JSON"]
+    assert [fileT["status"] for fileT in first["Data"]] == ["OK", "OK"]
+
+    # the job run again: the dataset and its files known by the journal on disk
+    engine.journal = DataverseJournal(str(tmp_path / "campaign.journal"))
+    second = engine.runDataset(dataset)
+    assert second["persistentId"] == first["persistentId"]
+    assert second["JSON"] == ""
+    assert [fileT["status"] for fileT in second["Data"]] == ["OK", "OK"]
+    assert all([fileT["message"].startswith("already uploaded") for fileT in second["Data"]])
+# end testResume
+
+def testChangedFileSentAgain(makeEngine, makeFile, tmp_path):
+    path = makeFile("a.txt", b"alpha")
+    engine = makeEngine()
+    engine.journal = DataverseJournal(str(tmp_path / "campaign.journal"))
+    persistentId = engine.runDataset({"dataset": "S1", "title": "Sample", "DataFilename": [path]})["persistentId"]
+
+    with open(path, "ab") as fileT:
+        fileT.write(b" changed")
+    #
+    result = engine.uploadResult(persistentId, path, "", "")
+    assert result["status"] == "OK"
+    assert not result["message"]
+# end testChangedFileSentAgain
+
+def testTruncatedLineIgnored(tmp_path):
+    filename = str(tmp_path / "campaign.journal")
+    journal = DataverseJournal(filename)
+    journal.recordDataset("S1", "doi:10.5072/FK2/A")
+    with open(filename, "a", encoding = "utf-8") as fileT:
+        fileT.write("{\"type\": \"dataset\", \"key\": \"S2\", \"persis")
+    #
+    journal = DataverseJournal(filename)
+    assert journal.getDataset("S1") == "doi:10.5072/FK2/A"
+    assert journal.getDataset("S2") is None
+# end testTruncatedLineIgnored
+
+def testSameTitleNotShared(makeEngine, makeFile, tmp_path):
+    makeFile("a.txt", b"alpha")
+    makeFile("b.txt", b"beta")
+    manifest = writeManifest(tmp_path, [{"dataset": "S1", "title": "Sample", "DataFilename": ["a.txt"]},
+                                        {"dataset": "S2", "title": "Sample", "DataFilename": ["b.txt"]}])
+    server, datasets = readManifest(manifest)
+
+    engine = makeEngine()
+    engine.journal = DataverseJournal(str(tmp_path / "campaign.journal"))
+    results = [engine.runDataset(dataset) for dataset in datasets]
+    assert results[0]["persistentId"] != results[1]["persistentId"]
+
+    # resumed: each dataset gets its own persistentId back, and its file is not taken for the other one's
+    engine.journal = DataverseJournal(str(tmp_path / "campaign.journal"))
+    resumed = [engine.runDataset(dataset) for dataset in readManifest(manifest)[1]]
+    assert [result["persistentId"] for result in resumed] == [result["persistentId"] for result in results]
+    assert all([result["Data"][0]["message"].startswith("already uploaded") for result in resumed])
+# end testSameTitleNotShared
+
+def testDuplicateNameRefused(tmp_path):
+    manifest = writeManifest(tmp_path, [{"dataset": "S1", "title": "A"}, {"dataset": "S1", "title": "B"}])
+    with pytest.raises(ValueError):
+        readManifest(manifest)
+    #
+# end testDuplicateNameRefused
+
+def testUnnamedReordered(makeEngine, makeFile, tmp_path):
+    """ unnamed datasets, reordered before the job is resumed: none takes the persistentId of another one """
+    makeFile("a.txt", b"alpha")
+    makeFile("b.txt", b"beta")
+    entries = [{"title": "Sample", "DataFilename": ["a.txt"]}, {"title": "Sample", "DataFilename": ["b.txt"]}]
+    server, datasets = readManifest(writeManifest(tmp_path, entries))
+    assert not any([dataset.get("dataset") for dataset in datasets])
+
+    engine = makeEngine()
+    engine.journal = DataverseJournal(str(tmp_path / "campaign.journal"))
+    first = [engine.runDataset(dataset)["persistentId"] for dataset in datasets]
+    server, datasets = readManifest(writeManifest(tmp_path, entries[::-1]))
+    engine.journal = DataverseJournal(str(tmp_path / "campaign.journal"))
+    resumed = [engine.runDataset(dataset) for dataset in datasets]
+    assert not (set([result["persistentId"] for result in resumed]) & set(first))
+    assert all([result["Data"][0]["status"] == "OK" and (not result["Data"][0]["message"]) for result in resumed])
+# end testUnnamedReordered
+
+def testUnnamedDatasetNotJournaled(makeEngine, makeFile, tmp_path):
+    """ a dataset without manifest name (such as the one of the interface) is created again, not looked up by its title """
+    engine = makeEngine()
+    engine.journal = DataverseJournal(str(tmp_path / "campaign.journal"))
+    dataset = {"title": "Sample", "DataFilename": [makeFile("a.txt")]}
+    first = engine.runDataset(dataset)
+    second = engine.runDataset(dataset)
+    assert first["persistentId"] != second["persistentId"]
+    assert engine.journal.datasets == {}
+# end testUnnamedDatasetNotJournaled
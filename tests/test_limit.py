@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# Upload limits: the token buckets, the rates and limits files, and the uploads sent within a byte limit,
+# whose recorded request phases stay those of the wall clock
+
+import sys, os, os.path, time
+import asyncio
+
+import pytest
+from DataverseLimit import DataverseTokenBucket, DataverseLimiter, GlobalLimiter, parseRate, readLimits
+from DataverseAsync import AsyncDataverseEngine
+
+class Timings(object):
+    """ the timing of each file addition, as recorded by the engine """
+
+    def __init__(self):
+        self.records = []
+    # end __init__
+
+    def record(self, operation, url, filename, size, status, timing):
+        if operation == "add":
+            self.records.append(timing)
+        #
+    # end record
+
+# end Timings
+
+def testParseRate():
+    assert parseRate("10M") == 10e6
+    assert parseRate("500k/s") == 500e3
+    assert parseRate("1.5GB") == 1.5e9
+    assert parseRate("250") == 250.0
+    assert parseRate("") == 0.0
+    assert parseRate(0) == 0.0
+    with pytest.raises(ValueError):
+        parseRate("fast")
+    #
+# end testParseRate
+
+def testTokenBucket():
+    bucket = DataverseTokenBucket(100)
+    # the takers wait in turn, each one after the tokens of the previous ones
+    first = bucket.reserve(50)
+    second = bucket.reserve(50)
+    assert 0.45 <= first <= 0.5
+    assert 0.95 <= second <= 1.0
+    # no limit
+    assert DataverseTokenBucket(0).reserve(1 << 30) == 0.0
+# end testTokenBucket
+
+def testChain():
+    parent = DataverseLimiter(bytesPerSecond = 5e6)
+    limiter = DataverseLimiter(bytesPerSecond = 10e6, parent = parent)
+    assert limiter.limited()
+    assert limiter.byteRate() == 5e6
+    assert list(limiter.chain()) == [limiter, parent, GlobalLimiter]
+    limiter.setLimits(bytesPerSecond = 1e6)
+    assert limiter.byteRate() == 1e6
+# end testChain
+
+def testThrottleQuantum():
+    limiter = DataverseLimiter(bytesPerSecond = 1e12)
+    pieces = list(limiter.throttle(b"x" * 200000))
+    assert [len(piece) for piece in pieces] == [65536, 65536, 65536, 3392]
+    assert b"".join(pieces) == b"x" * 200000
+    # without limit: the chunks as they are
+    assert [len(piece) for piece in DataverseLimiter().throttle([b"x" * 200000])] == [200000]
+# end testThrottleQuantum
+
+def testReadLimits(tmp_path):
+    path = tmp_path / "limits.txt"
+    path.write_text("# night window\nrate = 10M\nrequests = 5   # per second\nother = 1\n", encoding = "utf-8")
+    assert readLimits(str(path)) == {"bytesPerSecond": 10e6, "requestsPerSecond": 5.0}
+# end testReadLimits
+
+def checkLimitedTiming(engine, makeFile):
+    """ 1 MB sent at 2 MB/s: about half a second, the recorded total being the wall clock time """
+    engine.limiter = DataverseLimiter(bytesPerSecond = 2e6)
+    engine.timings = Timings()
+    dataset = {"title": "Sample", "DataFilename": [makeFile("a.bin", os.urandom(1 << 20))]}
+    tic = time.perf_counter()
+    if isinstance(engine, AsyncDataverseEngine):
+        result = asyncio.run(engine.runDatasets([dataset]))[0]
+    else:
+        result = engine.runDataset(dataset)
+    #
+    elapsed = time.perf_counter() - tic
+    assert result["Data"][0]["status"] == "OK"
+    assert elapsed >= 0.4
+    (timing,) = engine.timings.records
+    assert 0.4 <= timing["total"] <= elapsed
+    assert timing["upload"] <= timing["total"]
+# end checkLimitedTiming
+
+def testLimitedTiming(makeEngine, makeFile):
+    checkLimitedTiming(makeEngine(), makeFile)
+# end testLimitedTiming
+
+def testLimitedTimingAsync(makeEngine, makeFile):
+    checkLimitedTiming(makeEngine(AsyncDataverseEngine), makeFile)
+# end testLimitedTimingAsync
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# The lists of any length (authors, keywords, data files): the table editing the dataset lists in place,
+# long lists rendered and uploaded, and the virtualized rows of the interface (if a display is available)
+
+import sys, os, os.path, time
+import json
+
+import pytest
+
+GUI = pytest.importorskip("DataverseGUI")
+
+def testTable():
+    author, affiliation = ["Hamady, Sidi"], ["LMOPS", "Lab B"]
+    table = GUI.DataverseTable([author, affiliation])
+    assert (len(table), author) == (2, ["Hamady, Sidi", ""])
+    table.set(1, 0, "Doe, Jane")
+    table.set(4, 1, "Lab E")
+    assert (author, affiliation) == (["Hamady, Sidi", "Doe, Jane", "", "", ""], ["LMOPS", "Lab B", "", "", "Lab E"])
+    # nothing added for an empty value past the end
+    table.set(9, 0, "")
+    assert len(table) == 5
+    assert table.get(9, 0) == ""
+    table.set(4, 1, "")
+    table.trim()
+    assert (author, affiliation) == (["Hamady, Sidi", "Doe, Jane"], ["LMOPS", "Lab B"])
+    table.append(["Roe, Rick", "Lab C"])
+    assert table.get(2, 1) == "Lab C"
+# end testTable
+
+def testLongLists(makeEngine, makeFile):
+    engine = makeEngine()
+    authors = ["Author %d" % ii for ii in range(0, 5000)]
+    dataset = {"title": "Sample", "author": authors, "affiliation": ["Lab"] * 5000, "keyword": ["keyword %d" % ii for ii in range(0, 5000)]}
+    tic = time.perf_counter()
+    fields = json.loads(engine.makeJSON(dataset))["datasetVersion"]["metadataBlocks"]["citation"]["fields"]
+    assert (time.perf_counter() - tic) < 2.0
+    fields = dict((field["typeName"], field["value"]) for field in fields)
+    assert [author["authorName"]["value"] for author in fields["author"]] == authors
+    assert len(fields["keyword"]) == 5000
+    # past the five rows of the former form
+    files = [makeFile("data/f%03d.txt" % ii, b"%d" % ii) for ii in range(0, 120)]
+    engine.uploadWorkers = 8
+    result = engine.runDataset({"title": "Sample", "DataFilename": files, "DataDescription": ["file %d" % ii for ii in range(0, 120)]})
+    assert [fileT["status"] for fileT in result["Data"]] == ["OK"] * 120
+    assert len(engine.listDatasetFiles(result["persistentId"])) == 120
+# end testLongLists
+
+class Core(object):
+    """ the callbacks of DataverseCore used by the list """
+    def __init__(self, root):
+        self.root = root
+        self.Buttons = {}
+    # end __init__
+    def onInputValidate(self, value):
+        return True
+    # end onInputValidate
+    def onBrowse(self, event):
+        pass
+    # end onBrowse
+# end Core
+
+def testVirtualList():
+    """ 10000 files shown through 5 rows of widgets, scrolled and edited """
+    try:
+        root = GUI.Tk.Tk()
+    except GUI.Tk.TclError:
+        pytest.skip("no display")
+    # end try
+    try:
+        DataFilename = ["f%05d.txt" % ii for ii in range(0, 10000)]
+        DataDescription = []
+        table = GUI.DataverseTable([DataFilename, DataDescription])
+        core = Core(root)
+        # the frame of the form, where the scrollbar style is set
+        scrolled = GUI.ScrolledFrame(core)
+        virtual = GUI.VirtualList(scrolled.frame, core, table, ["Data Filename", "Data Description"], visible = 5, browse = "Data")
+        assert len(virtual.rows) == 5
+        assert [entries[0].get() for (label, entries, button) in virtual.rows] == DataFilename[0:5]
+        virtual.scrollEnd()
+        # the last file, then the empty row
+        assert virtual.first == 10001 - 5
+        assert [entries[0].get() for (label, entries, button) in virtual.rows][-2:] == ["f09999.txt", ""]
+        assert virtual.rows[-1][0]["text"] == "#10001 "
+        # typing in the empty row adds a row, the edited rows kept when scrolled away
+        virtual.rows[-1][1][0].insert(0, "new.txt")
+        virtual.rows[0][1][1].insert(0, "edited")
+        virtual.scrollTo(0)
+        assert (len(DataFilename), DataFilename[-1], DataDescription[9996]) == (10001, "new.txt", "edited")
+    finally:
+        root.destroy()
+    # end try
+# end testVirtualList
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# The measurement files: the header and the per-column summary of zinc_oxide.txt and of generated tables
+# (with and without NumPy, NaN and text fields), and the file and dataset descriptions derived from them
+
+import sys, os, os.path, time
+import math
+
+import pytest
+import DataverseMeasure
+from DataverseMeasure import parseMeasurement, parseMeasurements, describeMeasurement, describeMeasurements, describeStream
+
+ZincOxide = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "zinc_oxide.txt")
+
+def readTable(filename, delimiter = "\t"):
+    """ the table of the file, read here apart from the parser """
+    with open(filename, "r", encoding = "utf-8") as fileT:
+        return [[float(field) for field in line.split(delimiter)] for line in fileT if line.strip() and not line.startswith("#")]
+    #
+# end readTable
+
+@pytest.fixture(params = ["numpy", "lines"])
+def reader(request, monkeypatch):
+    """ the table read by NumPy (if installed), then line by line """
+    if request.param == "numpy":
+        if DataverseMeasure.numpy is None:
+            pytest.skip("NumPy not installed")
+        #
+    else:
+        monkeypatch.setattr(DataverseMeasure, "numpy", None)
+    #
+    return request.param
+# end reader
+
+def testZincOxide(reader):
+    measure = parseMeasurement(ZincOxide)
+    header = measure["header"]
+    assert (header["Experiment"], header["User"], header["Date"], header["delimiter"]) == ("van der Pauw / Hall", "Sidi", "2021-01-12 11:30", "\t")
+    assert header["Title"][0] == "zinc_oxide.txt"
+    assert [column["name"] for column in measure["columns"]][0:3] == ["Current (A)", "VoltageDC (V)", "VoltageAB (V)"]
+    table = readTable(ZincOxide)
+    assert (measure["rows"], len(measure["columns"])) == (len(table), 12)
+    for (ii, column) in enumerate(measure["columns"]):
+        values = [row[ii] for row in table]
+        assert (column["min"], column["max"], column["nan"]) == (min(values), max(values), 0)
+        assert math.isclose(column["mean"], sum(values) / len(values), rel_tol = 1e-9, abs_tol = 1e-15)
+    #
+# end testZincOxide
+
+def testNaN(reader, makeFile):
+    """ NaN and text fields counted apart, a column without number summarized as unknown, the COMMA delimiter """
+    path = makeFile("table.csv", "# Experiment: I-V\n# Columns (delimiter = COMMA): V, I, flag\n"
+                                 "0.0, 1.0, nan\n0.5, nan, nan\n1.0, 3.0, nan\n1.5, 4.0, nan\n")
+    measure = parseMeasurement(path)
+    assert measure["rows"] == 4
+    assert [(column["name"], column["min"], column["max"], column["mean"], column["nan"]) for column in measure["columns"]] == \
+        [("V", 0.0, 1.5, 0.75, 0), ("I", 1.0, 4.0, 8.0 / 3.0, 1), ("flag", None, None, None, 4)]
+    # a text field: read line by line even with NumPy
+    path = makeFile("text.txt", "# Columns (delimiter = TAB): time\tstate\n1\tok\n2\t5\n")
+    measure = parseMeasurement(path)
+    assert [(column["min"], column["max"], column["nan"]) for column in measure["columns"]] == [(1.0, 2.0, 0), (5.0, 5.0, 1)]
+# end testNaN
+
+def testNotMeasurement(makeFile):
+    assert parseMeasurement(makeFile("notes.txt", "some notes\n1 2 3\n")) is None
+    assert parseMeasurement(makeFile("comment.txt", "# a comment only\n1 2 3\n")) is None
+    assert parseMeasurement(makeFile("image.png", b"\x89PNG\r\n\x1a\n" + os.urandom(100))) is None
+    assert parseMeasurement(os.path.join(os.path.dirname(ZincOxide), "missing.txt")) is None
+# end testNotMeasurement
+
+def testDescribed(makeFile):
+    measure = parseMeasurement(makeFile("a.txt", "# Date: 2021-01-12\n# User: Sidi\n# Experiment: Hall\n# Comment: ZnO\n"
+                                                 "# Columns (delimiter = TAB): B (T)\tV (V)\n0\t1\n1\tnan\n"))
+    assert describeMeasurement(measure) == "Hall: ZnO (2021-01-12, Sidi). 2 rows x 2 columns: B (T) [0, 1] mean 0.5; V (V) [1, 1] mean 1, 1 NaN"
+    other = parseMeasurement(makeFile("b.txt", "# Date: 2021-02-01\n# User: Jane\n# Experiment: Hall\n# Columns (delimiter = TAB): B (T)\n0\n1\n2\n"))
+    assert describeMeasurements([measure, None, other]) == "Hall; ZnO. Measured from 2021-01-12 to 2021-02-01 by Sidi, Jane. 2 measurement file(s), 5 rows."
+    assert describeMeasurements([None]) == ""
+# end testDescribed
+
+def testPool(makeFile):
+    """ many files parsed on the process pool: the same summaries, in order """
+    filenames = [makeFile("m%02d.txt" % ii, "# Columns (delimiter = TAB): x\n%d\n%d\n" % (ii, 2 * ii)) for ii in range(0, DataverseMeasure.PoolThreshold + 4)]
+    filenames.insert(3, makeFile("notes.txt", "notes"))
+    measures = parseMeasurements(filenames, workers = 2)
+    assert measures[3] is None
+    assert [(measure["columns"][0]["min"], measure["columns"][0]["max"]) for measure in measures if measure is not None] == \
+        [(float(ii), float(2 * ii)) for ii in range(0, DataverseMeasure.PoolThreshold + 4)]
+    # streamed: the empty descriptions only
+    files = [(filename, "kept" if (ii == 0) else "", "raw") for (ii, filename) in enumerate(filenames)]
+    described = list(describeStream(iter(files), workers = 2, groupSize = 8))
+    assert [fileT[0] for fileT in described] == filenames
+    assert (described[0][1], described[3][1]) == ("kept", "")
+    assert described[1][1] == "2 rows x 1 columns: x [1, 2] mean 1.5"
+# end testPool
+
+def testDescribeDataset(makeEngine, makeFile):
+    """ the dataset sent with the descriptions derived from its files """
+    engine = makeEngine()
+    engine.autoDescription = True
+    dataset = {"title": "Sample", "DataFilename": [ZincOxide, makeFile("notes.txt", "notes")], "DataDescription": ["", ""]}
+    result = engine.runDataset(dataset)
+    assert [fileT["status"] for fileT in result["Data"]] == ["OK", "OK"]
+    descriptions = dict((entry["label"], entry["description"]) for entry in engine.listDatasetFiles(result["persistentId"]))
+    assert descriptions["zinc_oxide.txt"].startswith("van der Pauw / Hall: n-type zinc oxide")
+    assert descriptions["notes.txt"] == ""
+    assert describeMeasurements([parseMeasurement(ZincOxide)]) in engine.makeJSON(engine.describeDataset(dataset))
+# end testDescribeDataset
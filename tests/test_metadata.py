@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# The dataset JSON builder: valid documents whatever the values (quotes, backslashes, accents, line feeds),
+# the compact and indented renderings alike, and the file descriptions received as written
+
+import sys, os, os.path, time
+import json
+
+from DataverseMetadata import DataverseMetadata
+
+Dataset = {"title": "ZnO \"nanowires\" \\ batch\n2", "description": "Mesures à 300 K\ttab", "displayName": "Sidi's data",
+           "subject": "Physics", "keyword": ["ZnO", "", "I-V \"dark\""],
+           "author": ["Hamady, Sidi", "Doe, Jane", "No affiliation"], "affiliation": ["LMOPS", "Lab \"B\""], "identifier": ["0000-0001"],
+           "contactname": "Sidi", "contactaffiliation": "LMOPS", "contactemail": "sidi@example.org"}
+
+def citation(JSONcontent):
+    fields = json.loads(JSONcontent)["datasetVersion"]["metadataBlocks"]["citation"]["fields"]
+    return dict((field["typeName"], field["value"]) for field in fields)
+# end citation
+
+def testEscaped():
+    for compact in (True, False):
+        fields = citation(DataverseMetadata(compact = compact).render(Dataset, "2026-01-02"))
+        assert fields["title"] == Dataset["title"]
+        assert fields["dsDescription"][0]["dsDescriptionValue"]["value"] == Dataset["description"]
+        assert [keyword["keywordValue"]["value"] for keyword in fields["keyword"]] == ["ZnO", "I-V \"dark\""]
+        # the authors without affiliation left out
+        assert [(author["authorName"]["value"], author["authorAffiliation"]["value"], author["authorIdentifier"]["value"]) for author in fields["author"]] == \
+            [("Hamady, Sidi", "LMOPS", "0000-0001"), ("Doe, Jane", "Lab \"B\"", "")]
+        assert fields["dateOfDeposit"] == "2026-01-02"
+        assert fields["language"] == ["English"]
+    #
+# end testEscaped
+
+def testCompact():
+    compact = DataverseMetadata(compact = True).render(Dataset, "2026-01-02")
+    indented = DataverseMetadata(compact = False).render(Dataset, "2026-01-02")
+    assert json.loads(compact) == json.loads(indented)
+    assert ("\n" not in compact) and (len(compact) < len(indented))
+    assert indented.splitlines()[1] == "    \"datasetVersion\": {"
+# end testCompact
+
+def testStaticReused():
+    """ the static parts rendered once, the next datasets getting their own values """
+    metadata = DataverseMetadata(compact = True)
+    first = citation(metadata.render(Dataset))
+    rendered = dict(metadata.rendered)
+    second = citation(metadata.render(dict(Dataset, title = "Second \"one\"", keyword = [])))
+    assert metadata.rendered == rendered
+    assert (first["title"], second["title"], second["keyword"]) == (Dataset["title"], "Second \"one\"", [])
+    assert first["producer"] == second["producer"]
+# end testStaticReused
+
+def testFileData(makeEngine, makeFile):
+    metadata = DataverseMetadata()
+    stored = {"storageIdentifier": "s3://bucket:123", "fileName": "a.txt", "mimeType": "text/plain", "checksum": {"@type": "MD5", "@value": "abc"}}
+    assert json.loads(metadata.fileData("a \"b\"", "raw", stored = stored)) == dict(stored, description = "a \"b\"", directoryLabel = "raw",
+                                                                                     categories = ["Data"], restrict = "false")
+    # received as written by the server
+    engine = makeEngine()
+    description = "I-V à 300 K, \"dark\" \\ run\n2"
+    result = engine.runDataset(dict(Dataset, DataFilename = [makeFile("a.txt")], DataDescription = [description]))
+    assert [entry["description"] for entry in engine.listDatasetFiles(result["persistentId"])] == [description]
+# end testFileData
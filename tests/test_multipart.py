@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# The multipart body streamed from disk: the announced length, the chunks bounded whatever the file size,
+# the checksum computed while the file is read, and a large file sent through the engine
+
+import sys, os, os.path, time
+import email.parser
+import hashlib
+import tracemalloc
+
+from DataverseTransport import DataverseMultipart
+
+def testBody(makeFile):
+    files = [makeFile("a.txt", os.urandom(300000)), makeFile("b \"quoted\".csv", b"x,y\n1,2\n")]
+    sent = []
+    body = DataverseMultipart([("jsonData", "{\"description\": \"été\"}")], [("file", os.path.basename(path), path) for path in files],
+                              chunksize = 65536, progress = lambda path, nbytes: sent.append(nbytes), checksum = "MD5")
+    chunks = list(body)
+    data = b"".join(chunks)
+    assert len(body) == len(data)
+    assert max([len(chunk) for chunk in chunks]) <= 65536
+    assert sum(sent) == sum([os.path.getsize(path) for path in files])
+    assert body.digests == dict((path, hashlib.md5(open(path, "rb").read()).hexdigest()) for path in files)
+
+    message = email.parser.BytesParser().parsebytes(b"Content-Type: " + body.contentType.encode("ascii") + b"\r\n\r\n" + data)
+    parts = message.get_payload()
+    assert [part.get_param("name", header = "Content-Disposition") for part in parts] == ["jsonData", "file", "file"]
+    assert parts[0].get_payload(decode = True).decode("utf-8") == "{\"description\": \"été\"}"
+    assert parts[1].get_payload(decode = True) == open(files[0], "rb").read()
+    assert parts[2].get_content_type() == "text/csv"
+    # sent again (a retry): the same body
+    assert b"".join(body) == data
+# end testBody
+
+def testConstantMemory(makeFile):
+    """ the memory used to send a file does not grow with its size """
+    path = makeFile("large.bin", b"")
+    with open(path, "wb") as fileT:
+        for ii in range(0, 32):
+            fileT.write(os.urandom(1 << 20))
+        #
+    #
+    body = DataverseMultipart([], [("file", "large.bin", path)], chunksize = 1 << 18, checksum = "MD5")
+    tracemalloc.start()
+    try:
+        length = sum([len(chunk) for chunk in body])
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    # end try
+    assert length == len(body)
+    assert peak < (4 << 20)
+# end testConstantMemory
+
+def testUploaded(makeEngine, makeFile):
+    engine = makeEngine()
+    content = os.urandom(5 << 20)
+    result = engine.runDataset({"title": "Sample", "DataFilename": [makeFile("large.bin", content)]})
+    assert [fileT["status"] for fileT in result["Data"]] == ["OK"]
+    listed = engine.listDatasetFiles(result["persistentId"])
+    assert [entry["dataFile"]["checksum"]["value"] for entry in listed] == [hashlib.md5(content).hexdigest()]
+# end testUploaded
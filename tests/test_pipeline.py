@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# The pipeline of datasets: the next datasets created while the files of the first ones are sent,
+# the results in the datasets order, each one reported as it ends, a failed dataset not stopping the others
+
+import sys, os, os.path, time
+import json
+
+from DataverseRetry import DataverseRetryPolicy
+from DataverseBatch import main
+
+def makeDatasets(makeFile, count, files = 2):
+    return [{"title": "Sample %d" % ii, "DataFilename": [makeFile("s%d/f%d.txt" % (ii, jj), b"%d-%d" % (ii, jj)) for jj in range(0, files)]}
+            for ii in range(0, count)]
+# end makeDatasets
+
+def testPipeline(makeEngine, makeFile):
+    engine = makeEngine(latency = 0.05)
+    engine.datasetWorkers = 3
+    engine.createWorkers = 2
+    datasets = makeDatasets(makeFile, 6)
+    reported = []
+    tic = time.perf_counter()
+    results = engine.runDatasets(datasets, callback = lambda index, result: reported.append((index, result["status"])))
+    pipelined = time.perf_counter() - tic
+    assert [(result["title"], result["status"]) for result in results] == [("Sample %d" % ii, "OK") for ii in range(0, 6)]
+    assert sorted(reported) == [(ii, "OK") for ii in range(0, 6)]
+    assert len(set([result["persistentId"] for result in results])) == 6
+    for (ii, result) in enumerate(results):
+        assert sorted([entry["label"] for entry in engine.listDatasetFiles(result["persistentId"])]) == ["f0.txt", "f1.txt"]
+        assert result["elapsed"] > 0
+    #
+    # one dataset after the other: a creation then the files, for each one
+    tic = time.perf_counter()
+    for dataset in datasets:
+        engine.runDataset(dataset)
+    #
+    serial = time.perf_counter() - tic
+    assert pipelined < (serial / 1.5)
+# end testPipeline
+
+def testFailures(makeEngine, makeFile, tmp_path):
+    """ a dataset not created and a file refused: reported as failed, the other datasets populated """
+    engine = makeEngine(refuse = 1)
+    engine.retry = DataverseRetryPolicy(attempts = 1)
+    engine.datasetWorkers = 2
+    datasets = makeDatasets(makeFile, 4)
+    # the JSON file of the second dataset cannot be written: not created
+    datasets[1]["JSONfilename"] = str(tmp_path / "missing" / "dir" / "dataset.json")
+    reported = []
+    results = engine.runDatasets(datasets, callback = lambda index, result: reported.append(index))
+    assert sorted(reported) == [0, 1, 2, 3]
+    assert (results[1]["status"], results[1]["persistentId"], results[1]["Data"]) == ("ERROR", "", [])
+    assert "dataset.json" in results[1]["message"]
+    # the file refused once, in one of the created datasets
+    others = [results[ii] for ii in (0, 2, 3)]
+    assert sorted([result["status"] for result in others]) == ["ERROR", "OK", "OK"]
+    assert sum([[fileT["status"] for fileT in result["Data"]].count("ERROR") for result in others]) == 1
+# end testFailures
+
+def testBatch(makeEngine, makeFile, tmp_path):
+    """ --datasets: the batch tool running the pipeline, the results written in the manifest order """
+    engine = makeEngine(latency = 0.01)
+    manifest = tmp_path / "campaign.json"
+    manifest.write_text(json.dumps({"datasets": [dict(dataset, dataset = "S%d" % ii) for (ii, dataset) in enumerate(makeDatasets(makeFile, 5))]}),
+                        encoding = "utf-8")
+    output = str(tmp_path / "results.json")
+    assert main([str(manifest), "--datasets", "3", "--key", "key", "--dataverse-server", engine.DATAVERSE_SERVER, "--dataset-server", engine.DATASET_SERVER,
+                 "--no-journal", "--output", output]) == 0
+    with open(output, "r", encoding = "utf-8") as fileT:
+        results = json.load(fileT)
+    #
+    assert [(result["title"], result["status"], len(result["Data"])) for result in results] == [("Sample %d" % ii, "OK", 2) for ii in range(0, 5)]
+# end testBatch
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# The bounded pool of upload workers: the files sent concurrently, never more at a time than the workers,
+# and the results returned in the files order
+
+import sys, os, os.path, time
+
+from DataverseRetry import DataverseRetryPolicy
+
+def upload(engine, makeFile, count, workers):
+    persistentId = engine.parsePersistentId(engine.uploadJSON(engine.makeJSON({"title": "Sample"})))
+    files = [(makeFile("f%02d.txt" % ii, b"%d" % ii), "file %d" % ii, "") for ii in range(0, count)]
+    tic = time.perf_counter()
+    results = engine.uploadFiles(persistentId, files, workers)
+    return results, time.perf_counter() - tic
+# end upload
+
+def testBounded(makeEngine, makeFile):
+    """ a server answering 503 beyond 3 uploads in flight, never refused with 3 workers, not sent again """
+    engine = makeEngine(latency = 0.05, capacity = 3)
+    engine.retry = DataverseRetryPolicy(attempts = 1)
+    results, elapsed = upload(engine, makeFile, 12, 3)
+    assert [result["status"] for result in results] == ["OK"] * 12
+    assert [os.path.basename(result["filename"]) for result in results] == ["f%02d.txt" % ii for ii in range(0, 12)]
+    # more workers than the server takes: refused
+    results, elapsed = upload(engine, makeFile, 12, 6)
+    assert "ERROR" in [result["status"] for result in results]
+# end testBounded
+
+def testConcurrent(makeEngine, makeFile):
+    engine = makeEngine(latency = 0.1)
+    results, serial = upload(engine, makeFile, 8, 1)
+    results, concurrent = upload(engine, makeFile, 8, 4)
+    assert [result["status"] for result in results] == ["OK"] * 8
+    assert concurrent < (serial / 2.0)
+# end testConcurrent
+
+def testSerialized(makeEngine, makeFile):
+    """ serializeUploads: one upload at a time whatever the workers """
+    engine = makeEngine(latency = 0.02, capacity = 1)
+    engine.retry = DataverseRetryPolicy(attempts = 1)
+    engine.serializeUploads = True
+    results, elapsed = upload(engine, makeFile, 6, 4)
+    assert [result["status"] for result in results] == ["OK"] * 6
+# end testSerialized
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# The upload progress: files and bytes counted, the throughput over the last seconds and the time left
+# (on a clock set by the test), the curl progress meter read, and the bytes of real uploads followed
+
+import sys, os, os.path, time
+import json
+
+import DataverseProgress
+from DataverseProgress import DataverseProgress as Progress, parseCurlMeter, formatSize, formatDuration
+from DataverseBatch import main
+
+class Clock(object):
+    def __init__(self):
+        self.now = 1000.0
+    # end __init__
+    def time(self):
+        return self.now
+    # end time
+# end Clock
+
+def testCounted(makeFile):
+    progress = Progress()
+    a, b = makeFile("a.bin", b"a" * 1000), makeFile("b.bin", b"b" * 3000)
+    progress.expect([(a, "", ""), (b, "", ""), (a, "", "")])
+    assert (progress.filesTotal, progress.bytesTotal) == (2, 4000)
+    progress.begin(a)
+    progress.advance(a, 600)
+    snapshot = progress.snapshot()
+    assert (snapshot["bytesDone"], snapshot["current"][0]["sent"], snapshot["current"][0]["size"]) == (600, 600, 1000)
+    # locked: not ended, sent again
+    progress.end(a, "LOCKED")
+    assert progress.filesDone == 0
+    progress.begin(a)
+    progress.advance(a, 1000)
+    progress.end(a)
+    progress.begin(b)
+    progress.advance(b, 3000)
+    progress.end(b, "ERROR")
+    # skipped (journal) without being announced
+    progress.end(makeFile("c.bin"))
+    snapshot = progress.snapshot()
+    assert (snapshot["filesDone"], snapshot["filesFailed"], snapshot["filesTotal"]) == (3, 1, 3)
+    assert (snapshot["bytesDone"], snapshot["bytesTotal"], snapshot["bytesSent"]) == (4000, 4000, 4600)
+    assert (snapshot["current"], snapshot["eta"]) == ([], 0.0)
+# end testCounted
+
+def testRate(monkeypatch, makeFile):
+    clock = Clock()
+    monkeypatch.setattr(DataverseProgress.time, "time", clock.time)
+    progress = Progress(window = 10.0)
+    path = makeFile("a.bin", b"a" * 10000)
+    progress.expect([(path,)])
+    progress.begin(path)
+    clock.now += 0.5
+    progress.advance(path, 500)
+    # no estimate before a second
+    assert progress.snapshot()["eta"] is None
+    for ii in range(0, 3):
+        clock.now += 0.5
+        progress.advance(path, 500)
+    #
+    snapshot = progress.snapshot()
+    assert abs(snapshot["rate"] - 1000.0) < 1e-6
+    assert abs(snapshot["eta"] - 8.0) < 1e-6
+    assert progress.format(snapshot) == "0/1 file(s)  2.0 kB/10.0 kB  0.00 MB/s  ETA 0:00:08"
+    # the throughput of the last seconds only
+    for ii in range(0, 20):
+        clock.now += 1.0
+        progress.advance(path, 100)
+    #
+    assert abs(progress.rate() - 100.0) < 20.0
+    # nothing sent for the window: stalled
+    clock.now += 10.0
+    snapshot = progress.snapshot()
+    assert (snapshot["rate"], snapshot["eta"], snapshot["stalled"]) == (0.0, None, True)
+    assert progress.format(snapshot).endswith("ETA -:--:--  stalled")
+# end testRate
+
+def testReported(monkeypatch):
+    """ the callback at most every interval seconds """
+    clock = Clock()
+    monkeypatch.setattr(DataverseProgress.time, "time", clock.time)
+    reports = []
+    progress = Progress(lambda progress: reports.append(clock.now), interval = 0.5)
+    for ii in range(0, 20):
+        clock.now += 0.1
+        progress.advance("a.bin", 10)
+    #
+    assert len(reports) == 4
+# end testReported
+
+def testFormat():
+    assert [formatSize(size) for size in (12, 1500, 2500000, 3.2e9)] == ["12 B", "1.5 kB", "2.5 MB", "3.2 GB"]
+    assert [formatDuration(seconds) for seconds in (None, 0, 59.6, 3725)] == ["-:--:--", "0:00:00", "0:01:00", "1:02:05"]
+    line = "  42 1234M    0     0   42  520M      0  10.1M  0:02:02  0:00:51  0:01:11 10.3M"
+    assert parseCurlMeter(line) == 520 * (1 << 20)
+    assert parseCurlMeter("  % Total    % Received % Xferd  Average Speed   Time    Time     Time  Current") is None
+# end testFormat
+
+def testUpload(makeEngine, makeFile):
+    """ the bytes of real uploads, reported while they are sent """
+    engine = makeEngine(bandwidth = 4 << 20)
+    engine.uploadChunkSize = 1 << 16
+    reports = []
+    engine.progress = Progress(lambda progress: reports.append(progress.snapshot()), interval = 0.05)
+    files = [makeFile("f%d.bin" % ii, os.urandom(1 << 20)) for ii in range(0, 3)]
+    result = engine.runDataset({"title": "Sample", "DataFilename": files})
+    assert [fileT["status"] for fileT in result["Data"]] == ["OK"] * 3
+    snapshot = engine.progress.snapshot()
+    assert (snapshot["filesDone"], snapshot["filesTotal"], snapshot["bytesDone"], snapshot["bytesTotal"]) == (3, 3, 3 << 20, 3 << 20)
+    assert snapshot["bytesSent"] >= (3 << 20)
+    # reported while sending, the totals known from the start
+    assert (len(reports) >= 2) and (reports[0]["bytesDone"] < (3 << 20))
+    assert all([report["bytesTotal"] == (3 << 20) for report in reports])
+    assert [report["bytesDone"] for report in reports] == sorted([report["bytesDone"] for report in reports])
+# end testUpload
+
+def testBatch(makeEngine, makeFile, tmp_path, capsys):
+    engine = makeEngine()
+    manifest = tmp_path / "campaign.json"
+    manifest.write_text(json.dumps({"datasets": [{"dataset": "S1", "title": "Sample", "DataFilename": [makeFile("a.txt", b"a" * 2000), makeFile("b.txt")]}]}),
+                        encoding = "utf-8")
+    assert main([str(manifest), "--progress", "--key", "key", "--dataverse-server", engine.DATAVERSE_SERVER, "--dataset-server", engine.DATASET_SERVER,
+                 "--no-journal"]) == 0
+    assert capsys.readouterr().err.splitlines()[-1].startswith("2/2 file(s)  2.0 kB/2.0 kB")
+# end testBatch
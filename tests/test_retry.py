@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# Server pushback: the requests refused for a while are sent again after a backoff (or the delay asked by
+# the server), the others are not; the adaptive number of uploads in flight follows the server
+
+import sys, os, os.path, time
+import asyncio
+import subprocess
+import email.utils
+
+from DataverseRetry import DataverseRetryPolicy, DataverseConcurrency, retryAfter
+from DataverseAsync import AsyncDataverseEngine
+
+class Timings(object):
+    """ the (operation, HTTP status) of the requests sent, as recorded by the engine """
+
+    def __init__(self):
+        self.records = []
+    # end __init__
+
+    def record(self, operation, url, filename, size, status, timing):
+        self.records.append((operation, status))
+    # end record
+
+    def statuses(self, operation):
+        return [status for (operationT, status) in self.records if operationT == operation]
+    # end statuses
+
+# end Timings
+
+def testRetried(makeEngine, makeFile):
+    engine = makeEngine(refuse = 2)
+    engine.timings = Timings()
+    result = engine.runDataset({"title": "Sample", "DataFilename": [makeFile("a.txt")]})
+    assert result["Data"][0]["status"] == "OK"
+    assert engine.timings.statuses("add") == [503, 503, 200]
+# end testRetried
+
+def testRetriedAsync(makeEngine, makeFile):
+    engine = makeEngine(AsyncDataverseEngine, refuse = 2)
+    engine.timings = Timings()
+    result = asyncio.run(engine.runDatasets([{"title": "Sample", "DataFilename": [makeFile("a.txt")]}]))[0]
+    assert result["Data"][0]["status"] == "OK"
+    assert engine.timings.statuses("add") == [503, 503, 200]
+# end testRetriedAsync
+
+def testGivenUp(makeEngine, makeFile):
+    engine = makeEngine(refuse = 10)
+    engine.retry.attempts = 3
+    engine.timings = Timings()
+    result = engine.runDataset({"title": "Sample", "DataFilename": [makeFile("a.txt")]})
+    assert result["Data"][0]["status"] == "ERROR"
+    assert result["Data"][0]["message"] == "server busy"
+    assert engine.timings.statuses("add") == [503, 503, 503]
+# end testGivenUp
+
+def testNotRetried(makeEngine):
+    """ an error that will not go away (404) is not sent again """
+    engine = makeEngine()
+    engine.DATAVERSE_SERVER = engine.DATAVERSE_SERVER.replace("/api/dataverses/", "/api/unknown/")
+    engine.timings = Timings()
+    try:
+        engine.runDataset({"title": "Sample"})
+    except ValueError as excT:
+        assert "dataset not created" in str(excT)
+    else:
+        assert False, "dataset created"
+    # end try
+    assert engine.timings.statuses("create") == [404]
+# end testNotRetried
+
+def testRetryAfter():
+    assert retryAfter({"Retry-After": "3"}) == 3.0
+    assert retryAfter({"retry-after": "-1"}) == 0.0
+    assert retryAfter({"Content-Type": "application/json"}) is None
+    assert retryAfter({"Retry-After": "soon"}) is None
+    delay = retryAfter({"Retry-After": email.utils.formatdate(time.time() + 30, usegmt = True)})
+    assert 25 <= delay <= 31
+# end testRetryAfter
+
+def testDelay():
+    policy = DataverseRetryPolicy(attempts = 5, base = 1.0, cap = 10.0)
+    for attempt in range(1, 6):
+        for ii in range(0, 50):
+            assert 0.0 <= policy.delay(attempt) <= min(10.0, 2.0 ** attempt)
+        #
+    #
+    # the delay asked by the server, within the cap
+    assert policy.delay(1, 4.0) == 4.0
+    assert policy.delay(1, 3600.0) == 10.0
+# end testDelay
+
+def testRetryable():
+    policy = DataverseRetryPolicy()
+    assert all([policy.isRetryable(status) for status in (429, 502, 503, 504)])
+    assert not any([policy.isRetryable(status) for status in (200, 400, 401, 403, 404, 500)])
+    assert policy.isRetryable(0, ConnectionResetError())
+    assert policy.isRetryable(0, TimeoutError())
+    assert policy.isRetryable(0, subprocess.CalledProcessError(7, ["curl"]))
+    assert not policy.isRetryable(0, subprocess.CalledProcessError(3, ["curl"]))
+    assert not policy.isRetryable(0, ValueError())
+# end testRetryable
+
+def testConcurrency():
+    concurrency = DataverseConcurrency(initial = 8, maximum = 16)
+    concurrency.acquire()
+    concurrency.release(pushback = True)
+    assert int(concurrency.limit) == 4
+
+    # answered quickly: about one more upload in flight every limit answers
+    for ii in range(0, 5):
+        concurrency.acquire()
+        concurrency.release(latency = 0.01)
+    #
+    assert int(concurrency.limit) == 5
+
+    # slow answers: kept
+    for ii in range(0, 10):
+        concurrency.acquire()
+        concurrency.release(latency = 1.0)
+    #
+    assert int(concurrency.limit) == 5
+    assert [int(limit) for (toc, limit) in concurrency.history] == [8, 4, 5]
+# end testConcurrency
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# The pooled keep-alive sessions: one connection opened for the requests in sequence, and the phases
+# of a new connection (DNS, TCP connection, TLS handshake) timed, over HTTP and HTTPS
+
+import sys, os, os.path, time
+import shutil
+import subprocess
+import threading
+import ssl
+import json
+
+import pytest
+from DataverseTransport import DataverseSession, timedConnectionClass
+from DataverseBenchmark import makeMockHandler
+
+def testPooled(mockServer):
+    port = int(mockServer().rsplit(":", 1)[-1])
+    session = DataverseSession("http", "127.0.0.1", port)
+    responses = [session.request("GET", "http://127.0.0.1:%d/api/info/version" % port) for ii in range(0, 5)]
+    assert [response.status for response in responses] == [200] * 5
+    assert [response.timing["reused"] for response in responses] == [False, True, True, True, True]
+    first = responses[0].timing
+    assert (first["dns"] >= 0) and (first["connect"] >= 0) and ("tls" not in first)
+    assert first["total"] >= (first["upload"] + first["server"] + first["download"])
+    assert len(session.idle) == 1
+    # the connection does not patch the internals of http.client
+    import socket
+    assert getattr(session.idle[0], "_create_connection", socket.create_connection) is socket.create_connection
+    session.close()
+# end testPooled
+
+def testConcurrent(mockServer):
+    """ the workers in flight each on their own connection, kept for the next requests """
+    port = int(mockServer(latency = 0.05).rsplit(":", 1)[-1])
+    session = DataverseSession("http", "127.0.0.1", port, poolsize = 4)
+    threads = [threading.Thread(target = session.request, args = ("GET", "http://127.0.0.1:%d/api/info/version" % port)) for ii in range(0, 4)]
+    for thread in threads:
+        thread.start()
+    #
+    for thread in threads:
+        thread.join()
+    #
+    assert len(session.idle) == 4
+    assert session.request("GET", "http://127.0.0.1:%d/api/info/version" % port).timing["reused"]
+    session.close()
+# end testConcurrent
+
+def testUnresolved():
+    session = DataverseSession("http", "unknown.invalid", 80)
+    with pytest.raises(OSError):
+        session.request("GET", "http://unknown.invalid/api/info/version")
+    #
+# end testUnresolved
+
+def testConnectionClasses():
+    import http.client
+    assert issubclass(timedConnectionClass("http"), http.client.HTTPConnection)
+    https = timedConnectionClass("https")
+    assert issubclass(https, http.client.HTTPSConnection)
+    # the TCP connection timed by the HTTP class, under the TLS handshake
+    assert https.__mro__.index(timedConnectionClass("http")) > https.__mro__.index(http.client.HTTPSConnection)
+# end testConnectionClasses
+
+@pytest.mark.skipif(shutil.which("openssl") is None, reason = "openssl not installed")
+def testHTTPS(tmp_path):
+    """ a new connection to an HTTPS stand-in: DNS, TCP and TLS timed apart, the certificate checked for localhost """
+    import http.server
+    cert, key = str(tmp_path / "cert.pem"), str(tmp_path / "key.pem")
+    subprocess.check_call(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1", "-subj", "/CN=localhost",
+                           "-addext", "subjectAltName=DNS:localhost", "-keyout", key, "-out", cert], stdout = subprocess.DEVNULL, stderr = subprocess.DEVNULL)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), makeMockHandler(0, 0))
+    server.daemon_threads = True
+    contextT = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    contextT.load_cert_chain(cert, key)
+    server.socket = contextT.wrap_socket(server.socket, server_side = True)
+    thread = threading.Thread(target = server.serve_forever, kwargs = {"poll_interval": 0.05})
+    thread.daemon = True
+    thread.start()
+    try:
+        port = server.server_address[1]
+        session = DataverseSession("https", "localhost", port)
+        session.context = ssl.create_default_context(cafile = cert)
+        responses = [session.request("GET", "https://localhost:%d/api/info/version" % port) for ii in range(0, 2)]
+        assert json.loads(responses[0].text)["status"] == "OK"
+        timing = responses[0].timing
+        assert not timing["reused"]
+        assert (timing["dns"] >= 0) and (timing["connect"] >= 0) and (timing["tls"] > 0)
+        assert responses[1].timing["reused"]
+        session.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+    # end try
+# end testHTTPS
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# The startup: Tk and the modules used only to send (http.client, ssl, zipfile, the thread pools...)
+# not loaded by importing the engine, the batch tool or the interface, but when first used
+
+import sys, os, os.path, time
+import subprocess
+
+import pytest
+import DataverseBenchmark
+
+Directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# loaded when used only
+Deferred = ("tkinter", "http.client", "ssl", "zipfile", "mimetypes", "subprocess", "tempfile", "concurrent.futures", "asyncio")
+
+def loaded(script):
+    """ the deferred modules loaded by the script, run in a fresh interpreter without the site packages (whose .pth
+        files may import some of them) """
+    Stdout = subprocess.check_output([sys.executable, "-S", "-c", script + "\nprint(' '.join([name for name in %r if name in sys.modules]))" % (Deferred,)],
+                                     cwd = Directory)
+    return Stdout.decode("utf-8").split()
+# end loaded
+
+def testDeferred():
+    for module in ("DataverseEngine", "DataverseBatch", "DataverseCore"):
+        assert loaded("import sys, %s" % module) == [], module
+    #
+    # the interface object created (without being shown) and a dataset built
+    assert loaded("import sys, DataverseCore\ncore = DataverseCore.DataverseCore()\ncore.makeJSON({'title': 'Sample'})") == []
+# end testDeferred
+
+def testLoadedOnUse():
+    used = loaded("import sys, DataverseTransport\nDataverseTransport.getSession('http://127.0.0.1:1/api')")
+    assert ("http.client" in used) and ("tkinter" not in used)
+    pytest.importorskip("tkinter")
+    assert "tkinter" in loaded("import sys, DataverseCore\nDataverseCore.loadGUI()")
+# end testLoadedOnUse
+
+def testTimeImport():
+    seconds, tkLoaded = DataverseBenchmark.timeImport("DataverseCore", Directory)
+    assert (seconds > 0) and (not tkLoaded)
+# end testTimeImport
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Dataverse Utility.
+# Tool for automating data repositories on Dataverse.
+# To develop and adapt to the specific needs of experimental platforms.
+# (C) Université de Lorraine
+# Developed by Pr. Sidi HAMADY <sidi.hamady@univ-lorraine.fr>
+# Released under the MIT licence (https://opensource.org/licenses/MIT)
+
+# The timing records: the phases of every request of an upload job written as JSON lines or CSV,
+# by the engines and the curl transport, and appended to by the next jobs
+
+import sys, os, os.path, time
+import json
+import csv
+import shutil
+import asyncio
+
+import pytest
+from DataverseTiming import DataverseTimings, TimingFields
+from DataverseAsync import AsyncDataverseEngine
+from DataverseBatch import main
+
+def readJSONL(filename):
+    with open(filename, "r", encoding = "utf-8") as fileT:
+        return [json.loads(line) for line in fileT]
+    #
+# end readJSONL
+
+def readCSV(filename):
+    with open(filename, "r", encoding = "utf-8", newline = "") as fileT:
+        return list(csv.DictReader(fileT))
+    #
+# end readCSV
+
+def checkPhases(record, reused):
+    """ the phases measured (upload, server, download within the total), the connection phases only on a new connection """
+    assert record["reused"] == reused
+    assert 0 <= (record["upload"] + record["server"] + record["download"]) <= (record["total"] + 1e-5)
+    if reused:
+        assert (record["dns"], record["connect"], record["tls"]) == (None, None, None)
+    else:
+        assert (record["dns"] >= 0) and (record["connect"] >= 0) and (record["tls"] is None)
+    #
+# end checkPhases
+
+def testRecorded(makeEngine, makeFile, tmp_path):
+    engine = makeEngine(latency = 0.02)
+    engine.uploadWorkers = 1
+    engine.timings = DataverseTimings(str(tmp_path / "timings.jsonl"))
+    files = [makeFile("a.txt", b"a" * 3000), makeFile("b.txt", b"b" * 5000)]
+    result = engine.runDataset({"title": "Sample", "DataFilename": files})
+    engine.timings.close()
+    records = readJSONL(str(tmp_path / "timings.jsonl"))
+    assert [record["operation"] for record in records] == ["create", "add", "add"]
+    assert all([list(record.keys()) == TimingFields for record in records])
+    assert [(os.path.basename(record["filename"]), record["status"]) for record in records[1:]] == [("a.txt", 200), ("b.txt", 200)]
+    # the size of the request body, the multipart head included
+    assert (records[1]["size"] > 3000) and (records[2]["size"] > 5000)
+    # the server latency seen between the body sent and the answer
+    assert all([record["server"] >= 0.015 for record in records])
+    checkPhases(records[0], False)
+    checkPhases(records[2], True)
+# end testRecorded
+
+def testCSV(makeEngine, makeFile, tmp_path):
+    """ the batch tool writing CSV, the next job appending its records under the same header """
+    engine = makeEngine()
+    manifest = tmp_path / "campaign.json"
+    manifest.write_text(json.dumps({"datasets": [{"dataset": "S1", "title": "Sample", "DataFilename": [makeFile("a.txt"), makeFile("b.txt")]}]}),
+                        encoding = "utf-8")
+    filename = str(tmp_path / "timings" / "job.csv")
+    options = [str(manifest), "--timings", filename, "--key", "key", "--dataverse-server", engine.DATAVERSE_SERVER,
+               "--dataset-server", engine.DATASET_SERVER, "--no-journal"]
+    assert main(options) == 0
+    assert main(options) == 0
+    with open(filename, "r", encoding = "utf-8") as fileT:
+        assert fileT.readline().strip() == ",".join(TimingFields)
+    #
+    records = readCSV(filename)
+    assert [record["operation"] for record in records] == ["create", "add", "add"] * 2
+    # not measured: empty
+    assert records[0]["tls"] == ""
+    assert all([float(record["total"]) > 0 for record in records])
+# end testCSV
+
+def testAsync(makeEngine, makeFile, tmp_path):
+    engine = makeEngine(AsyncDataverseEngine)
+    engine.timings = DataverseTimings(str(tmp_path / "timings.jsonl"))
+    asyncio.run(engine.runDatasets([{"title": "Sample", "DataFilename": [makeFile("a.txt"), makeFile("b.txt")]}]))
+    engine.timings.close()
+    records = readJSONL(str(tmp_path / "timings.jsonl"))
+    assert sorted([record["operation"] for record in records]) == ["add", "add", "create"]
+    assert all([record["total"] > 0 for record in records])
+# end testAsync
+
+@pytest.mark.skipif(shutil.which("curl") is None, reason = "curl not installed")
+def testCurl(makeEngine, makeFile, tmp_path):
+    """ the phases read from the curl timing variables """
+    engine = makeEngine()
+    engine.useCurl = True
+    engine.timings = DataverseTimings(str(tmp_path / "timings.jsonl"))
+    result = engine.runDataset({"title": "Sample", "DataFilename": [makeFile("a.txt", b"a" * 4000)]})
+    engine.timings.close()
+    assert [fileT["status"] for fileT in result["Data"]] == ["OK"]
+    records = readJSONL(str(tmp_path / "timings.jsonl"))
+    assert [(record["operation"], record["status"]) for record in records] == [("create", 201), ("add", 200)]
+    for record in records:
+        assert all([record[phase] is not None for phase in ("connect", "server", "total")])
+        # the upload told apart from curl 8.10, otherwise counted in the server time
+        assert (record["upload"] is not None) == engine.curlPosttransfer
+    #
+# end testCurl